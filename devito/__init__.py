@@ -5,19 +5,19 @@ from subprocess import PIPE, Popen
 from collections import namedtuple
 from itertools import product
 
-import cpuinfo
-
 from devito.base import *  # noqa
+from devito.bundle import *  # noqa
 from devito.data import *  # noqa
 from devito.dimension import *  # noqa
 from devito.equation import *  # noqa
 from devito.finite_difference import *  # noqa
 from devito.function import Buffer # noqa
 from devito.logger import error, warning, info, set_log_level, silencio  # noqa
+from devito.memory import *  # noqa
 from devito.parameters import *  # noqa
 from devito.tools import *  # noqa
 
-from devito.compiler import compiler_registry
+from devito.compiler import compiler_id, compiler_registry
 from devito.backends import backends_registry, init_backend
 
 
@@ -61,6 +61,10 @@ configuration.add('autotuning', 'off', at_accepted, callback=_at_callback)  # no
 # Should Devito emit the JIT compilation commands?
 configuration.add('debug_compiler', 0, [0, 1], lambda i: bool(i))
 
+# Should Devito compile each function of an Operator (i.e., the kernel and its
+# elemental functions) as a separate compilation unit, all units concurrently?
+configuration.add('jit-split', 0, [0, 1], lambda i: bool(i))
+
 # Set the Instruction Set Architecture (ISA)
 ISAs = ['cpp', 'avx', 'avx2', 'avx512']
 configuration.add('isa', 'cpp', ISAs)
@@ -70,12 +74,23 @@ PLATFORMs = ['intel64', 'snb', 'ivb', 'hsw', 'bdw', 'skx', 'knl']
 configuration.add('platform', 'intel64', PLATFORMs)
 
 
+def _cpu_id():
+    """
+    Return a string identifying the host CPU model and the compiler used to
+    query it, so that cached results of :func:`infer_cpu` may be invalidated.
+    """
+    return '%s/%s' % (cpu_model(), compiler_id('gcc'))
+
+
+@host_cached(key=_cpu_id)
 def infer_cpu():
     """
     Detect the highest Instruction Set Architecture and the platform
     codename using cpu flags and/or leveraging other tools. Return default
-    values if the detection procedure was unsuccesful.
+    values if the detection procedure was unsuccesful. The detection is
+    expensive, so its outcome is cached on disk, per host.
     """
+    import cpuinfo  # Slow to import, and rarely needed
     cpu_info = cpuinfo.get_cpu_info()
     # ISA
     isa = configuration._defaults['isa']
@@ -0,0 +1,246 @@
+from __future__ import absolute_import
+
+from collections import OrderedDict
+
+import cgen as c
+from cached_property import cached_property
+
+from devito.compiler import jit_compile, load
+from devito.cgen_utils import blankline
+from devito.ir.iet import Call, CGen, FindNodes
+from devito.operator import jit_code
+from devito.parameters import configuration
+from devito.tools import Signer, as_tuple, filter_ordered, flatten
+
+__all__ = ['OperatorBundle']
+
+
+class OperatorBundle(Signer):
+
+    """
+    A collection of :class:`Operator`s JIT-compiled into a single shared object.
+
+    The Operators are emitted into a single translation unit, in which the
+    elemental functions (e.g., those created by the DLE, or the MPI halo
+    exchange routines) that are identical across the Operators are defined
+    only once. Thus, a single compiler invocation and a single library load
+    replace one per Operator. Each Operator retains the usual ``apply``
+    semantics; the bundle is compiled, and loaded, upon the first ``apply``
+    of any of its Operators.
+
+    :param operators: The :class:`Operator`s. They must have distinct names
+                      and use the same compiler.
+    """
+
+    def __init__(self, *operators):
+        operators = flatten(as_tuple(i) for i in operators)
+        names = [i.name for i in operators]
+        if len(set(names)) != len(names):
+            raise ValueError("The Operators in a bundle must have distinct "
+                             "names (got: %s)" % ', '.join(names))
+        if len(set(str(i._compiler) for i in operators)) > 1:
+            raise ValueError("The Operators in a bundle must use the same compiler")
+
+        self.operators = tuple(operators)
+        self._compiler = operators[0]._compiler
+        self._lib = None
+        for i in operators:
+            i._bundle = self
+
+    def __iter__(self):
+        return iter(self.operators)
+
+    def __len__(self):
+        return len(self.operators)
+
+    def __getitem__(self, key):
+        """Retrieve an Operator by position or by name."""
+        if isinstance(key, str):
+            try:
+                return next(i for i in self.operators if i.name == key)
+            except StopIteration:
+                raise KeyError(key)
+        return self.operators[key]
+
+    @cached_property
+    def _efuncs(self):
+        """
+        Map each Operator to a dictionary ``{name: (bundle name, key)}`` for each
+        of its (local) elemental functions, where ``key`` identifies the elemental
+        function in the bundle. Two elemental functions share the same key, and
+        thus the same definition, if and only if they have the same name, the
+        same code, and their callees recursively share the same keys.
+        """
+        # The names that may not be given to an elemental function
+        taken = set(i.name for i in self.operators)
+        taken.update(k for i in self.operators for k, v in i._func_table.items()
+                     if not v.local)
+
+        mapper = OrderedDict()
+        names = {}
+        for op in self.operators:
+            efuncs = OrderedDict((k, v.root) for k, v in op._func_table.items()
+                                 if v.local)
+            keys = {}
+            mapper[op] = OrderedDict()
+            for name in efuncs:
+                k = _efunc_key(name, efuncs, keys)
+                if k not in names:
+                    candidate, n = name, 0
+                    while candidate in taken:
+                        candidate = '%s_%d' % (name, n)
+                        n += 1
+                    names[k] = candidate
+                    taken.add(candidate)
+                mapper[op][name] = (names[k], k)
+        return mapper
+
+    @cached_property
+    def _structs(self):
+        """
+        Map each Operator to a dictionary ``{tag: new tag}`` for the structs in
+        its globals (e.g., the profiler struct) whose tag clashes with that of a
+        different struct defined by another Operator.
+        """
+        definitions = {}
+        for op in self.operators:
+            for i in op._globals:
+                if isinstance(i, c.Struct):
+                    definitions.setdefault(i.tpname, set()).add(str(i))
+        clashing = set(k for k, v in definitions.items() if len(v) > 1)
+        return OrderedDict((op, {i.tpname: '%s_%s' % (i.tpname, op.name)
+                                 for i in op._globals
+                                 if isinstance(i, c.Struct) and i.tpname in clashing})
+                           for op in self.operators)
+
+    @cached_property
+    def ccode(self):
+        """The C code of the bundle, that is a single translation unit."""
+        headers = filter_ordered(flatten(i._headers for i in self.operators))
+        includes = filter_ordered(flatten(i._includes for i in self.operators))
+
+        cglobals = []
+        esigns = []
+        kernels = []
+        efuncs = [blankline]
+        seen_globals = set()
+        seen_efuncs = set()
+        for op in self.operators:
+            cgen = CGenBundle(OrderedDict((k, v) for k, (v, _) in
+                                          self._efuncs[op].items()),
+                              self._structs[op])
+
+            for i in op._globals:
+                if isinstance(i, c.Struct) and i.tpname in self._structs[op]:
+                    i = c.Struct(self._structs[op][i.tpname], i.fields, i.declname)
+                if str(i) not in seen_globals:
+                    seen_globals.add(str(i))
+                    cglobals.append(i)
+
+            kernel = cgen.visit(op)
+            kernels.extend([kernel, blankline])
+            if self._compiler.src_ext == 'cpp':
+                cglobals.append(c.Extern('C', kernel.fdecl))
+
+            for name, (_, key) in self._efuncs[op].items():
+                if key in seen_efuncs:
+                    continue
+                seen_efuncs.add(key)
+                efunc = cgen.visit(op._func_table[name].root)
+                esigns.append(efunc.fdecl)
+                efuncs.extend([efunc, blankline])
+
+        header = [c.Line(i) for i in headers]
+        includes = [c.Include(i, system=False) for i in includes] + [blankline]
+        cglobals = [i for j in cglobals for i in (j, blankline)]
+
+        return c.Module(header + includes + cglobals + esigns + [blankline] +
+                        kernels + efuncs)
+
+    def _signature_items(self):
+        return (str(self.ccode),)
+
+    @cached_property
+    def _soname(self):
+        """
+        A unique name for the shared object resulting from the jit-compilation
+        of this bundle.
+        """
+        return Signer._digest(self, configuration)
+
+    def _compile(self):
+        """
+        JIT-compile the C code generated by the bundle, and hand the resulting
+        shared object to each of its Operators.
+
+        It is ensured that JIT compilation will only be performed once per
+        bundle, regardless of how many times this method is invoked.
+        """
+        if self._lib is None:
+            jit_compile(self._soname, jit_code(self.ccode), self._compiler)
+            self._lib = load(self._soname)
+            self._lib.name = self._soname
+        for i in self.operators:
+            if i._lib is None:
+                i._lib = self._lib
+
+
+def _efunc_key(name, efuncs, keys):
+    """
+    The key of the elemental function ``name``, computed out of its name, its
+    code and, recursively, the keys of its callees among ``efuncs``. The keys
+    are memoized in ``keys``.
+    """
+    if name not in keys:
+        callees = filter_ordered(i.name for i in FindNodes(Call).visit(efuncs[name])
+                                 if i.name in efuncs and i.name != name)
+        keys[name] = Signer._sign([name, efuncs[name]._signature] +
+                                  [_efunc_key(i, efuncs, keys) for i in callees])
+    return keys[name]
+
+
+class CGenBundle(CGen):
+
+    """
+    Like :class:`CGen`, but the elemental functions and the structs are renamed
+    as in an :class:`OperatorBundle`, and only the kernel of an Operator is
+    generated (i.e., no headers, globals, elemental functions).
+
+    :param efuncs: A mapper from the names of the elemental functions to their
+                   name in the bundle.
+    :param structs: A mapper from struct tags to their tag in the bundle.
+    """
+
+    def __init__(self, efuncs, structs):
+        super(CGenBundle, self).__init__()
+        self.efuncs = efuncs
+        self.structs = structs
+
+    def _args_decl(self, args):
+        ret = super(CGenBundle, self)._args_decl(args)
+        for i, decl in zip(args, ret):
+            if i.is_AbstractObject and i.ctype.startswith('struct '):
+                tag = i.ctype[len('struct '):].rstrip('*').strip()
+                if tag in self.structs:
+                    decl.typename = i.ctype.replace(tag, self.structs[tag], 1)
+        return ret
+
+    def visit_Call(self, o):
+        arguments = self._args_call(o.params)
+        return c.Statement('%s(%s)' % (self.efuncs.get(o.name, o.name),
+                                       ','.join(arguments)))
+
+    def visit_Callable(self, o):
+        body = flatten(self.visit(i) for i in o.children)
+        decls = self._args_decl(o.parameters)
+        signature = c.FunctionDeclaration(c.Value(o.retval,
+                                                  self.efuncs.get(o.name, o.name)),
+                                          decls)
+        return c.FunctionBody(signature, c.Block(body))
+
+    def visit_Operator(self, o):
+        body = flatten(self.visit(i) for i in o.children)
+        decls = self._args_decl(o.parameters)
+        signature = c.FunctionDeclaration(c.Value(o.retval, o.name), decls)
+        retval = [c.Statement("return 0")]
+        return c.FunctionBody(signature, c.Block(body + retval))
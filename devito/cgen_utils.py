@@ -12,11 +12,18 @@ class Allocator(object):
 
     """
     Generate C strings to declare pointers, allocate and free memory.
+
+    :param scratch: (Optional) a pointer to a chunk of memory, provided by the
+                    caller, out of which the :class:`Array`s that would otherwise
+                    be allocated on the heap are carved.
     """
 
-    def __init__(self):
+    _scratch_alignment = 64
+
+    def __init__(self, scratch=None):
         self.heap = OrderedDict()
         self.stack = OrderedDict()
+        self.scratch = scratch
 
     def push_stack(self, scope, obj):
         """
@@ -38,15 +45,20 @@ class Allocator(object):
         if obj in self.heap:
             return
 
-        decl = "(*%s)%s" % (obj.name, "".join("[%s]" % i for i in obj.symbolic_shape[1:]))
-        decl = c.Value(c.dtype_to_ctype(obj.dtype), decl)
-
+        ctype = c.dtype_to_ctype(obj.dtype)
         shape = "".join("[%s]" % i for i in obj.symbolic_shape)
-        alloc = "posix_memalign((void**)&%s, 64, sizeof(%s%s))"
-        alloc = alloc % (obj.name, c.dtype_to_ctype(obj.dtype), shape)
-        alloc = c.Statement(alloc)
+        rshape = "".join("[%s]" % i for i in obj.symbolic_shape[1:])
 
-        free = c.Statement('free(%s)' % obj.name)
+        decl = c.Value(ctype, "(*%s)%s" % (obj.name, rshape))
+
+        if self.scratch is None:
+            alloc = "posix_memalign((void**)&%s, 64, sizeof(%s%s))"
+            alloc = c.Statement(alloc % (obj.name, ctype, shape))
+            free = c.Statement('free(%s)' % obj.name)
+        else:
+            # Carved out of the scratch memory, see `onheap`
+            alloc = None
+            free = None
 
         self.heap[obj] = (decl, alloc, free)
 
@@ -56,7 +68,26 @@ class Allocator(object):
 
     @property
     def onheap(self):
-        return self.heap.values()
+        if self.scratch is None:
+            return self.heap.values()
+
+        # The Arrays are laid out in the scratch memory in order of name, each
+        # one starting at a multiple of `_scratch_alignment` bytes
+        ret = []
+        offset = []
+        for obj in sorted(self.heap, key=lambda i: i.name):
+            decl, _, _ = self.heap[obj]
+            ctype = c.dtype_to_ctype(obj.dtype)
+            shape = "".join("[%s]" % i for i in obj.symbolic_shape)
+            rshape = "".join("[%s]" % i for i in obj.symbolic_shape[1:])
+            alloc = c.Statement("%s = (%s (*)%s) (%s + %s)" %
+                                (obj.name, ctype, rshape, self.scratch.name,
+                                 " + ".join(offset) or "0"))
+            ret.append((decl, alloc, None))
+            offset.append("%d*((sizeof(%s%s) + %d)/%d)" %
+                          (self._scratch_alignment, ctype, shape,
+                           self._scratch_alignment - 1, self._scratch_alignment))
+        return ret
 
 
 # Utils to print C strings
@@ -89,6 +120,15 @@ class CodePrinter(C99CodePrinter):
         output = self._print(expr.base.label) \
             + ''.join(['[' + self._print(x) + ']' for x in expr.indices])
 
+        # Data stored in a reduced precision is explicitly converted to the
+        # compute type when loaded. A top-level Indexed is either the target
+        # of an assignment or the value of a plain copy, in which case the
+        # conversion is implicit
+        function = getattr(expr.base, 'function', None)
+        storage_dtype = getattr(function, 'storage_dtype', None)
+        if self._print_level > 1 and storage_dtype not in (None, function.dtype):
+            output = '(%s)%s' % (dtype_to_ctype(function.dtype), output)
+
         return output
 
     def _print_Rational(self, expr):
@@ -175,6 +215,15 @@ class CodePrinter(C99CodePrinter):
         return "&%s" % expr.name
 
 
+def dtype_to_ctype(dtype):
+    """Map a numpy data type to a C type. On top of what :module:`cgen`
+    provides, this supports the half-precision data type (``_Float16``, as
+    defined by ISO/IEC TS 18661-3, which requires gcc>=12 on x86)."""
+    if np.dtype(dtype) == np.float16:
+        return '_Float16'
+    return c.dtype_to_ctype(dtype)
+
+
 def ccode(expr, dtype=np.float32, **settings):
     """Generate C++ code from an expression calling CodePrinter class
 
@@ -193,3 +242,15 @@ FLOAT = Function('FLOAT')
 DOUBLE = Function('DOUBLE')
 
 cast_mapper = {np.float32: FLOAT, float: DOUBLE, np.float64: DOUBLE}
+
+
+def split_translation_unit(module):
+    """
+    Split the translation unit ``module``, a :class:`cgen.Module`, into as many
+    translation units as function definitions in ``module``. Each of them
+    consists of a function definition, preceded by everything in ``module``
+    but the function definitions (headers, type definitions, prototypes, ...).
+    """
+    preamble = [i for i in module.contents if not isinstance(i, c.FunctionBody)]
+    return [c.Module(preamble + [blankline, i]) for i in module.contents
+            if isinstance(i, c.FunctionBody)]
@@ -1,6 +1,9 @@
+from concurrent.futures import ThreadPoolExecutor
+from copy import copy
 from functools import partial
 from hashlib import sha1
-from os import environ, path
+from os import environ, getpid, path, replace
+from shutil import rmtree, which
 from time import time
 from distutils import version
 from subprocess import DEVNULL, CalledProcessError, check_output, check_call
@@ -8,6 +11,7 @@ import platform
 import warnings
 
 import numpy.ctypeslib as npct
+from psutil import cpu_count
 from codepy.jit import compile_from_string
 from codepy.toolchain import GCCToolchain
 
@@ -15,15 +19,40 @@ from devito.exceptions import CompilationError
 from devito.logger import log, warning
 from devito.parameters import configuration
 from devito.tools import (as_tuple, change_directory, filter_ordered,
-                          memoized_func, make_tempdir)
+                          memoized_func, make_tempdir, host_cached)
 
-__all__ = ['jit_compile', 'load', 'make', 'GNUCompiler']
+__all__ = ['jit_compile', 'jit_compile_units', 'jit_compile_variants', 'pgo_compile',
+           'load', 'make', 'GNUCompiler']
 
 
+def compiler_id(cc):
+    """
+    Return a string identifying the compiler executable ``cc``, that is its
+    path and modification time, so that any change to the compiler may be
+    detected. If ``cc`` cannot be found, return ``cc`` itself.
+    """
+    exe = which(cc)
+    if exe is None:
+        return cc
+    return '%s@%s' % (exe, path.getmtime(exe))
+
+
+@memoized_func
 def sniff_compiler_version(cc):
     """
-    Try to detect the compiler version.
+    Try to detect the compiler version. The detection requires spawning the
+    compiler, so its outcome is cached on disk, per host and compiler.
+    """
+    ver = _sniff_compiler_version(cc)
+    try:
+        return version.StrictVersion(ver)
+    except ValueError:
+        return version.LooseVersion(ver)
+
 
+@host_cached(key=compiler_id)
+def _sniff_compiler_version(cc):
+    """
     Adapted from: ::
 
         https://github.com/OP2/PyOP2/
@@ -65,7 +94,7 @@ def sniff_compiler_version(cc):
     except TypeError:
         pass
 
-    return ver
+    return str(ver)
 
 
 class Compiler(GCCToolchain):
@@ -108,6 +137,10 @@ class Compiler(GCCToolchain):
     MPICC = 'unknown'
     MPICXX = 'unknown'
 
+    # The runtime routine writing out the profile data collected by an
+    # instrumented shared object, if profile-guided optimisation is supported
+    _pgo_dump = None
+
     def __init__(self, **kwargs):
         super(Compiler, self).__init__(**kwargs)
 
@@ -130,6 +163,7 @@ class Compiler(GCCToolchain):
         self.undefines = []
 
         self.src_ext = 'c' if kwargs.get('cpp', False) is False else 'cpp'
+        self.o_ext = '.o'
 
         if platform.system() == "Linux":
             self.so_ext = '.so'
@@ -171,6 +205,37 @@ class Compiler(GCCToolchain):
     def add_ldflags(self, flags):
         self.ldflags = filter_ordered(self.ldflags + list(as_tuple(flags)))
 
+    def derive(self, cflags=(), ldflags=()):
+        """Return a copy of this compiler with the extra ``cflags`` and ``ldflags``."""
+        compiler = copy(self)
+        compiler.cflags = self.cflags + list(cflags)
+        compiler.ldflags = self.ldflags + list(ldflags)
+        return compiler
+
+    def tuning_flags(self):
+        """
+        The alternative sets of extra compiler flags worth trying, for a given
+        Operator, in place of the default flags when autotuning the flags.
+
+        :returns: A list of lists of flags, possibly empty.
+        """
+        return []
+
+    def pgo_flags(self, stage, profdir):
+        """
+        The flags to compile and link with for profile-guided optimisation.
+
+        :param stage: Either ``'generate'``, to build a shared object collecting
+                      profile data, or ``'use'``, to build a shared object
+                      optimised using the collected profile data.
+        :param profdir: The directory in which the object files are built and
+                        the profile data is stored.
+
+        :returns: A 2-tuple ``(cflags, ldflags)``, or None if profile-guided
+                  optimisation is not supported by this compiler.
+        """
+        return None
+
 
 class GNUCompiler(Compiler):
     """Set of standard compiler flags for the GCC toolchain."""
@@ -194,6 +259,32 @@ class GNUCompiler(Compiler):
             if configuration['openmp']:
                 self.ldflags += ['-fopenmp']
 
+    _pgo_dump = '__gcov_dump'
+
+    def tuning_flags(self):
+        variants = [['-ffast-math'], ['-funroll-loops'],
+                    ['-fno-tree-loop-distribute-patterns']]
+        try:
+            if configuration['isa'] == 'avx512' and \
+                    self.version >= version.StrictVersion("8.0.0"):
+                # By default, GCC prefers 256-bit vectors even with AVX-512
+                variants.append(['-mprefer-vector-width=512'])
+        except (TypeError, ValueError):
+            pass
+        return variants
+
+    def pgo_flags(self, stage, profdir):
+        # The profile data is stored alongside the object files, which are
+        # expected to be built in `profdir`
+        if stage == 'generate':
+            flags = ['-fprofile-generate']
+            if configuration['openmp']:
+                # Avoid racy, thus inconsistent, counters in parallel regions
+                flags.append('-fprofile-update=prefer-atomic')
+            return flags, flags
+        else:
+            return ['-fprofile-use', '-fprofile-correction'], []
+
 
 class GNUCompilerNoAVX(GNUCompiler):
     """Set of compiler flags for GCC but with AVX suppressed. This is
@@ -210,6 +301,9 @@ class ClangCompiler(Compiler):
     CC = 'clang'
     CPP = 'clang++'
 
+    def tuning_flags(self):
+        return [['-ffast-math'], ['-funroll-loops']]
+
 
 class IntelCompiler(Compiler):
     """Set of standard compiler flags for the Intel toolchain."""
@@ -236,6 +330,19 @@ class IntelCompiler(Compiler):
                 # Note: fopenmp, not qopenmp, is what is needed by icc versions < 15.0
                 self.ldflags += ['-fopenmp']
 
+    _pgo_dump = '_PGOPTI_Prof_Dump_All'
+
+    def tuning_flags(self):
+        variants = [['-fp-model', 'fast=2'], ['-unroll-aggressive']]
+        if configuration['isa'] == 'avx512' and '-qopt-zmm-usage=high' not in self.cflags:
+            variants.append(['-qopt-zmm-usage=high'])
+        return variants
+
+    def pgo_flags(self, stage, profdir):
+        flags = ['-prof-gen' if stage == 'generate' else '-prof-use',
+                 '-prof-dir=%s' % profdir]
+        return flags, flags if stage == 'generate' else []
+
 
 class IntelKNLCompiler(IntelCompiler):
     """Set of standard compiler flags for the Intel toolchain on a KNL system."""
@@ -270,6 +377,11 @@ class CustomCompiler(Compiler):
         if configuration['openmp']:
             self.ldflags += environ.get('OMP_LDFLAGS', '-fopenmp').split(' ')
 
+    # A GCC-compatible compiler is assumed
+    _pgo_dump = GNUCompiler._pgo_dump
+    pgo_flags = GNUCompiler.pgo_flags
+    tuning_flags = GNUCompiler.tuning_flags
+
 
 @memoized_func
 def get_jit_dir():
@@ -311,7 +423,7 @@ def save(soname, binary, compiler):
         log("%s: `%s` was not saved in `%s` as it already exists"
             % (compiler, sofile.name, get_jit_dir()))
     else:
-        with open(str(path), 'wb') as f:
+        with open(str(sofile), 'wb') as f:
             f.write(binary)
         log("%s: `%s` successfully saved in `%s`"
             % (compiler, sofile.name, get_jit_dir()))
@@ -326,10 +438,15 @@ def jit_compile(soname, code, compiler):
     multiple processing trying to compile the same object.
 
     :param soname: A unique name for the jit-compiled shared object.
-    :param code: String of C source code.
+    :param code: String of C source code, or a list of such strings, one per
+                 compilation unit. In the latter case, the compilation units
+                 are compiled concurrently, and then linked into the same
+                 shared object (see :func:`jit_compile_units`).
     :param compiler: The toolchain used for compilation.
     """
     target = str(get_jit_dir().joinpath(soname))
+    if not isinstance(code, str):
+        return jit_compile_units(target, code, compiler)
     src_file = "%s.%s" % (target, compiler.src_ext)
 
     # `catch_warnings` suppresses codepy complaining that it's taking
@@ -339,9 +456,17 @@ def jit_compile(soname, code, compiler):
     # when running the test suite in parallel)
     with warnings.catch_warnings():
         tic = time()
-        _, _, _, recompiled = compile_from_string(compiler, target, code, src_file,
-                                                  cache_dir=get_codepy_dir(),
-                                                  debug=configuration['debug_compiler'])
+        checksum, _, _, recompiled = compile_from_string(
+            compiler, target, code, src_file, cache_dir=get_codepy_dir(),
+            debug=configuration['debug_compiler'])
+        # codepy's cache is keyed by the code, not by ``soname``. So the same
+        # code, e.g. from Operators only differing in ``configuration['isa']``,
+        # is a cache hit even if it was compiled into another shared object
+        if not recompiled and not path.isfile(target + compiler.so_ext):
+            rmtree(str(get_codepy_dir().joinpath(checksum)), ignore_errors=True)
+            _, _, _, recompiled = compile_from_string(
+                compiler, target, code, src_file, cache_dir=get_codepy_dir(),
+                debug=configuration['debug_compiler'])
         toc = time()
 
     if recompiled:
@@ -350,6 +475,142 @@ def jit_compile(soname, code, compiler):
         log("%s: cache hit `%s` [%.2f s]" % (compiler, src_file, toc-tic))
 
 
+def jit_compile_units(target, units, compiler):
+    """
+    JIT compile each of the compilation units ``units`` into an object file,
+    concurrently, and link the object files into the shared object ``target``.
+
+    The object files are cached in the JIT directory, keyed by their source code
+    and by the compiler command line, so only the compilation units that have
+    changed are recompiled. Unlike codepy's cache, which is locked throughout
+    a compilation, this does not serialize concurrent compilations. Race
+    conditions are avoided by only ever renaming complete files into place.
+
+    :param target: The path of the shared object, without suffix.
+    :param units: A list of strings of C source code.
+    :param compiler: The toolchain used for compilation.
+    """
+    debug = configuration['debug_compiler']
+    # The ABI id does not account for the compiler flags
+    abi = str(compiler.abi_id()) + str([compiler.cc, compiler.cflags, compiler.defines,
+                                        compiler.undefines, compiler.include_dirs])
+
+    objects = []
+    missing = []
+    for unit in units:
+        obj = str(get_jit_dir().joinpath(sha1((unit + abi).encode()).hexdigest()))
+        objects.append(obj + compiler.o_ext)
+        if not path.isfile(obj + compiler.o_ext):
+            missing.append((unit, obj))
+
+    def build(item):
+        unit, obj = item
+        tmp = '%s-%d' % (obj, getpid())
+        src_file = '%s.%s' % (obj, compiler.src_ext)
+        with open('%s.%s' % (tmp, compiler.src_ext), 'w') as f:
+            f.write(unit)
+        replace('%s.%s' % (tmp, compiler.src_ext), src_file)
+        compiler.build_object(tmp + compiler.o_ext, [src_file], debug=debug)
+        replace(tmp + compiler.o_ext, obj + compiler.o_ext)
+
+    sofile = target + compiler.so_ext
+    tic = time()
+    if missing or not path.isfile(sofile):
+        with ThreadPoolExecutor(max_workers=cpu_count()) as executor:
+            list(executor.map(build, missing))
+        tmp = '%s-%d%s' % (target, getpid(), compiler.so_ext)
+        compiler.link_extension(tmp, objects, debug=debug)
+        replace(tmp, sofile)
+        toc = time()
+        log("%s: compiled `%s` [%d/%d units, %.2f s]"
+            % (compiler, sofile, len(missing), len(units), toc-tic))
+    else:
+        toc = time()
+        log("%s: cache hit `%s` [%d units, %.2f s]"
+            % (compiler, sofile, len(units), toc-tic))
+
+
+def jit_compile_variants(sonames, code, compilers):
+    """
+    JIT compile the C/C++ ``code`` once per toolchain in ``compilers``, e.g.
+    the same toolchain with different flags, all compilations concurrently.
+
+    :param sonames: A unique name for each of the jit-compiled shared objects.
+    :param code: String of C source code.
+    :param compilers: The toolchains used for compilation, one per ``soname``.
+    """
+    def build(item):
+        soname, compiler = item
+        jit_compile_units(str(get_jit_dir().joinpath(soname)), [code], compiler)
+
+    with ThreadPoolExecutor(max_workers=cpu_count()) as executor:
+        list(executor.map(build, zip(sonames, compilers)))
+
+
+def pgo_compile(name, code, compiler, train):
+    """
+    JIT compile the C/C++ ``code`` through profile-guided optimisation (PGO).
+    First, ``code`` is compiled into an instrumented shared object, which is
+    handed to ``train`` to be run on a representative workload. Then, ``code``
+    is compiled again, this time optimised using the collected profile data.
+
+    The profile data and the shared objects are stored in a directory within
+    the JIT directory, so the training is performed only once per ``name``.
+
+    :param name: A unique name for the optimised shared object.
+    :param code: String of C source code.
+    :param compiler: The toolchain used for compilation. It must support PGO
+                     (see :meth:`Compiler.pgo_flags`).
+    :param train: A callable taking the loaded instrumented shared object.
+
+    :returns: The name of the optimised shared object, to be passed to :func:`load`.
+    """
+    debug = configuration['debug_compiler']
+    profdir = get_jit_dir().joinpath('pgo-%s' % name)
+    soname = path.join(profdir.name, 'optimised')
+    sofile = str(profdir.joinpath('optimised')) + compiler.so_ext
+
+    tic = time()
+    if path.isfile(sofile):
+        log("%s: PGO cache hit `%s` [%.2f s]" % (compiler, sofile, time()-tic))
+        return soname
+    if not profdir.is_dir():
+        profdir.mkdir()
+
+    # The object files must have the same path in both stages, as the profile
+    # data is looked up by object file name
+    src_file = str(profdir.joinpath('kernel.%s' % compiler.src_ext))
+    obj_file = str(profdir.joinpath('kernel')) + compiler.o_ext
+    with open(src_file, 'w') as f:
+        f.write(code)
+
+    # Profile data is normally written out upon process exit, so the
+    # instrumented shared object also exports a routine to do so on demand
+    dump_src = str(profdir.joinpath('dump.%s' % compiler.src_ext))
+    dump_obj = str(profdir.joinpath('dump')) + compiler.o_ext
+    extern = 'extern "C" ' if compiler.src_ext == 'cpp' else ''
+    with open(dump_src, 'w') as f:
+        f.write('%svoid %s(void);\n%svoid devito_pgo_dump(void) { %s(); }\n'
+                % (extern, compiler._pgo_dump, extern, compiler._pgo_dump))
+
+    def build(stage, target, objects):
+        pgo = compiler.derive(*compiler.pgo_flags(stage, str(profdir)))
+        pgo.build_object(obj_file, [src_file], debug=debug)
+        tmp = '%s-%d%s' % (profdir.joinpath(target), getpid(), compiler.so_ext)
+        pgo.link_extension(tmp, [obj_file] + objects, debug=debug)
+        replace(tmp, str(profdir.joinpath(target)) + compiler.so_ext)
+        return path.join(profdir.name, target)
+
+    compiler.build_object(dump_obj, [dump_src], debug=debug)
+    lib = load(build('generate', 'instrumented', [dump_obj]))
+    train(lib)
+    lib.devito_pgo_dump()
+    build('use', 'optimised', [])
+
+    log("%s: PGO compiled `%s` [%.2f s]" % (compiler, sofile, time()-tic))
+    return soname
+
+
 def make(loc, args):
     """
     Invoke ``make`` command from within ``loc`` with arguments ``args``.
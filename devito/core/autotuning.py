@@ -1,16 +1,21 @@
 from __future__ import absolute_import
 
 from collections import OrderedDict
+from hashlib import sha1
 from itertools import combinations
 from functools import reduce
 from operator import mul
+from os import path
 import resource
 
+from devito.compiler import get_jit_dir, jit_compile_variants, load, save
+from devito.dle import BlockingArg, PrefetchArg, UnrollArg
 from devito.ir.iet import Iteration, FindNodes, FindSymbols
 from devito.logger import info, perf, warning
 from devito.parameters import configuration
+from devito.tools import cpu_model
 
-__all__ = ['autotune']
+__all__ = ['autotune', 'autotune_flags', 'squeeze']
 
 
 def autotune(operator, arguments, parameters, tunable):
@@ -19,50 +24,34 @@ def autotune(operator, arguments, parameters, tunable):
     operator arguments to perform empirical autotuning. Some of the operator
     arguments are marked as tunable.
     """
-    # We get passed all the arguments, but the cfunction only requires a subset
-    at_arguments = OrderedDict([(p.name, arguments[p.name]) for p in parameters])
-
-    # User-provided output data must not be altered
-    output = [i.name for i in operator.output]
-    for k, v in arguments.items():
-        if k in output:
-            at_arguments[k] = v.copy()
-
     iterations = FindNodes(Iteration).visit(operator.body)
     dim_mapper = {i.dim.name: i.dim for i in iterations}
 
-    # Shrink the iteration space of time-stepping dimension so that auto-tuner
-    # runs will finish quickly
-    steppers = [i for i in iterations if i.dim.is_Time]
-    if len(steppers) == 0:
-        timesteps = 1
-    elif len(steppers) == 1:
-        stepper = steppers[0]
-        start = at_arguments[stepper.dim.min_name]
-        timesteps = stepper.extent(start=start, finish=options['at_squeezer']) - 1
-        if timesteps < 0:
-            timesteps = options['at_squeezer'] - timesteps
-            perf("AT: Number of timesteps adjusted to %d" % timesteps)
-        at_arguments[stepper.dim.min_name] = start
-        at_arguments[stepper.dim.max_name] = timesteps
-        if stepper.dim.is_Stepping:
-            at_arguments[stepper.dim.parent.min_name] = start
-            at_arguments[stepper.dim.parent.max_name] = timesteps
-    else:
+    squeezed = squeeze(operator, arguments, parameters)
+    if squeezed is None:
         warning("AT: Couldn't understand loop structure; giving up")
         return arguments
+    at_arguments, timesteps = squeezed
 
     # Attempted block sizes ...
-    mapper = OrderedDict([(i.argument.symbolic_size.name, i) for i in tunable])
-    # ... Defaults (basic mode)
-    blocksizes = [OrderedDict([(i, v) for i in mapper]) for v in options['at_blocksize']]
-    # ... Always try the entire iteration space (degenerate block)
-    itershape = [mapper[i].iteration.symbolic_extent.subs(arguments) for i in mapper]
-    blocksizes.append(OrderedDict([(i, mapper[i].iteration.extent(0, j-1))
-                      for i, j in zip(mapper, itershape)]))
-    # ... More attempts if auto-tuning in aggressive mode
-    if configuration['autotuning'].level == 'aggressive':
-        blocksizes = more_heuristic_attempts(blocksizes)
+    mapper = OrderedDict([(i.argument.symbolic_size.name, i) for i in tunable
+                          if isinstance(i, BlockingArg)])
+    if mapper:
+        # ... Defaults (basic mode)
+        blocksizes = [OrderedDict([(i, v) for i in mapper])
+                      for v in options['at_blocksize']]
+        # ... Always try the entire iteration space (degenerate block)
+        itershape = [mapper[i].iteration.symbolic_extent.subs(arguments) for i in mapper]
+        blocksizes.append(OrderedDict([(i, mapper[i].iteration.extent(0, j-1))
+                          for i, j in zip(mapper, itershape)]))
+        # ... More attempts if auto-tuning in aggressive mode
+        if configuration['autotuning'].level == 'aggressive':
+            blocksizes = more_heuristic_attempts(blocksizes)
+    elif any(isinstance(i, (UnrollArg, PrefetchArg)) for i in tunable):
+        # Nothing to block, only the unroll factors (or the like) will be tuned
+        blocksizes = [OrderedDict()]
+    else:
+        return arguments
 
     # How many temporaries are allocated on the stack?
     # Will drop block sizes that might lead to a stack overflow
@@ -122,15 +111,38 @@ def autotune(operator, arguments, parameters, tunable):
 
     try:
         best = dict(min(timings, key=timings.get))
-        info("Auto-tuned block shape: %s" % best)
+        if best:
+            info("Auto-tuned block shape: %s" % best)
     except ValueError:
         info("Auto-tuning request, but couldn't find legal block sizes")
         return arguments
 
+    # Attempted unroll factors and then prefetch distances, with the best block
+    # shape. The same value is used for all of the Iterations concerned
+    for cls, name in [(UnrollArg, 'unroll factor'), (PrefetchArg, 'prefetch distance')]:
+        handle = [i for i in tunable if isinstance(i, cls)]
+        if not handle:
+            continue
+        at_arguments.update(best)
+        timings = OrderedDict()
+        for value in handle[0].candidates:
+            at_arguments.update({i.argument.name: value for i in handle})
+
+            timer = operator.profiler.timer.reset()
+            at_arguments[operator.profiler.name] = timer
+
+            operator.cfunction(*list(at_arguments.values()))
+            timings[value] = sum(getattr(timer._obj, i) for i, _ in timer._obj._fields_)
+            perf("AT: %s <%d> took %f (s) in %d timesteps" %
+                 (name.capitalize(), value, timings[value], timesteps))
+        value = min(timings, key=timings.get)
+        best.update({i.argument.name: value for i in handle})
+        info("Auto-tuned %s: %d" % (name, value))
+
     # Build the new argument list
     tuned = OrderedDict()
     for k, v in arguments.items():
-        tuned[k] = best[k] if k in mapper else v
+        tuned[k] = best[k] if k in best else v
 
     # Reset the profiling struct
     assert operator.profiler.name in tuned
@@ -139,6 +151,119 @@ def autotune(operator, arguments, parameters, tunable):
     return tuned
 
 
+def autotune_flags(operator, arguments):
+    """
+    Return the kernel function of ``operator`` JIT-compiled with the compiler
+    flags, among the default ones and the variants suggested by the compiler
+    (see :meth:`Compiler.tuning_flags`), leading to the fastest run.
+
+    The variants are compiled concurrently, and each of them is timed over a
+    few timesteps with the runtime ``arguments``. The winning shared object is
+    stored in the JIT directory, keyed by the Operator's ``_soname`` and the
+    host CPU model, so that later processes load it directly.
+    """
+    compiler = operator._compiler
+    name = '%s-tuned-%s' % (operator._soname, sha1(cpu_model().encode()).hexdigest())
+    if name in _tuned:
+        return _tuned[name]
+    if path.isfile(str(get_jit_dir().joinpath(name)) + compiler.so_ext):
+        _tuned[name] = operator._kernel(load(name))
+        return _tuned[name]
+
+    variants = compiler.tuning_flags()
+    if not variants:
+        warning("AT: No compiler flags to tune with compiler `%s`" % compiler)
+        return operator.cfunction
+    if configuration['mpi']:
+        warning("AT: Compiler flags autotuning unsupported with MPI; ignoring")
+        return operator.cfunction
+
+    squeezed = squeeze(operator, arguments, operator.parameters)
+    if squeezed is None:
+        warning("AT: Couldn't understand loop structure; giving up")
+        return operator.cfunction
+    at_arguments, timesteps = squeezed
+
+    sonames = ['%s-flags-%s' % (operator._soname, sha1(str(i).encode()).hexdigest())
+               for i in variants]
+    jit_compile_variants(sonames, str(operator.ccode),
+                         [compiler.derive(cflags=i) for i in variants])
+
+    # The default flags are tried too
+    default = operator.cfunction
+    candidates = [(operator._lib.name, [], default)]
+    candidates.extend((i, j, operator._kernel(load(i)))
+                      for i, j in zip(sonames, variants))
+
+    timings = OrderedDict()
+    for soname, flags, cfunction in candidates:
+        elapsed = []
+        for _ in range(2):
+            timer = operator.profiler.timer.reset()
+            at_arguments[operator.profiler.name] = timer
+            cfunction(*list(at_arguments.values()))
+            elapsed.append(sum(getattr(timer._obj, k) for k, _ in timer._obj._fields_))
+        timings[soname] = min(elapsed)
+        perf("AT: Compiler flags <%s> took %f (s) in %d timesteps" %
+             (' '.join(flags), timings[soname], timesteps))
+
+    best, flags, cfunction = min(candidates, key=lambda i: timings[i[0]])
+    info("Auto-tuned compiler flags: <%s> [%.2fx speedup over the default flags]" %
+         (' '.join(flags), timings[candidates[0][0]] / max(timings[best], 1e-9)))
+
+    with open(str(get_jit_dir().joinpath(best)) + compiler.so_ext, 'rb') as f:
+        save(name, f.read(), compiler)
+
+    # Reset the profiling struct
+    operator.profiler.timer.reset()
+
+    _tuned[name] = cfunction
+    return cfunction
+
+
+def squeeze(operator, arguments, parameters):
+    """
+    Derive from ``arguments`` the arguments to run ``operator`` for just a few
+    timesteps (see ``options['at_squeezer']``), such that the run finishes
+    quickly. The user-provided output data is replaced by copies, so it is
+    not altered by the run.
+
+    :returns: A 2-tuple ``(arguments, timesteps)``, in which ``arguments``
+              only contains the entries for ``parameters``, or None if the
+              time-stepping loop structure couldn't be understood.
+    """
+    # We get passed all the arguments, but the cfunction only requires a subset
+    at_arguments = OrderedDict([(p.name, arguments[p.name]) for p in parameters])
+
+    # User-provided output data must not be altered
+    output = [i.name for i in operator.output]
+    for k, v in arguments.items():
+        if k in output:
+            at_arguments[k] = v.copy()
+
+    # Shrink the iteration space of time-stepping dimension so that the runs
+    # will finish quickly
+    steppers = [i for i in FindNodes(Iteration).visit(operator.body) if i.dim.is_Time]
+    if len(steppers) == 0:
+        timesteps = 1
+    elif len(steppers) == 1:
+        stepper = steppers[0]
+        start = at_arguments[stepper.dim.min_name]
+        timesteps = stepper.extent(start=start, finish=options['at_squeezer']) - 1
+        if timesteps < 0:
+            timesteps = options['at_squeezer'] - timesteps
+            perf("AT: Number of timesteps adjusted to %d" % timesteps)
+        at_arguments[stepper.dim.min_name] = start
+        at_arguments[stepper.dim.max_name] = timesteps
+        if stepper.dim.is_Stepping:
+            at_arguments[stepper.dim.parent.min_name] = start
+            at_arguments[stepper.dim.parent.max_name] = timesteps
+    else:
+        return None
+
+    return at_arguments, timesteps
+
+
 def more_heuristic_attempts(blocksizes):
     # Ramp up to higher block sizes
     handle = OrderedDict([(i, options['at_blocksize'][-1]) for i in blocksizes[0]])
@@ -168,6 +293,10 @@ def more_heuristic_attempts(blocksizes):
     return unique
 
 
+_tuned = {}
+"""The kernel functions already JIT-compiled with autotuned flags in this process."""
+
+
 options = {
     'at_squeezer': 4,
     'at_blocksize': sorted({8, 16, 24, 32, 40, 64, 128}),
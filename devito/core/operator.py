@@ -1,6 +1,7 @@
 from collections import OrderedDict
 
-from devito.core.autotuning import autotune
+from devito.core.autotuning import autotune, autotune_flags
+from devito.core.pgo import profile_guided
 from devito.cgen_utils import printmark
 from devito.ir.iet import (Call, List, HaloSpot, MetaCall, FindNodes, Transformer,
                            filter_iterations, retrieve_iteration_tree)
@@ -65,11 +66,18 @@ class OperatorCore(OperatorRunnable):
         return iet
 
     def _autotune(self, args):
-        if self._dle_flags.get('blocking', False):
+        if self._dle_flags.get('blocking', False) or\
+                self._dle_flags.get('unroll-jam', False):
             return autotune(self, args, self.parameters, self._dle_args)
         else:
             return args
 
+    def _autotune_flags(self, args):
+        return autotune_flags(self, args)
+
+    def _profile_guided(self, args):
+        return profile_guided(self, args)
+
 
 class OperatorDebug(OperatorCore):
     """
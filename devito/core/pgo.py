@@ -0,0 +1,75 @@
+from __future__ import absolute_import
+
+from hashlib import sha1
+
+from devito.compiler import load, pgo_compile
+from devito.core.autotuning import squeeze
+from devito.logger import info, perf, warning
+from devito.parameters import configuration
+
+__all__ = ['profile_guided']
+
+
+def profile_guided(operator, arguments):
+    """
+    Return the kernel function of ``operator`` JIT-compiled through
+    profile-guided optimisation (PGO) for the runtime ``arguments``.
+
+    The first time a given Operator is run with tensors of given shapes, an
+    instrumented build is trained over a few timesteps (as in auto-tuning), and
+    then the Operator is rebuilt using the collected profile data. The optimised
+    shared object is cached on disk, keyed by the Operator's ``_soname`` and the
+    shapes. The speedup over the default build, measured over the same few
+    timesteps, is reported; the optimised build is only used if faster.
+    """
+    compiler = operator._compiler
+    if compiler.pgo_flags('generate', '') is None:
+        warning("PGO: unsupported by compiler `%s`; ignoring" % compiler)
+        return operator.cfunction
+    if configuration['mpi']:
+        warning("PGO: unsupported with MPI; ignoring")
+        return operator.cfunction
+
+    shapes = [arguments[i.name].shape for i in operator.parameters if i.is_Tensor]
+    key = '%s-%s' % (operator._soname, sha1(str(shapes).encode()).hexdigest())
+    if key in _optimised:
+        return _optimised[key]
+
+    squeezed = squeeze(operator, arguments, operator.parameters)
+    if squeezed is None:
+        warning("PGO: Couldn't understand loop structure; ignoring")
+        return operator.cfunction
+    at_arguments, timesteps = squeezed
+
+    def run(cfunction):
+        timer = operator.profiler.timer.reset()
+        at_arguments[operator.profiler.name] = timer
+        cfunction(*list(at_arguments.values()))
+        return sum(getattr(timer._obj, i) for i, _ in timer._obj._fields_)
+
+    def train(lib):
+        elapsed = run(operator._kernel(lib))
+        perf("PGO: Instrumented build took %f (s) in %d timesteps" % (elapsed, timesteps))
+
+    soname = pgo_compile(key, str(operator.ccode), compiler, train)
+    cfunction = operator._kernel(load(soname))
+
+    # Report the speedup over the default build
+    baseline = min(run(operator.cfunction) for _ in range(2))
+    optimised = min(run(cfunction) for _ in range(2))
+    speedup = baseline / optimised if optimised > 0 else 1.
+    info("PGO: %.2fx speedup over %d timesteps (%f (s) -> %f (s))%s" %
+         (speedup, timesteps, baseline, optimised,
+          '' if speedup >= 1 else '; using the default build'))
+    if speedup < 1:
+        cfunction = operator.cfunction
+
+    # Reset the profiling struct
+    arguments[operator.profiler.name] = operator.profiler.timer.reset()
+
+    _optimised[key] = cfunction
+    return cfunction
+
+
+_optimised = {}
+"""The kernel functions already JIT-compiled through PGO in this process."""
@@ -2,21 +2,21 @@ from __future__ import absolute_import
 
 import abc
 from functools import reduce
+from hashlib import sha1
 from operator import mul
 
 import numpy as np
-from sympy import Eq
 import ctypes
 from ctypes.util import find_library
 import mmap
 
+from devito.compiler import jit_compile, load
 from devito.parameters import configuration
 from devito.tools import as_tuple, numpy_to_ctypes
 from devito.logger import logger
-import devito
 
 __all__ = ['ALLOC_FLAT', 'ALLOC_NUMA_LOCAL', 'ALLOC_NUMA_ANY',
-           'ALLOC_KNL_MCDRAM', 'ALLOC_KNL_DRAM', 'ALLOC_GUARD']
+           'ALLOC_KNL_MCDRAM', 'ALLOC_KNL_DRAM', 'ALLOC_GUARD', 'ScratchArena']
 
 
 class MemoryAllocator(object):
@@ -438,9 +438,165 @@ class Data(np.ndarray):
         self[:] = 0.0
 
 
-def first_touch(array):
+FIRST_TOUCH_CODE = """\
+#include <string.h>
+
+/*
+ * The buffer is seen as `nblocks` blocks of `nrows` rows of `rowsize` bytes.
+ * In each block, the rows [lo, hi) are distributed over the threads with the
+ * same static schedule the stencil loops apply to the domain of the first
+ * space Dimension; the rows below `lo` (above `hi`), i.e. the halo and the
+ * padding, go to the thread owning row `lo` (`hi - 1`). If `src` is NULL,
+ * the buffer is zeroed, otherwise `src` is copied into it.
+ */
+void first_touch(char *dst, const char *src, const long nblocks, const long nrows,
+                 const long rowsize, const long lo, const long hi, const int parallel)
+{
+  for (long b = 0; b < nblocks; b++)
+  {
+    char *d = dst + b*nrows*rowsize;
+    const char *s = src ? src + b*nrows*rowsize : NULL;
+    #pragma omp parallel for schedule(static) if(parallel)
+    for (long i = lo; i < hi; i++)
+    {
+      const long start = (i == lo) ? 0 : i;
+      const long end = (i == hi - 1) ? nrows : i + 1;
+      if (s)
+        memcpy(d + start*rowsize, s + start*rowsize, (end - start)*rowsize);
+      else
+        memset(d + start*rowsize, 0, (end - start)*rowsize);
+    }
+  }
+}
+"""
+
+
+def first_touch_kernel():
     """
-    Uses an Operator to initialize the given array in the same pattern that
-    would later be used to access it.
+    Return the JIT-compiled kernel behind :func:`first_touch`. The kernel is
+    shared by all :class:`Function`s, so it is compiled (at most) once per
+    compiler configuration, rather than once per :class:`Function`.
     """
-    devito.Operator(Eq(array, 0.))()
+    compiler = configuration['compiler']
+    key = (str(compiler), tuple(compiler.cflags), tuple(compiler.ldflags))
+    if key not in _first_touch_kernels:
+        digest = sha1((FIRST_TOUCH_CODE + str(key)).encode()).hexdigest()
+        soname = 'first_touch_%s' % digest
+        jit_compile(soname, FIRST_TOUCH_CODE, compiler)
+        kernel = load(soname).first_touch
+        kernel.argtypes = [ctypes.c_void_p, ctypes.c_void_p] + [ctypes.c_long]*5 +\
+            [ctypes.c_int]
+        _first_touch_kernels[key] = kernel
+    return _first_touch_kernels[key]
+
+
+_first_touch_kernels = {}
+
+
+def first_touch(function, values=None):
+    """
+    Initialize the data of ``function`` in parallel, in the same pattern that
+    the Operators would later use to access it. Thus, with a NUMA-aware
+    thread pinning, each page lands in the memory of the socket running the
+    threads that will compute on it.
+
+    :param function: The :class:`TensorFunction` whose (freshly allocated)
+                     data is initialized.
+    :param values: (Optional) A numpy array of shape ``function.shape_allocated``
+                   to be copied into the data. Defaults to zeros.
+    """
+    data = function._data
+    if values is not None:
+        values = np.ascontiguousarray(values, dtype=data.dtype)
+        assert values.shape == data.shape
+
+    # The first space Dimension is distributed over the threads, while any
+    # Dimension preceding it (e.g., time) is iterated over sequentially
+    dims = function.dimensions
+    index = next((i for i, d in enumerate(dims) if d.is_Space), 0)
+    nblocks = reduce(mul, data.shape[:index], 1)
+    nrows = data.shape[index]
+    rowsize = reduce(mul, data.shape[index + 1:], 1) * data.itemsize
+    lo, right = function._offset_domain[index]
+    hi = nrows - right
+
+    first_touch_kernel()(data.ctypes.data, None if values is None else values.ctypes.data,
+                         nblocks, nrows, rowsize, lo, hi, int(configuration['openmp']))
+
+
+class ScratchArena(object):
+
+    """
+    A chunk of memory out of which an :class:`Operator` carves the temporary
+    :class:`Array`s that it would otherwise allocate, and free, on the heap at
+    every run. The memory is allocated at the first run, through the
+    ``default_allocator()``, and then reused by all subsequent runs; it is
+    reallocated only if a run requires more memory than available (e.g., when
+    larger :class:`Function`s are passed to the Operator).
+
+    Freshly allocated memory is touched in parallel, one chunk (i.e., one
+    :class:`Array`) at a time, so that each thread touches the rows of the
+    chunk it will later compute on.
+
+    :param alignment: (Optional) the alignment, in bytes, of each chunk.
+                      Defaults to 64.
+    """
+
+    def __init__(self, alignment=64):
+        self.alignment = alignment
+        self._data = None
+        self._allocator = None
+        self._memfree_args = None
+
+    def __del__(self):
+        self.free()
+
+    def __reduce__(self):
+        # The memory is never pickled; an unpickled arena starts off empty
+        return (ScratchArena, (self.alignment,))
+
+    @property
+    def nbytes(self):
+        """The size, in bytes, of the allocated memory."""
+        return 0 if self._data is None else self._data.nbytes
+
+    def _sizes(self, chunks):
+        return [-(-nrows*rowsize // self.alignment)*self.alignment
+                for nrows, rowsize in chunks]
+
+    def size(self, chunks):
+        """The size, in bytes, required to host ``chunks`` (see ``reserve``)."""
+        return sum(self._sizes(chunks))
+
+    def reserve(self, chunks):
+        """
+        Make sure the arena is large enough to host ``chunks``, allocating
+        memory if necessary.
+
+        :param chunks: An iterable of 2-tuples ``(nrows, rowsize)``, where
+                       ``nrows`` is the extent of the outermost dimension of a
+                       chunk, and ``rowsize`` the size, in bytes, of a row.
+        :returns: The address of the arena, or None if ``chunks`` take no space.
+        """
+        chunks = list(chunks)
+        sizes = self._sizes(chunks)
+        nbytes = sum(sizes)
+        if nbytes > self.nbytes:
+            self.free()
+            self._allocator = default_allocator()
+            # Note: the size is a multiple of the alignment, hence of 8 bytes
+            self._data, self._memfree_args = self._allocator.alloc((nbytes // 8,),
+                                                                   np.float64)
+            address = self._data.ctypes.data
+            for (nrows, rowsize), size in zip(chunks, sizes):
+                first_touch_kernel()(address, None, 1, nrows, rowsize, 0, nrows,
+                                     int(configuration['openmp']))
+                address += size
+        return None if self._data is None else self._data.ctypes.data
+
+    def free(self):
+        """Release the memory, if any."""
+        if self._memfree_args is not None:
+            self._allocator.free(*self._memfree_args)
+        self._data = None
+        self._memfree_args = None
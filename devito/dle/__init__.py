@@ -1,3 +1,5 @@
 from devito.dle.blocking_utils import *  # noqa
+from devito.dle.unrolling_utils import *  # noqa
+from devito.dle.streaming_utils import *  # noqa
 from devito.dle.transformer import *  # noqa
 from devito.dle.backends import *  # noqa
@@ -7,24 +7,41 @@ from itertools import combinations
 
 import cgen
 import numpy as np
+from sympy import Ge, Gt
 
 from devito.cgen_utils import ccode
 from devito.dimension import Dimension
-from devito.dle import fold_blockable_tree, unfold_blocked_tree
-from devito.dle.backends import (BasicRewriter, BlockingArg, Ompizer, dle_pass,
-                                 simdinfo, get_simd_flag, get_simd_items)
+from devito.dle import (fold_blockable_tree, unfold_blocked_tree,
+                        unroll_jam_candidates, unroll_jam, ntstores_candidates,
+                        prefetch_rows)
+from devito.dle.backends import (BasicRewriter, BlockingArg, UnrollArg, PrefetchArg,
+                                 Ompizer, dle_pass, simdinfo, get_simd_flag,
+                                 get_simd_items, llc_size)
 from devito.exceptions import DLEException
-from devito.ir.iet import (Expression, Iteration, List, PARALLEL, ELEMENTAL,
-                           REMAINDER, tagger, FindSymbols, FindNodes, Transformer,
-                           IsPerfectIteration, compose_nodes, retrieve_iteration_tree)
+from devito.ir.iet import (Call, Conditional, Expression, ExpressionBundle, Iteration,
+                           List, PARALLEL, ELEMENTAL, REMAINDER, INTRINSICS, tagger,
+                           ntstores, FindSymbols, FindNodes, Transformer,
+                           NestedTransformer, IsPerfectIteration, compose_nodes,
+                           retrieve_iteration_tree, simd_isas, simd_header,
+                           simd_lowerable)
 from devito.logger import dle_warning, perf_adv
-from devito.tools import as_tuple
+from devito.parameters import configuration
+from devito.tools import as_tuple, flatten
+from devito.types import Scalar
 
 
 class AdvancedRewriter(BasicRewriter):
 
     _parallelizer = Ompizer
 
+    UNROLL_JAM = (2, 4)
+    """The unroll factors among which the one used by ``_loop_unroll_jam`` is
+    selected at runtime, if so requested through the DLE option ``unrolljam``."""
+
+    PREFETCH = (0, 1, 2, 4)
+    """The prefetch distances, in rows, among which the one used by
+    ``_loop_streaming`` is selected at runtime. 0 disables prefetching."""
+
     def _pipeline(self, state):
         self._avoid_denormals(state)
         self._loop_blocking(state)
@@ -32,6 +49,8 @@ class AdvancedRewriter(BasicRewriter):
         if self.params['openmp'] is True:
             self._parallelize(state)
         self._create_elemental_functions(state)
+        self._loop_unroll_jam(state)
+        self._loop_streaming(state)
         self._minimize_remainders(state)
 
     @dle_pass
@@ -176,18 +195,36 @@ class AdvancedRewriter(BasicRewriter):
     def _simdize(self, nodes, state):
         """
         Add compiler-specific or, if not available, OpenMP pragmas to the
-        Iteration/Expression tree to emit SIMD-friendly code.
+        Iteration/Expression tree to emit SIMD-friendly code. If the DLE option
+        ``intrinsics`` is set, the innermost Iterations are rather marked for
+        explicit SIMD vectorization through vector intrinsics, whenever possible.
         """
         ignore_deps = as_tuple(self._compiler_decoration('ignore-deps'))
 
+        # Explicit vector intrinsics, if requested, for the innermost Iterations
+        isa = configuration['isa']
+        if self.params['intrinsics'] and isa not in simd_isas:
+            dle_warning("No vector intrinsics for ISA `%s`; falling back to "
+                        "compiler-driven vectorization" % isa)
+        intrinsics = self.params['intrinsics'] and isa in simd_isas
+
         mapper = {}
         for tree in retrieve_iteration_tree(nodes):
             vector_iterations = [i for i in tree if i.is_Vectorizable]
             for i in vector_iterations:
+                if intrinsics and i is tree[-1]:
+                    handle = i._rebuild(properties=i.properties + (INTRINSICS[isa],))
+                    if simd_lowerable(handle, isa):
+                        mapper[i] = handle
+                        continue
                 handle = FindSymbols('symbolics').visit(i)
+                # A Tensor is aligned if all of its rows begin on a SIMD register
+                # boundary, that is if the allocated (rather than the domain)
+                # innermost extent is a multiple of the SIMD register size
                 try:
                     aligned = [j for j in handle if j.is_Tensor and
-                               j.shape[-1] % get_simd_items(j.dtype) == 0]
+                               getattr(j, 'shape_allocated', j.shape)[-1] %
+                               get_simd_items(j.storage_dtype) == 0]
                 except KeyError:
                     aligned = []
                 if aligned:
@@ -200,8 +237,186 @@ class AdvancedRewriter(BasicRewriter):
 
         processed = Transformer(mapper).visit(nodes)
 
+        if any(i.intrinsics for i in mapper.values()):
+            return processed, {'includes': ['immintrin.h'],
+                               'globals': [simd_header(isa)], 'flags': 'intrinsics'}
         return processed, {}
 
+    @dle_pass
+    def _loop_unroll_jam(self, iet, state):
+        """
+        Unroll-and-jam the PARALLEL :class:`Iteration`s perfectly enclosing a
+        vectorizable Iteration, so that the values loaded along the unrolled
+        :class:`Dimension` (e.g., ``u[x][y+k][z]`` in a high-order stencil) are
+        shared by the jammed iterations.
+
+        The DLE option ``unrolljam`` drives the transformation. An integer is
+        used as unroll factor. If True, code is generated for each of the factors
+        in ``UNROLL_JAM``, and the one actually used is selected at runtime
+        through an additional argument (e.g., ``y_jam``), which is subject to
+        auto-tuning; values smaller than the smallest factor disable the
+        transformation.
+        """
+        unrolljam = self.params['unrolljam']
+        if unrolljam is True:
+            factors = self.UNROLL_JAM
+        elif unrolljam and int(unrolljam) > 1:
+            factors = (int(unrolljam),)
+        else:
+            return iet, {}
+
+        def jam(iet):
+            mapper = {}
+            selectors = OrderedDict()
+            for outer, inner in unroll_jam_candidates(iet):
+                variants = OrderedDict()
+                for i in factors:
+                    main, remainder = unroll_jam(outer, inner, i)
+                    # Do not trade explicit vectorization for unroll-and-jam
+                    if inner.intrinsics and\
+                            not simd_lowerable(main.nodes[0], inner.intrinsics):
+                        break
+                    variants[i] = List(body=[main, remainder])
+                else:
+                    if unrolljam is True:
+                        name = '%s_jam' % outer.dim.name
+                        selector = Scalar(name=name, dtype=np.int32)
+                        selectors.setdefault(name, (selector, outer))
+                        handle = outer
+                        for i, v in variants.items():
+                            handle = Conditional(Ge(selector, i), v, handle)
+                        mapper[outer] = handle
+                    else:
+                        mapper[outer] = variants[factors[0]]
+            return Transformer(mapper).visit(iet), selectors, bool(mapper)
+
+        processed, selectors, jammed = jam(iet)
+
+        if iet.is_Callable:
+            # An elemental function receives the unroll factors from the caller
+            parameters = [v for v, _ in selectors.values() if v not in iet.parameters]
+            return processed._rebuild(parameters=iet.parameters + tuple(parameters)), {}
+
+        # The callers of the elemental functions pass on the unroll factors
+        mapper = {}
+        for efunc in state.elemental_functions:
+            _, efunc_selectors, efunc_jammed = jam(efunc)
+            for call in FindNodes(Call).visit(processed):
+                if call.name == efunc.name:
+                    params = [v for v, _ in efunc_selectors.values()]
+                    mapper[call] = call._rebuild(params=call.params + tuple(params))
+            selectors.update(efunc_selectors)
+            jammed |= efunc_jammed
+        processed = Transformer(mapper).visit(processed)
+
+        if not jammed:
+            return processed, {}
+        arguments = [UnrollArg(v, i, factors[0], (1,) + factors)
+                     for v, i in selectors.values()]
+        return processed, {'arguments': arguments, 'flags': 'unroll-jam'}
+
+    @dle_pass
+    def _loop_streaming(self, iet, state):
+        """
+        Use the memory traffic of the :class:`ExpressionBundle`s (see
+        ``Cluster.traffic``) to optimize the data streams through the innermost,
+        vectorizable, :class:`Iteration`s:
+
+            * The write-only streams larger than the last level cache, which
+              would be evicted before being read again anyway, are written
+              through nontemporal stores, which save the read-for-ownership
+              traffic. These require either explicit vector intrinsics (see
+              the DLE option ``intrinsics``) or a compiler-specific pragma.
+            * In blocked Iteration trees, the rows ahead of the current one
+              (thus, at the end of a block, those of the next block) are
+              prefetched, for each read stream. The prefetch distance, in rows,
+              is selected at runtime through an additional argument (e.g.,
+              ``y_pf``), which is subject to auto-tuning.
+
+        The DLE option ``streaming`` drives the transformation. If an integer,
+        it is used in place of the size of the last level cache, in bytes.
+        """
+        streaming = self.params['streaming']
+        if not streaming:
+            return iet, {}
+        threshold = llc_size() if streaming is True else int(streaming)
+        pragma = self._compiler_decoration('ntstores')
+        fence = self._compiler_decoration('storefence',
+                                          cgen.Statement('_mm_sfence()'))
+
+        blocked = [i.original_dim for i in state.arguments if isinstance(i, BlockingArg)]
+
+        def stream(iet):
+            mapper = {}
+            selectors = OrderedDict()
+            for tree in retrieve_iteration_tree(iet):
+                inner = tree[-1]
+                bundles = FindNodes(ExpressionBundle).visit(inner)
+                if not inner.is_Vectorizable or not bundles:
+                    continue
+                exprs = flatten(i.exprs for i in bundles)
+                sweep = {i.dim for i in tree if not i.is_Sequential}
+
+                # Nontemporal stores
+                functions = ntstores_candidates(bundles, sweep, threshold)
+                if functions and (inner.intrinsics or pragma):
+                    pragmas = inner.pragmas
+                    if not inner.intrinsics:
+                        handle = '%s (%s)' % (pragma.value, ','.join(functions))
+                        pragmas += (cgen.Pragma(handle),)
+                    properties = inner.properties + (ntstores(functions),)
+                    mapper[inner] = inner._rebuild(pragmas=pragmas,
+                                                   properties=properties)
+
+                # Software prefetching
+                if len(tree) < 2 or tree[-2].dim not in blocked:
+                    continue
+                row = tree[-2]
+                name = '%s_pf' % row.dim.name
+                distance = Scalar(name=name, dtype=np.int32)
+                prefetches = prefetch_rows(row, inner, exprs, distance)
+                if prefetches:
+                    selectors.setdefault(name, (distance, row))
+                    mapper[row] = (Conditional(Gt(distance, 0), prefetches),)
+            processed = NestedTransformer(mapper).visit(iet)
+
+            # Drain the write-combining buffers once the streams are written
+            mapper = {}
+            for tree in retrieve_iteration_tree(processed):
+                if tree[-1].ntstores:
+                    root = [i for i in tree if i.is_Parallel][0]
+                    mapper[root] = List(body=root, footer=fence)
+            processed = Transformer(mapper).visit(processed)
+
+            return processed, selectors, bool(mapper)
+
+        processed, selectors, fenced = stream(iet)
+
+        if iet.is_Callable:
+            # An elemental function receives the prefetch distances from the caller
+            parameters = [v for v, _ in selectors.values() if v not in iet.parameters]
+            return processed._rebuild(parameters=iet.parameters + tuple(parameters)), {}
+
+        # The callers of the elemental functions pass on the prefetch distances
+        mapper = {}
+        for efunc in state.elemental_functions:
+            _, efunc_selectors, efunc_fenced = stream(efunc)
+            for call in FindNodes(Call).visit(processed):
+                if call.name == efunc.name:
+                    params = [v for v, _ in efunc_selectors.values()]
+                    mapper[call] = call._rebuild(params=call.params + tuple(params))
+            selectors.update(efunc_selectors)
+            fenced |= efunc_fenced
+        processed = Transformer(mapper).visit(processed)
+
+        if not selectors and not fenced:
+            return processed, {}
+        arguments = [PrefetchArg(v, i, self.PREFETCH[0], self.PREFETCH)
+                     for v, i in selectors.values()]
+        includes = [i for i in ['xmmintrin.h'] if fenced and i not in state.includes]
+        return processed, {'arguments': arguments, 'includes': includes,
+                           'flags': 'streaming'}
+
     @dle_pass
     def _parallelize(self, iet, state):
         """
@@ -294,6 +509,8 @@ class AdvancedRewriterSafeMath(AdvancedRewriter):
         if self.params['openmp'] is True:
             self._parallelize(state)
         self._create_elemental_functions(state)
+        self._loop_unroll_jam(state)
+        self._loop_streaming(state)
         self._minimize_remainders(state)
 
 
@@ -307,36 +524,10 @@ class SpeculativeRewriter(AdvancedRewriter):
         if self.params['openmp'] is True:
             self._parallelize(state)
         self._create_elemental_functions(state)
+        self._loop_unroll_jam(state)
+        self._loop_streaming(state)
         self._minimize_remainders(state)
 
-    @dle_pass
-    def _nontemporal_stores(self, nodes, state):
-        """
-        Add compiler-specific pragmas and instructions to generate nontemporal
-        stores (ie, non-cached stores).
-        """
-        pragma = self._compiler_decoration('ntstores')
-        fence = self._compiler_decoration('storefence')
-        if not pragma or not fence:
-            return {}
-
-        mapper = {}
-        for tree in retrieve_iteration_tree(nodes):
-            for i in tree:
-                if i.is_Parallel:
-                    mapper[i] = List(body=i, footer=fence)
-                    break
-        processed = Transformer(mapper).visit(nodes)
-
-        mapper = {}
-        for tree in retrieve_iteration_tree(processed):
-            for i in tree:
-                if i.is_Vectorizable:
-                    mapper[i] = List(header=pragma, body=i)
-        processed = Transformer(mapper).visit(processed)
-
-        return processed, {'flags': 'ntstores'}
-
 
 class CustomRewriter(SpeculativeRewriter):
 
@@ -346,7 +537,9 @@ class CustomRewriter(SpeculativeRewriter):
         'blocking': SpeculativeRewriter._loop_blocking,
         'openmp': SpeculativeRewriter._parallelize,
         'simd': SpeculativeRewriter._simdize,
-        'split': SpeculativeRewriter._create_elemental_functions
+        'split': SpeculativeRewriter._create_elemental_functions,
+        'unroll-jam': SpeculativeRewriter._loop_unroll_jam,
+        'streaming': SpeculativeRewriter._loop_streaming
     }
 
     def __init__(self, nodes, passes, params):
@@ -6,7 +6,8 @@ from devito.logger import dle
 from devito.tools import as_tuple
 
 
-__all__ = ['AbstractRewriter', 'Arg', 'BlockingArg', 'State', 'dle_pass']
+__all__ = ['AbstractRewriter', 'Arg', 'BlockingArg', 'UnrollArg', 'PrefetchArg',
+           'State', 'dle_pass']
 
 
 def dle_pass(func):
@@ -36,6 +37,7 @@ class State(object):
         self.elemental_functions = []
         self.arguments = []
         self.includes = []
+        self.globals = []
         self.flags = defaultdict(bool)
 
     def update(self, nodes, **kwargs):
@@ -44,6 +46,7 @@ class State(object):
         self.elemental_functions.extend(list(kwargs.get('elemental_functions', [])))
         self.arguments.extend(list(kwargs.get('arguments', [])))
         self.includes.extend(list(kwargs.get('includes', [])))
+        self.globals.extend(list(kwargs.get('globals', [])))
         self.flags.update({i: True for i in as_tuple(kwargs.get('flags', ()))})
 
 
@@ -82,6 +85,56 @@ class BlockingArg(Arg):
         return self.iteration.dim
 
 
+class UnrollArg(Arg):
+
+    def __init__(self, factor, iteration, value, candidates):
+        """
+        Represent an argument introduced in the kernel by Rewriter._loop_unroll_jam.
+
+        :param factor: The :class:`Scalar` selecting, at runtime, the unroll factor.
+        :param iteration: The :class:`Iteration` object that was unroll-and-jammed.
+        :param value: A suggested value determined by the DLE.
+        :param candidates: The unroll factors for which code was generated.
+        """
+        super(UnrollArg, self).__init__(factor, value)
+        self.iteration = iteration
+        self.candidates = candidates
+
+    def __repr__(self):
+        return "DLE-UnrollArg[%s,%s,suggested=%s]" %\
+            (self.argument, self.original_dim, self.value)
+
+    @property
+    def original_dim(self):
+        return self.iteration.dim
+
+
+class PrefetchArg(Arg):
+
+    def __init__(self, distance, iteration, value, candidates):
+        """
+        Represent an argument introduced in the kernel by Rewriter._loop_streaming.
+
+        :param distance: The :class:`Scalar` selecting, at runtime, the prefetch
+                         distance.
+        :param iteration: The :class:`Iteration` object along which the rows are
+                          prefetched.
+        :param value: A suggested value determined by the DLE.
+        :param candidates: The prefetch distances worth trying.
+        """
+        super(PrefetchArg, self).__init__(distance, value)
+        self.iteration = iteration
+        self.candidates = candidates
+
+    def __repr__(self):
+        return "DLE-PrefetchArg[%s,%s,suggested=%s]" %\
+            (self.argument, self.original_dim, self.value)
+
+    @property
+    def original_dim(self):
+        return self.iteration.dim
+
+
 class AbstractRewriter(object):
     """
     Transform Iteration/Expression trees to generate high performance C.
@@ -1,8 +1,9 @@
-import cpuinfo
 import numpy as np
 
 import cgen as c
 
+from devito.tools import cpu_model, host_cached
+
 """
 Compiler-specific language
 """
@@ -25,11 +26,42 @@ simdinfo = {
 }
 
 
+@host_cached(key=cpu_model)
+def cpu_flags():
+    """
+    Retrieve the flags of the host CPU. Querying the CPU is expensive, so the
+    flags are cached on disk, per host.
+    """
+    import cpuinfo  # Slow to import, and rarely needed
+    return cpuinfo.get_cpu_info().get('flags')
+
+
+@host_cached(key=cpu_model)
+def llc_size():
+    """
+    Retrieve the size, in bytes, of the last level cache of the host CPU, or
+    None if unknown. Like the flags, the size is cached on disk, per host.
+    """
+    import cpuinfo  # Slow to import, and rarely needed
+    info = cpuinfo.get_cpu_info()
+    for i in ['l3_cache_size', 'l2_cache_size']:
+        size = info.get(i)
+        if isinstance(size, int):
+            return size
+        try:
+            # Older versions of cpuinfo return strings, e.g. '30720 KB'
+            value, unit = size.split()
+            return int(value)*{'KB': 2**10, 'MB': 2**20}[unit.upper()]
+        except (AttributeError, KeyError, ValueError):
+            pass
+    return None
+
+
 def get_simd_flag():
     """Retrieve the best SIMD flag on the current architecture."""
     if get_simd_flag.flag is None:
         ordered_known = ('sse', 'sse4_2', 'avx', 'avx2', 'avx512f')
-        flags = cpuinfo.get_cpu_info().get('flags')
+        flags = cpu_flags()
         if not flags:
             return None
         for i in reversed(ordered_known):
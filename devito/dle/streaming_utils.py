@@ -0,0 +1,139 @@
+import cgen as c
+import numpy as np
+from sympy import Integer, Lt
+
+from devito.cgen_utils import ccode
+from devito.dimension import ModuloDimension
+from devito.ir.iet import Conditional, Element
+from devito.ir.support import IntervalGroup
+from devito.symbolics import retrieve_indexed
+
+__all__ = ['ntstores_candidates', 'prefetch_rows']
+
+
+CACHE_LINE = 64
+"""The size, in bytes, of a cache line."""
+
+
+def ntstores_candidates(bundles, sweep, threshold):
+    """
+    Return the names of the Tensors written within the :class:`ExpressionBundle`s
+    ``bundles`` as write-only streams larger than ``threshold`` bytes. A stream
+    is write-only if none of the locations written in a sweep over the
+    :class:`Dimension`s ``sweep`` is also read in that sweep. The size of a
+    stream is derived from the memory traffic of the bundles, assuming the
+    default iteration space of the written Tensor.
+    """
+    if threshold is None:
+        return []
+    exprs = [e for i in bundles for e in i.exprs]
+
+    traffic = {}
+    for i in bundles:
+        for (f, mode), v in i.traffic.items():
+            if mode == 'w':
+                traffic.setdefault(f, []).append(v)
+
+    ret = []
+    for f, v in traffic.items():
+        # The footprint of the stream over a sweep
+        intervals = IntervalGroup.generate('merge', *v)
+        intervals = intervals.drop([i for i in intervals.dimensions if i not in sweep])
+        subs = {}
+        for d, n in zip(f.dimensions, f.shape):
+            subs.update({d.symbolic_start: 0, d.symbolic_end: n - 1})
+        size = intervals.extent
+        size = size.subs(subs) if hasattr(size, 'subs') else size
+        if not size.is_Number or size*np.dtype(f.storage_dtype).itemsize <= threshold:
+            continue
+
+        writes = [e for e in exprs if e.write is f]
+        if any(e.is_increment for e in writes):
+            continue
+        reads = [i for e in exprs for i in retrieve_indexed(e.expr.rhs, mode='all')
+                 if i.base.function is f]
+        if all(_disjoint(i, e.expr.lhs, sweep) for i in reads for e in writes):
+            ret.append(f.name)
+
+    return sorted(ret)
+
+
+def prefetch_rows(row, inner, exprs, distance):
+    """
+    Return the nodes prefetching, ``distance`` iterations of the :class:`Iteration`
+    ``row`` ahead, the rows read by the :class:`Expression`s ``exprs`` within
+    ``inner``, the Iteration perfectly nested in ``row``. Of the rows only
+    differing in the index along ``row`` (e.g., those read by a stencil), just
+    the furthest one is prefetched, as the others are prefetched by the previous
+    iterations of ``row``.
+    """
+    step = row.limits[2]
+    if not isinstance(step, (int, Integer)):
+        return []
+
+    groups = {}
+    for e in exprs:
+        for i in retrieve_indexed(e.expr.rhs, mode='all'):
+            indices = i.indices
+            position = [n for n, j in enumerate(indices[:-1])
+                        if row.dim in j.free_symbols]
+            if len(position) != 1:
+                continue
+            position = position[0]
+            offset = indices[position] - row.dim
+            shift = indices[-1] - inner.dim
+            if not isinstance(offset, Integer) or not isinstance(shift, Integer):
+                continue
+            others = tuple(j for n, j in enumerate(indices[:-1]) if n != position)
+            if any({row.dim, inner.dim} & j.free_symbols for j in others):
+                continue
+            key = (i.base, position, others)
+            handle = groups.setdefault(key, [i, offset, shift, shift])
+            handle[1] = max(handle[1], offset)
+            handle[2] = min(handle[2], shift)
+            handle[3] = max(handle[3], shift)
+
+    start, end = inner.symbolic_bounds
+    start, end = start + inner.offsets[0], end + inner.offsets[1]
+
+    ret = []
+    for k in sorted(groups, key=str):
+        _, position, _ = k
+        template, offset, lshift, rshift = groups[k]
+        function = template.base.function
+        indices = list(template.indices)
+        indices[-1] = inner.dim + lshift
+        rows = []
+        for j in range(int(step)):
+            indices[position] = row.dim + offset + distance*step - j
+            indexed = template.func(template.base, *indices)
+            # A cache line at a time, from the leftmost to the rightmost point read
+            rows.append(Element(c.For(
+                'int %s = %s' % (inner.index, ccode(start)),
+                '%s <= %s' % (inner.index, ccode(end + rshift - lshift)),
+                '%s += %d' % (inner.index,
+                              CACHE_LINE // np.dtype(function.dtype).itemsize),
+                c.Statement('__builtin_prefetch(&%s, 0, 3)' % ccode(indexed)))))
+        # No rows beyond the allocated ones
+        bound = row.dim + offset + distance*step
+        ret.append(Conditional(Lt(bound, function.symbolic_shape[position]), rows))
+
+    return ret
+
+
+def _disjoint(indexed0, indexed1, sweep):
+    """
+    Return True if ``indexed0`` and ``indexed1`` never access the same location
+    within a sweep over the :class:`Dimension`s ``sweep``, i.e. if they differ in
+    an index invariant in the sweep (e.g., a time buffer slot).
+    """
+    for i, j in zip(indexed0.indices, indexed1.indices):
+        if (i.free_symbols | j.free_symbols) & sweep:
+            continue
+        if (i - j).is_Number and i != j:
+            return True
+        if isinstance(i, ModuloDimension) and isinstance(j, ModuloDimension) and\
+                i.parent is j.parent and i.modulo == j.modulo and\
+                (i.offset - j.offset) % i.modulo != 0:
+            return True
+    return False
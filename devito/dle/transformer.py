@@ -19,7 +19,10 @@ This dictionary may be modified at backend-initialization time."""
 default_options = {
     'blockinner': False,
     'blockshape': None,
-    'blockalways': False
+    'blockalways': False,
+    'intrinsics': False,
+    'unrolljam': False,
+    'streaming': False
 }
 """Default values for the supported optimization options.
 This dictionary may be modified at backend-initialization time."""
@@ -65,6 +68,17 @@ def transform(node, mode='basic', options=None):
                         heuristic.
         * 'blockalways': Apply blocking even though the DLE thinks it's not
                          worthwhile applying it.
+        * 'intrinsics': Rather than relying on the compiler, SIMD-vectorize the
+                        innermost loops through explicit vector intrinsics, if
+                        supported by ``configuration['isa']`` (AVX2, AVX-512).
+        * 'unrolljam': Unroll-and-jam the loops enclosing the innermost ones, so
+                       that the loaded values are shared by the jammed iterations.
+                       Either the unroll factor (an int), or True to select it
+                       at runtime (and thus through auto-tuning).
+        * 'streaming': Use nontemporal stores for the write-only streams larger
+                       than the last level cache (or than the given number of
+                       bytes, if an int), and prefetch the rows ahead in blocked
+                       loops, at a distance selected at runtime.
     """
     assert isinstance(node, Node)
 
@@ -81,6 +95,10 @@ def transform(node, mode='basic', options=None):
     params['compiler'] = configuration['compiler']
     params['openmp'] = configuration['openmp']
 
+    # A transformation mode may come along with options, e.g. ('advanced', {...})
+    if isinstance(mode, tuple) and len(mode) == 1 and mode[0] in default_modes:
+        mode = mode[0]
+
     # Force OpenMP if parallelism was requested, even though mode is 'noop'
     if mode == 'noop' and params['openmp'] is True:
         mode = 'openmp'
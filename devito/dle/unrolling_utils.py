@@ -0,0 +1,111 @@
+from sympy import Mod
+
+from devito.exceptions import DLEException
+from devito.ir.iet import Expression, List, retrieve_iteration_tree
+from devito.ir.support import Backward
+from devito.symbolics import retrieve_indexed
+from devito.types import Scalar
+
+__all__ = ['unroll_jam_candidates', 'unroll_jam']
+
+
+def unroll_jam_candidates(node):
+    """
+    Return the 2-tuples ``(outer, inner)`` of :class:`Iteration`s within
+    ``node`` such that ``outer`` may be unroll-and-jammed into ``inner``. That
+    is, ``outer`` is PARALLEL and perfectly encloses ``inner``, a vectorizable
+    Iteration whose body only consists of :class:`Expression`s.
+    """
+    candidates = []
+    for tree in retrieve_iteration_tree(node):
+        if len(tree) < 2:
+            continue
+        outer, inner = tree[-2], tree[-1]
+        if not (inner.is_Vectorizable and outer.is_Parallel):
+            continue
+        if outer.nodes != (inner,) or outer.uindices or outer.limits[2] != 1 or\
+                outer.direction == Backward:
+            continue
+        # A collapse clause requires perfectly nested Iterations
+        if any('collapse' in j.value for i in tree[:-2] for j in i.pragmas):
+            continue
+        try:
+            exprs = _flatten(inner.nodes)
+        except DLEException:
+            continue
+        # The unrolled iterations must write to different locations
+        if any(e.is_increment or (e.is_tensor and outer.dim not in
+                                  e.expr.lhs.free_symbols) for e in exprs):
+            continue
+        candidates.append((outer, inner))
+    return candidates
+
+
+def unroll_jam(outer, inner, factor):
+    """
+    Unroll the :class:`Iteration` ``outer`` by ``factor`` and jam the unrolled
+    iterations into ``inner``, the Iteration it perfectly encloses.
+
+    In the jammed body, the stores are deferred (through scalar temporaries)
+    until all of the unrolled iterations have been computed, so that the
+    values they share need not be reloaded. As ``outer`` is PARALLEL, no
+    unrolled iteration reads a value written by another one.
+
+    :returns: A 2-tuple of Iterations, the unroll-and-jammed ``outer``
+              and the one executing the leftover iterations, if the trip
+              count of ``outer`` is not a multiple of ``factor``.
+    """
+    dim = outer.dim
+    exprs = _flatten(inner.nodes)
+
+    body = []
+    stores = []
+    for j in range(factor):
+        mapper = {dim: dim + j}
+        mapper.update({e.write: Scalar(name='%s_%d' % (e.write.name, j),
+                                       dtype=e.write.dtype)
+                       for e in exprs if e.is_scalar and j > 0})
+        forwarded = {}
+        for e in exprs:
+            # The indices are rebuilt, rather than xreplace-d, so that they
+            # get simplified (e.g., `y + 1 + 1` -> `y + 2`)
+            subs = {i: i.xreplace(mapper) for i in retrieve_indexed(e.expr)}
+            subs.update(mapper)
+            expr = e.expr.xreplace(subs)
+            rhs = expr.rhs.xreplace(forwarded)
+            if e.is_scalar:
+                body.append(Expression(expr.func(expr.lhs, rhs)))
+            else:
+                temp = Scalar(name='uj%d' % len(stores), dtype=e.dtype)
+                body.append(Expression(expr.func(temp, rhs)))
+                stores.append(Expression(expr.func(expr.lhs, temp)))
+                forwarded[expr.lhs] = temp
+
+    # An ExpressionBundle is retained, as its metadata (e.g., the memory
+    # traffic) still holds for the jammed body
+    if len(inner.nodes) == 1 and inner.nodes[0].is_ExpressionBundle:
+        jammed = inner.nodes[0]._rebuild(body=body + stores)
+    else:
+        jammed = List(body=body + stores)
+
+    start, end = outer.symbolic_bounds
+    leftover = Mod(end - start + 1, factor)
+    main = outer._rebuild([inner._rebuild([jammed])],
+                          limits=(start, end - leftover, factor), offsets=(0, 0))
+    remainder = outer._rebuild(limits=(end - leftover + 1, end, 1), offsets=(0, 0))
+
+    return main, remainder
+
+
+def _flatten(nodes):
+    ret = []
+    for i in nodes:
+        if isinstance(i, Expression) and not i.is_ForeignExpression:
+            ret.append(i)
+        elif i.is_List and not i.header and not i.footer:
+            ret.extend(_flatten(i.body))
+        else:
+            raise DLEException("Cannot unroll-and-jam `%r`" % i)
+    if not ret:
+        raise DLEException("Cannot unroll-and-jam an empty body")
+    return ret
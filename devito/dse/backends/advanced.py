@@ -15,6 +15,7 @@ from devito.types import Indexed, Scalar, Array
 class AdvancedRewriter(BasicRewriter):
 
     def _pipeline(self, state):
+        self._replace_precomputed(state)
         self._extract_time_invariants(state, costmodel=lambda e: e.is_Function)
         self._eliminate_inter_stencil_redundancies(state)
         self._eliminate_intra_stencil_redundancies(state)
@@ -99,7 +100,8 @@ class AdvancedRewriter(BasicRewriter):
            temp1 = 2.0*ti[x,y,z]
            temp2 = 3.0*ti[x,y,z+1]
         """
-        if cluster.is_sparse:
+        if cluster.is_sparse or cluster.guards:
+            # Note: the alias Clusters would be scheduled outside of the guards
             return cluster
 
         # For more information about "aliases", refer to collect.__doc__
@@ -5,17 +5,52 @@ from sympy import cos, sin
 
 from devito.dse.backends import AbstractRewriter, dse_pass
 from devito.dse.manipulation import common_subexprs_elimination
-from devito.symbolics import Eq, bhaskara_cos, bhaskara_sin, retrieve_indexed, q_affine
+from devito.ir import Cluster, DataSpace
+from devito.symbolics import (Eq, bhaskara_cos, bhaskara_sin, iq_timeinvariant,
+                              retrieve_indexed, retrieve_trigonometry, q_affine)
 from devito.types import Scalar
 
 
 class BasicRewriter(AbstractRewriter):
 
     def _pipeline(self, state):
+        self._replace_precomputed(state)
         self._eliminate_intra_stencil_redundancies(state)
         self._extract_nonaffine_indices(state)
         self._extract_increments(state)
 
+    @dse_pass
+    def _replace_precomputed(self, cluster, template, **kwargs):
+        """
+        Replace trigonometric functions of time-invariant :class:`Function`s with
+        loads from the :class:`Function`s they have been tabulated into (see
+        :meth:`Function.precompute`).
+        """
+        rule = iq_timeinvariant(cluster.trace)
+
+        mapper = {}
+        parts = dict(cluster.dspace.parts)
+        for e in cluster.exprs:
+            for i in retrieve_trigonometry(e):
+                arg = i.args[0]
+                if not (arg.is_Indexed and rule(arg)):
+                    continue
+                tabulated = getattr(arg.function, '_precomputed', {}).get(i.func)
+                if tabulated is None:
+                    continue
+                mapper[i] = tabulated.indexed[arg.indices]
+                # Same layout, hence same data space, as the tabulated Function
+                if arg.function in parts:
+                    parts[tabulated] = parts[arg.function]
+
+        if not mapper:
+            return cluster
+
+        processed = [e.xreplace(mapper) for e in cluster.exprs]
+        dspace = DataSpace(cluster.dspace.intervals, parts)
+
+        return Cluster(processed, cluster.ispace, dspace, cluster.atomics, cluster.guards)
+
     @dse_pass
     def _extract_nonaffine_indices(self, cluster, template, **kwargs):
         """
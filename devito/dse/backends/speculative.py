@@ -7,6 +7,7 @@ from devito.types import Scalar
 class SpeculativeRewriter(AdvancedRewriter):
 
     def _pipeline(self, state):
+        self._replace_precomputed(state)
         self._extract_time_varying(state)
         self._extract_time_invariants(state, costmodel=lambda e: e.is_Function)
         self._eliminate_inter_stencil_redundancies(state)
@@ -32,6 +33,8 @@ class SpeculativeRewriter(AdvancedRewriter):
 class AggressiveRewriter(SpeculativeRewriter):
 
     def _pipeline(self, state):
+        self._replace_precomputed(state)
+
         # Three CIRE phases, progressively searching for less structure
         self._extract_time_varying(state)
         self._extract_time_invariants(state, with_cse=False,
@@ -5,7 +5,6 @@ from itertools import product
 import sympy
 import numpy as np
 from psutil import virtual_memory
-from mpi4py import MPI
 
 from devito.cgen_utils import INT, cast_mapper
 from devito.data import Data, default_allocator, first_touch
@@ -19,7 +18,7 @@ from devito.finite_difference import (centered, cross_derivative,
 from devito.logger import debug, warning
 from devito.parameters import configuration
 from devito.symbolics import indexify, retrieve_indexed
-from devito.types import (AbstractCachedFunction, AbstractCachedSymbol,
+from devito.types import (AbstractCachedFunction, AbstractCachedSymbol, CacheManager,
                           OWNED, HALO, LEFT, RIGHT)
 from devito.tools import Tag, ReducerMap, prod, powerset, is_integer
 
@@ -27,6 +26,15 @@ __all__ = ['Constant', 'Function', 'TimeFunction', 'SparseFunction',
            'SparseTimeFunction', 'PrecomputedSparseFunction',
            'PrecomputedSparseTimeFunction', 'Buffer']
 
+configuration.add('autopadding', 0, [0, 1], lambda i: bool(i))
+
+CACHE_LINE = 64
+"""Size in bytes of a cache line, used to align rows under ``autopadding``."""
+
+CRITICAL_STRIDE = 4096
+"""Strides (in bytes) multiple of this value map all accesses onto the same
+L1 cache sets; ``autopadding`` skews them away."""
+
 
 class Constant(AbstractCachedSymbol):
 
@@ -143,7 +151,8 @@ class TensorFunction(AbstractCachedFunction):
             # Data-related properties
             self.initializer = kwargs.get('initializer')
             if self.initializer is not None:
-                assert(callable(self.initializer))
+                assert(callable(self.initializer) or
+                       isinstance(self.initializer, np.ndarray))
             self._first_touch = kwargs.get('first_touch', configuration['first_touch'])
             self._data = None
             self._allocator = kwargs.get('allocator', default_allocator())
@@ -153,21 +162,31 @@ class TensorFunction(AbstractCachedFunction):
         def wrapper(self):
             if self._data is None:
                 debug("Allocating memory for %s%s" % (self.name, self.shape_allocated))
-                self._data = Data(self.shape_allocated, self.indices, self.dtype,
-                                  allocator=self._allocator)
-                if self._first_touch:
-                    first_touch(self)
-                if self.initializer is not None:
+                self._data = Data(self.shape_allocated, self.indices,
+                                  self.storage_dtype, allocator=self._allocator)
+                initializer = self.initializer
+                if isinstance(initializer, np.ndarray) and \
+                        initializer.shape == self.shape_allocated:
+                    # Copy, possibly within the first touch
                     if self._first_touch:
-                        warning("`first touch` together with `initializer` causing "
-                                "redundant data initialization")
+                        first_touch(self, initializer)
+                    else:
+                        self._data[:] = initializer
+                    initializer = None
+                elif self._first_touch:
+                    first_touch(self)
+                elif not callable(initializer):
+                    self._data.fill(0)
+                if callable(initializer):
                     try:
-                        self.initializer(self._data)
+                        initializer(self._data)
                     except ValueError:
                         # Perhaps user only wants to initialise the physical domain
-                        self.initializer(self._data[self._mask_domain])
-                else:
-                    self._data.fill(0)
+                        initializer(self._data[self._mask_domain])
+                elif initializer is not None:
+                    self._data[self._mask_domain] = initializer
+                # The new data may push the symbol cache beyond its limits
+                CacheManager.enforce_limits()
             return func(self)
         return wrapper
 
@@ -342,6 +361,7 @@ class TensorFunction(AbstractCachedFunction):
 
     def _halo_exchange(self):
         """Perform the halo exchange with the neighboring processes."""
+        from mpi4py import MPI  # Initializes MPI, so only imported if needed
         if MPI.COMM_WORLD.size == 1 or not self._is_halo_dirty:
             return
         if MPI.COMM_WORLD.size > 1 and self.grid is None:
@@ -366,12 +386,13 @@ class TensorFunction(AbstractCachedFunction):
             owned_region = self._get_view(OWNED, dim, i)
             halo_region = self._get_view(HALO, dim, i)
             sendbuf = np.ascontiguousarray(owned_region)
-            recvbuf = np.ndarray(shape=halo_region.shape, dtype=self.dtype)
+            recvbuf = np.ndarray(shape=halo_region.shape, dtype=self.storage_dtype)
             self._in_flight.append((dim, i, recvbuf, comm.Irecv(recvbuf, neighbour)))
             self._in_flight.append((dim, i, None, comm.Isend(sendbuf, neighbour)))
 
     def __halo_end_exchange(self, dim):
         """End a halo exchange along a given :class:`Dimension`."""
+        from mpi4py import MPI
         for d, i, payload, req in list(self._in_flight):
             if d == dim:
                 status = MPI.Status()
@@ -447,9 +468,10 @@ class TensorFunction(AbstractCachedFunction):
         if len(key.shape) != self.ndim:
             raise InvalidArgument("Shape %s of runtime value `%s` does not match "
                                   "dimensions %s" % (key.shape, self.name, self.indices))
-        if key.dtype != self.dtype:
+        if key.dtype != self.storage_dtype:
             warning("Data type %s of runtime value `%s` does not match the "
-                    "Function data type %s" % (key.dtype, self.name, self.dtype))
+                    "Function data type %s" % (key.dtype, self.name,
+                                               self.storage_dtype))
         for i, s in zip(self.indices, key.shape):
             i._arg_check(args, s, intervals[i])
 
@@ -480,6 +502,12 @@ class Function(TensorFunction):
     :param dimensions: (Optional) symbolic dimensions that define the
                        data layout and function indices of this symbol.
     :param dtype: (Optional) data type of the buffered data.
+    :param storage_dtype: (Optional) data type in which the buffered data is
+                          stored in memory, for example ``np.float16`` to halve
+                          the memory footprint and traffic of single precision
+                          data. Arithmetic is still carried out in ``dtype``; the
+                          generated code converts the data when loading and
+                          storing it. Defaults to ``dtype``.
     :param staggered: (Optional) tuple containing staggering offsets.
     :param padding: (Optional) allocate extra grid points at a space dimension
                     boundary. These may be used for data alignment. Defaults to 0.
@@ -487,11 +515,18 @@ class Function(TensorFunction):
                     in each dimension, may be passed; in this case, an error is
                     raised if such tuple has fewer entries then the number of space
                     dimensions.
-    :param initializer: (Optional) A callable to initialize the data
+    :param initializer: (Optional) A callable to initialize the data, or a
+                        numpy array, of either the allocated or the domain
+                        shape, to copy the data from.
     :param allocator: (Optional) An object of type :class:`MemoryAllocator` to
                       specify where to allocate the function data when running
                       on a NUMA architecture. Refer to ``default_allocator()``'s
                       __doc__ for more information about possible allocators.
+    :param first_touch: (Optional) If True, the data is initialized (zeroed,
+                        or copied from ``initializer`` if a numpy array) in
+                        parallel, by the threads that will later compute on it,
+                        through a kernel shared by all Functions. Defaults to
+                        ``configuration['first_touch']``.
 
     .. note::
 
@@ -534,6 +569,13 @@ class Function(TensorFunction):
                 self.dtype = kwargs.get('dtype', np.float32)
             else:
                 self.dtype = kwargs.get('dtype', self.grid.dtype)
+            self._storage_dtype = kwargs.get('storage_dtype', self.dtype)
+            if self._storage_dtype != self.dtype:
+                storage_dtype, dtype = np.dtype(self._storage_dtype), np.dtype(self.dtype)
+                if storage_dtype.kind != 'f' or dtype.kind != 'f' or \
+                        storage_dtype.itemsize > dtype.itemsize:
+                    raise ValueError("`storage_dtype` must be a floating point type "
+                                     "not wider than `dtype`")
 
             # Space order
             space_order = kwargs.get('space_order', 1)
@@ -547,6 +589,9 @@ class Function(TensorFunction):
             # Dynamically add derivative short-cuts
             self._initialize_derivatives()
 
+            # Tabulated functions of self, see `precompute`
+            self._precomputed = {}
+
     def _initialize_derivatives(self):
         """
         Dynamically create notational shortcuts for space derivatives.
@@ -654,7 +699,12 @@ class Function(TensorFunction):
             return tuple(halo if i.is_Space else (0, 0) for i in self.indices)
 
     def __padding_setup__(self, **kwargs):
-        padding = kwargs.get('padding', 0)
+        padding = kwargs.get('padding')
+        if padding is None:
+            if configuration['autopadding']:
+                padding = self.__autopadding__(**kwargs)
+            else:
+                padding = 0
         if isinstance(padding, int):
             return tuple((padding,)*2 for i in range(self.ndim))
         elif isinstance(padding, tuple) and len(padding) == self.ndim:
@@ -662,6 +712,46 @@ class Function(TensorFunction):
         else:
             raise TypeError("`padding` must be int or %d-tuple of ints" % self.ndim)
 
+    def __autopadding__(self, **kwargs):
+        """
+        Padding automatically derived from the shape of the allocated data.
+
+            * The innermost dimension is padded, on its right side, so that each
+              row begins on a cache line boundary. As a cache line is a multiple
+              of any SIMD register, this also provides SIMD-aligned rows.
+            * The stride of each dimension must not be a multiple of the
+              critical stride, otherwise accesses along the dimension would all
+              map to the same cache set. Such strides are skewed by padding the
+              next inner dimension.
+        """
+        if not self.indices or not self.indices[-1].is_Space:
+            return 0
+
+        grid = kwargs.get('grid')
+        dtype = kwargs.get('dtype', np.float32 if grid is None else grid.dtype)
+        itemsize = np.dtype(kwargs.get('storage_dtype', dtype)).itemsize
+        staggered = kwargs.get('staggered', tuple(0 for _ in self.indices))
+        shape = [i - j + sum(k) for i, j, k in zip(self._shape, staggered, self._halo)]
+        padding = [0]*self.ndim
+
+        # Innermost dimension: round up to a multiple of the cache line
+        align = max(CACHE_LINE // itemsize, 1)
+        padding[-1] = -shape[-1] % align
+
+        # Skew any critical stride, from the innermost to the outermost dimension
+        stride = itemsize*(shape[-1] + padding[-1])
+        for i in reversed(range(self.ndim - 1)):
+            inner = stride // (shape[i + 1] + padding[i + 1])
+            if stride % CRITICAL_STRIDE == 0 and inner % CRITICAL_STRIDE != 0 and \
+                    self.indices[i + 1].is_Space:
+                unit = align if i + 1 == self.ndim - 1 else 1
+                while stride % CRITICAL_STRIDE == 0:
+                    stride += inner*unit
+                    padding[i + 1] += unit
+            stride *= shape[i] + padding[i]
+
+        return tuple((0, i) for i in padding)
+
     @property
     def laplace(self):
         """
@@ -683,9 +773,42 @@ class Function(TensorFunction):
         return sum([second_derivative(first * weight, dim=d, order=order)
                     for d in self.space_dimensions])
 
+    def precompute(self, func):
+        """
+        Tabulate ``func(self)``, where ``func`` is a unary SymPy function such
+        as ``sympy.cos``, into a new :class:`Function` with the same layout
+        as ``self``, and return it.
+
+        The DSE replaces any ``func(self)`` in the Operators created afterwards
+        with loads from the tabulated :class:`Function`, so the function is
+        evaluated once rather than at every timestep. As the values are
+        computed here, this method must be called again whenever the data of
+        ``self`` changes.
+        """
+        tabulated = self._precomputed.get(func)
+        if tabulated is None:
+            kwargs = {'name': '%s_%s' % (func.__name__, self.name),
+                      'dtype': self.dtype, 'storage_dtype': self.storage_dtype,
+                      'space_order': self.space_order, 'staggered': self.staggered,
+                      'halo': self.halo, 'padding': self.padding}
+            if self.grid is not None and self.indices == self.grid.dimensions:
+                kwargs['grid'] = self.grid
+            else:
+                kwargs.update({'dimensions': self.indices, 'shape': self.shape})
+            tabulated = Function(**kwargs)
+            self._precomputed[func] = tabulated
+        x = sympy.Dummy()
+        tabulated.data_allocated[:] = sympy.lambdify(x, func(x), 'numpy')(
+            self.data_allocated)
+        return tabulated
+
+    @property
+    def storage_dtype(self):
+        return self._storage_dtype
+
     # Pickling support
     _pickle_kwargs = TensorFunction._pickle_kwargs +\
-        ['dtype', 'grid', 'space_order', 'shape', 'dimensions']
+        ['dtype', 'storage_dtype', 'grid', 'space_order', 'shape', 'dimensions']
 
 
 class TimeFunction(Function):
@@ -711,6 +834,8 @@ class TimeFunction(Function):
     :param dimensions: (Optional) symbolic dimensions that define the
                        data layout and function indices of this symbol.
     :param dtype: (Optional) data type of the buffered data
+    :param storage_dtype: (Optional) data type in which the buffered data is
+                          stored in memory. Defaults to ``dtype``.
     :param save: (Optional) Defaults to `None`, which indicates the use of
                  alternating buffers. This enables cyclic writes to the
                  TimeFunction. For example, if the TimeFunction ``u(t, x)`` has
@@ -734,11 +859,18 @@ class TimeFunction(Function):
                     in each dimension, may be passed; in this case, an error is
                     raised if such tuple has fewer entries then the number of
                     space dimensions.
-    :param initializer: (Optional) A callable to initialize the data
+    :param initializer: (Optional) A callable to initialize the data, or a
+                        numpy array, of either the allocated or the domain
+                        shape, to copy the data from.
     :param allocator: (Optional) An object of type :class:`MemoryAllocator` to
                       specify where to allocate the function data when running
                       on a NUMA architecture. Refer to ``default_allocator()``'s
                       __doc__ for more information about possible allocators.
+    :param first_touch: (Optional) If True, the data is initialized (zeroed,
+                        or copied from ``initializer`` if a numpy array) in
+                        parallel, by the threads that will later compute on it,
+                        through a kernel shared by all Functions. Defaults to
+                        ``configuration['first_touch']``.
 
     .. note::
 
@@ -780,7 +912,7 @@ class TimeFunction(Function):
 
             # Check we won't allocate too much memory for the system
             available_mem = virtual_memory().available
-            if np.dtype(self.dtype).itemsize * self.size > available_mem:
+            if np.dtype(self.storage_dtype).itemsize * self.size > available_mem:
                 warning("Trying to allocate more memory for symbol %s " % self.name +
                         "than available on physical device, this will start swapping")
 
@@ -1020,6 +1152,10 @@ class SparseFunction(AbstractSparseFunction):
     :param dimensions: (Optional) symbolic dimensions that define the
                        data layout and function indices of this symbol.
     :param coordinates: (Optional) coordinate data for the sparse points.
+    :param batch_dims: (Optional) dimensions, among ``dimensions``, along which
+                       the sparse points have distinct coordinates (e.g., a
+                       batch of shots). The coordinates are then indexed as
+                       ``(*batch_dims, point, space)``.
     :param space_order: Discretisation order for space derivatives.
     :param dtype: Data type of the buffered data.
     :param initializer: (Optional) A callable to initialize the data
@@ -1042,10 +1178,15 @@ class SparseFunction(AbstractSparseFunction):
         if not self._cached():
             super(SparseFunction, self).__init__(*args, **kwargs)
 
-            # Set up coordinates of sparse points
+            # Set up coordinates of sparse points. Each entry along a batch
+            # dimension (e.g., a batch of shots) gets its own set of coordinates
+            batch_dims = tuple(kwargs.get('batch_dims', ()))
+            dimensions = batch_dims + (self.indices[-1], Dimension(name='d'))
+            shape = tuple(self.shape[self.indices.index(d)] for d in batch_dims)
             coordinates = Function(name='%s_coords' % self.name, dtype=self.dtype,
-                                   dimensions=(self.indices[-1], Dimension(name='d')),
-                                   shape=(self.npoint, self.grid.dim), space_order=0)
+                                   dimensions=dimensions,
+                                   shape=shape + (self.npoint, self.grid.dim),
+                                   space_order=0)
             coordinate_data = kwargs.get('coordinates')
             if coordinate_data is not None:
                 coordinates.data[:] = coordinate_data[:]
@@ -1102,8 +1243,8 @@ class SparseFunction(AbstractSparseFunction):
     @property
     def coordinate_symbols(self):
         """Symbol representing the coordinate values in each dimension"""
-        p_dim = self.indices[-1]
-        return tuple([self.coordinates.indexify((p_dim, i))
+        indices = self.coordinates.indices[:-1]
+        return tuple([self.coordinates.indexify(indices + (i,))
                       for i in range(self.grid.dim)])
 
     @property
@@ -1168,7 +1309,9 @@ class SparseFunction(AbstractSparseFunction):
         rhs = sum([expr.subs(vsub) * b.subs(subs)
                    for b, vsub in zip(self.coefficients, idx_subs)])
 
-        lhs = self.subs(self_subs)
+        # Note: substituting into the Indexed, rather than into `self`, as
+        # rebuilding subclasses with extra constructor arguments would fail
+        lhs = indexify(self).subs(self_subs) if self_subs else self
         rhs = rhs + lhs if cummulative else rhs
 
         return [Inc(lhs, rhs)] if cummulative else [Eq(lhs, rhs)]
@@ -1208,6 +1351,10 @@ class SparseTimeFunction(AbstractSparseTimeFunction, SparseFunction):
     :param dimensions: (Optional) symbolic dimensions that define the
                        data layout and function indices of this symbol.
     :param coordinates: (Optional) coordinate data for the sparse points.
+    :param batch_dims: (Optional) dimensions, among ``dimensions``, along which
+                       the sparse points have distinct coordinates (e.g., a
+                       batch of shots). The coordinates are then indexed as
+                       ``(*batch_dims, point, space)``.
     :param space_order: (Optional) Discretisation order for space derivatives.
                         Default to 0.
     :param time_order: (Optional) Discretisation order for time derivatives.
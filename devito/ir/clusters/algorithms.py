@@ -1,13 +1,20 @@
 from collections import OrderedDict
 
-from devito.ir.support import (Scope, IterationSpace, detect_flow_directions,
-                               force_directions, group_expressions)
+from sympy import And
+
+from devito.ir.support import (Scope, IterationSpace, Interval, Backward, Forward,
+                               detect_flow_directions, force_directions,
+                               group_expressions)
 from devito.ir.clusters.cluster import PartialCluster, ClusterGroup
+from devito.parameters import configuration
 from devito.symbolics import CondEq, IntDiv, xreplace_indices
 from devito.types import Scalar
-from devito.tools import filter_sorted, flatten
+from devito.tools import filter_sorted, flatten, is_integer
+
+__all__ = ['clusterize', 'groupby', 'shift_and_fuse']
 
-__all__ = ['clusterize', 'groupby']
+
+configuration.add('loop-shifting', 0, [0, 1], lambda i: bool(i))
 
 
 def groupby(clusters):
@@ -41,6 +48,7 @@ def groupby(clusters):
             flow = scope.d_flow - (scope.d_flow.inplace() + scope.d_flow.increment)
 
             if candidate.ispace.is_compatible(c.ispace) and\
+                    candidate.guards == c.guards and\
                     all(is_local(i, candidate, c, clusters) for i in funcs):
                 # /c/ will be fused into /candidate/. All fusion-induced anti
                 # dependences are eliminated through so called "index bumping and
@@ -91,12 +99,16 @@ def guard(clusters):
         # Some expressions may not require guards at all. We put them in their
         # own cluster straigh away
         if free:
-            processed.append(PartialCluster(free, c.ispace, c.dspace, c.atomics))
+            processed.append(PartialCluster(free, c.ispace, c.dspace, c.atomics,
+                                            c.guards))
 
         # Then we add in all guarded clusters
         for k, v in mapper.items():
             exprs = [e.xreplace({d: IntDiv(d.parent, d.factor) for d in k}) for e in v]
-            guards = {d.parent: CondEq(d.parent % d.factor, 0) for d in k}
+            guards = dict(c.guards)
+            for d in k:
+                condition = CondEq(d.parent % d.factor, 0)
+                guards[d.parent] = And(guards.get(d.parent, True), condition)
             processed.append(PartialCluster(exprs, c.ispace, c.dspace, c.atomics, guards))
 
     return ClusterGroup(processed)
@@ -222,6 +234,126 @@ def bump_and_contract(targets, source, sink):
     sink.exprs = processed
 
 
+def shift_and_fuse(clusters):
+    """
+    Attempt fusing adjacent :class:`PartialCluster`s that :func:`groupby` could
+    not group together because of data dependences, by means of loop shifting.
+    The fused PartialClusters share all loops but the innermost one.
+
+    .. note::
+
+        As the shared loops end up carrying the dependences, they are no longer
+        parallel; hence, this is only profitable when the operator is bound by
+        memory bandwidth and runs sequentially (or parallelism is exploited
+        along the innermost loop only).
+    """
+    processed = ClusterGroup()
+    for c in clusters:
+        shifted = shift(processed[-1], c) if processed else None
+        if shifted is not None:
+            processed[-1:] = shifted
+        else:
+            processed.append(c)
+    return processed
+
+
+def shift(source, sink):
+    """
+    Attempt fusing the :class:`PartialCluster` ``sink`` into ``source`` through
+    loop shifting (a.k.a. "retiming"). The iteration points of ``sink`` are
+    shifted along the outer Dimensions by the maximum dependence distance, so
+    that everything ``sink`` needs has already been computed by ``source`` within
+    the current, or an earlier, iteration of the shared loops. The innermost
+    loops are kept separate, so they remain parallel.
+
+    Return two new :class:`PartialCluster`s, with same :class:`IterationSpace`
+    but different guards, or None if the shifting is not legal or not needed.
+
+    Examples
+    ========
+    Given: ::
+
+        for x = x_m to x_M
+          for y = y_m to y_M
+            v[t+1,x,y] = f(w[t,x,y])
+        for x = x_m to x_M
+          for y = y_m to y_M
+            w[t+1,x,y] = g(v[t+1,x-1,y], v[t+1,x+1,y])
+
+    Produce: ::
+
+        for x = x_m to x_M + 1
+          if x <= x_M
+            for y = y_m to y_M
+              v[t+1,x,y] = f(w[t,x,y])
+          if x >= x_m + 1
+            for y = y_m to y_M
+              w[t+1,x-1,y] = g(v[t+1,x-2,y], v[t+1,x,y])
+    """
+    if source.guards or sink.guards or not source.ispace.is_compatible(sink.ispace):
+        return None
+
+    # The innermost Dimension is not shifted, while the outermost Time Dimensions
+    # are shared as they are
+    itintervals = source.itintervals[:-1]
+    fixed = []
+    for i in itintervals:
+        if not i.dim.is_Time:
+            break
+        fixed.append(i.dim)
+    shiftable = [i.dim for i in itintervals if i.dim not in fixed]
+    if not shiftable or any(i.dim.is_Time or i.direction is Backward
+                            for i in itintervals if i.dim in shiftable):
+        return None
+    if any(d in sink.atomics for d in fixed):
+        return None
+
+    # The shift along a Dimension is the maximum distance, from `source` to
+    # `sink`, of any two accesses to the same object, at least one of which
+    # is a write. Dependences carried by a fixed Dimension are honored anyway
+    n = len(source.exprs)
+    scope = Scope(source.exprs + sink.exprs)
+    shifts = OrderedDict([(d, 0) for d in shiftable])
+    for f, writes in scope.writes.items():
+        for w in writes:
+            for a in scope[f]:
+                if (w.timestamp < n) == (a.timestamp < n):
+                    continue
+                i, j = (w, a) if w.timestamp < n else (a, w)
+                if i.is_scalar or i.is_irregular or j.is_irregular:
+                    return None
+                distance = OrderedDict(zip(i.findices, j.distance(i)))
+                if not all(is_integer(v) for v in distance.values()):
+                    return None
+                if any(distance.get(d, 0) != 0 for d in fixed):
+                    continue
+                for d in shiftable:
+                    shifts[d] = max(shifts[d], int(distance.get(d, 0)))
+    if not any(shifts.values()):
+        return None
+
+    # Extend the shared IterationSpace so that all shifted points are visited
+    ispace = IterationSpace.merge(source.ispace, sink.ispace)
+    intervals, sub_iterators, directions = ispace.args
+    intervals = [Interval(i.dim, i.lower, i.upper + shifts.get(i.dim, 0))
+                 for i in intervals]
+    directions = dict(directions)
+    directions.update({d: Forward for d in shiftable})
+    ispace = IterationSpace(intervals, sub_iterators, directions)
+
+    # Guard the iteration points falling outside of the original IterationSpaces
+    limits = [(d, source.ispace.intervals[d]) for d, v in shifts.items() if v]
+    source_guard = And(*[d <= d.symbolic_end + i.upper for d, i in limits])
+    sink_guard = And(*[d >= d.symbolic_start + i.lower + shifts[d] for d, i in limits])
+
+    exprs = [e.xreplace({d: d - v for d, v in shifts.items() if v}) for e in sink.exprs]
+
+    return (PartialCluster(source.exprs, ispace, source.dspace, source.atomics,
+                           {shiftable[-1]: source_guard}),
+            PartialCluster(exprs, ispace, sink.dspace, sink.atomics - set(shiftable),
+                           {shiftable[-1]: sink_guard}))
+
+
 def clusterize(exprs):
     """Group a sequence of :class:`ir.Eq`s into one or more :class:`Cluster`s."""
     # Group expressions based on data dependences
@@ -254,6 +386,10 @@ def clusterize(exprs):
     # Group PartialClusters together where possible
     clusters = groupby(clusters)
 
+    # Fuse dependent PartialClusters through loop shifting, if requested
+    if configuration['loop-shifting']:
+        clusters = shift_and_fuse(clusters)
+
     # Introduce conditional PartialClusters
     clusters = guard(clusters)
 
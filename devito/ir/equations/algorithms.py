@@ -2,7 +2,7 @@ from operator import attrgetter
 
 from devito.dimension import Dimension
 from devito.symbolics import retrieve_indexed, split_affine
-from devito.tools import filter_sorted, flatten, toposort
+from devito.tools import filter_ordered, filter_sorted, flatten, toposort
 
 __all__ = ['dimension_sort']
 
@@ -34,7 +34,10 @@ def dimension_sort(expr, key=None):
                     # what the user is attempting to do
                     constraint.extend([d for d in filter_sorted(i.free_symbols)
                                        if isinstance(d, Dimension)])
-        return constraint
+        # A Dimension may appear more than once (e.g., both directly and within
+        # a nested Indexed, as in A[B[i, j], i]); only the first occurrence
+        # is meaningful, the others would introduce spurious cycles
+        return filter_ordered(constraint)
 
     constraints = [handle_indexed(i) for i in retrieve_indexed(expr, mode='all')]
 
@@ -6,7 +6,7 @@ import abc
 import inspect
 import numbers
 from cached_property import cached_property
-from collections import Iterable, OrderedDict, namedtuple
+from collections import Iterable, namedtuple
 
 import cgen as c
 
@@ -18,7 +18,7 @@ from devito.ir.support import Forward, detect_io
 from devito.dimension import Dimension
 from devito.symbolics import FunctionFromPointer, as_symbol
 from devito.tools import (Signer, as_tuple, filter_ordered, filter_sorted, flatten,
-                          validate_type)
+                          memoized_func, validate_type)
 from devito.types import AbstractFunction, Symbol, Indexed
 
 __all__ = ['Node', 'Block', 'Denormals', 'Expression', 'Element', 'Callable',
@@ -54,19 +54,26 @@ class Node(Signer):
     """
     _traversable = []
 
+    """
+    :attr:`_cacheable`. True if the Node cannot change after construction, in
+    which case the outcome of the queries over the tree rooted in the Node (e.g.,
+    :class:`FindSymbols`) may be cached on the Node itself.
+    """
+    _cacheable = True
+
     def __new__(cls, *args, **kwargs):
         obj = super(Node, cls).__new__(cls)
-        argnames = inspect.getargspec(cls.__init__).args
-        obj._args = {k: v for k, v in zip(argnames[1:], args)}
-        obj._args.update(kwargs.items())
-        obj._args.update({k: None for k in argnames[1:] if k not in obj._args})
+        argnames = _argnames(cls)
+        obj._args = dict.fromkeys(argnames)
+        obj._args.update(zip(argnames, args))
+        obj._args.update(kwargs)
         return obj
 
     def _rebuild(self, *args, **kwargs):
         """Reconstruct self. None of the embedded Sympy expressions are rebuilt."""
         handle = self._args.copy()  # Original constructor arguments
         argnames = [i for i in self._traversable if i not in kwargs]
-        handle.update(OrderedDict([(k, v) for k, v in zip(argnames, args)]))
+        handle.update(zip(argnames, args))
         handle.update(kwargs)
         return type(self)(**handle)
 
@@ -131,8 +138,35 @@ class Node(Signer):
         """
         raise NotImplementedError()
 
+    @cached_property
+    def _signature(self):
+        """
+        The signature of the Node, computed out of the C code of the Node
+        itself, but not of its children, and the signatures of its children.
+        Thus, the signature of an IET is computed incrementally, and the
+        signature of any sub-tree shared by multiple IETs is computed once.
+        """
+        from devito.ir.iet.visitors import CGenShallow
+        items = [self.__class__.__name__, str(CGenShallow().visit(self))]
+        items.extend(getattr(i, '_signature', str(i)) for i in flatten(self.children))
+        return Signer._sign(items)
+
     def _signature_items(self):
-        return (str(self.ccode),)
+        return (self._signature,)
+
+    @cached_property
+    def _queries(self):
+        """
+        The outcome of the queries over the tree rooted in ``self``. A rebuilt
+        tree consists of new Nodes, so there is no need for invalidation.
+        """
+        return {}
+
+
+@memoized_func
+def _argnames(cls):
+    """The names of the arguments of the constructor of ``cls``."""
+    return inspect.getargspec(cls.__init__).args[1:]
 
 
 class Block(Node):
@@ -181,7 +215,7 @@ class Element(Node):
 
     def __init__(self, element):
         assert isinstance(element, (c.Comment, c.Statement, c.Value, c.Initializer,
-                                    c.Pragma, c.Line, c.Assign, c.POD))
+                                    c.Pragma, c.Line, c.Assign, c.POD, c.For))
         self.element = element
 
     def __repr__(self):
@@ -410,6 +444,24 @@ class Iteration(Node):
                 return i.val
         return None
 
+    @property
+    def intrinsics(self):
+        """The instruction set of the explicit vector intrinsics to be used to
+        SIMD-vectorize this Iteration, if any."""
+        for i in self.properties:
+            if i.name == 'intrinsics':
+                return i.val
+        return None
+
+    @property
+    def ntstores(self):
+        """The names of the Tensors to be written through nontemporal stores
+        within this Iteration."""
+        for i in self.properties:
+            if i.name == 'ntstores':
+                return i.val
+        return ()
+
     def retag(self, tag_value=None):
         """
         Create a new Iteration object which is identical to ``self``, except
@@ -43,11 +43,21 @@ AFFINE = IterationProperty('affine')
 affine in ``d``. Further, the Iteration does not contain any Indexed varying in
 ``d`` used to indirectly access some other Indexed."""
 
+INTRINSICS = {i: IterationProperty('intrinsics', i) for i in ['avx2', 'avx512']}
+"""The Iteration is to be SIMD-vectorized through explicit vector intrinsics for
+the instruction set used as key."""
+
 
 def tagger(i):
     return IterationProperty('tag', i)
 
 
+def ntstores(functions):
+    """The stores to the Tensors named in ``functions`` within the Iteration
+    are to be nontemporal (i.e., not cached) stores."""
+    return IterationProperty('ntstores', tuple(sorted(functions)))
+
+
 def ntags():
     return len(IterationProperty._KNOWN) - ntags.n_original_properties
 ntags.n_original_properties = len(IterationProperty._KNOWN)  # noqa
@@ -87,7 +87,7 @@ def iet_lower_steppers(iet):
     return iet
 
 
-def iet_insert_C_decls(iet, func_table=None):
+def iet_insert_C_decls(iet, func_table=None, scratch=None):
     """
     Given an Iteration/Expression tree ``iet``, build a new tree with the
     necessary symbol declarations. Declarations are placed as close as
@@ -96,9 +96,12 @@ def iet_insert_C_decls(iet, func_table=None):
     :param iet: The input Iteration/Expression tree.
     :param func_table: (Optional) a mapper from callable names within ``iet``
                        to :class:`Callable`s.
+    :param scratch: (Optional) an :class:`Object` pointing to a chunk of memory
+                    from which the :class:`Array`s that would otherwise be
+                    allocated on the heap are carved (see :class:`ScratchArena`).
     """
     func_table = func_table or {}
-    allocator = Allocator()
+    allocator = Allocator(scratch)
     mapper = OrderedDict()
 
     # First, schedule declarations for Expressions
@@ -159,6 +162,7 @@ def iet_insert_C_decls(iet, func_table=None):
     # Introduce declarations on the heap (if any)
     if allocator.onheap:
         decls, allocs, frees = zip(*allocator.onheap)
+        frees = tuple(i for i in frees if i is not None)
         iet = List(header=decls + allocs, body=iet, footer=frees)
 
     return iet
@@ -0,0 +1,477 @@
+"""
+Lowering of vectorizable innermost :class:`Iteration`s to explicit SIMD
+intrinsics.
+
+The generated code does not use the intrinsics of a specific instruction set
+directly, but rather a small portable vector abstraction -- a set of ``dv``
+macros and inline functions, one family per precision (``dvf_*`` for single
+precision, ``dvd_*`` for double precision) -- whose definition for the target
+instruction set is emitted at the top of the translation unit.
+"""
+
+from __future__ import absolute_import
+
+from collections import OrderedDict
+
+import cgen as c
+import numpy as np
+from sympy import Integer, Rational
+
+from devito.cgen_utils import ccode
+from devito.exceptions import VisitorException
+from devito.ir.iet.nodes import Expression
+from devito.ir.support.space import Backward
+from devito.symbolics import FrozenExpr, retrieve_indexed
+from devito.tools import as_tuple
+
+__all__ = ['simd_isas', 'simd_header', 'simd_lowerable', 'simd_lower']
+
+
+simd_isas = {'avx2': 32, 'avx512': 64}
+"""The instruction sets for which explicit intrinsics may be generated, and
+the size in bytes of their vector registers."""
+
+
+_header_avx2 = """\
+/* Portable vector abstraction: AVX2 */
+typedef __m256 dvf;
+typedef __m256i dvf_mask;
+#define dvf_load(p) _mm256_load_ps(p)
+#define dvf_loadu(p) _mm256_loadu_ps(p)
+#define dvf_maskload(p, m) _mm256_maskload_ps(p, m)
+#define dvf_store(p, v) _mm256_store_ps(p, v)
+#define dvf_storeu(p, v) _mm256_storeu_ps(p, v)
+#define dvf_stream(p, v) _mm256_stream_ps(p, v)
+#define dvf_maskstore(p, m, v) _mm256_maskstore_ps(p, m, v)
+#define dvf_set1(x) _mm256_set1_ps(x)
+#define dvf_add(a, b) _mm256_add_ps(a, b)
+#define dvf_sub(a, b) _mm256_sub_ps(a, b)
+#define dvf_mul(a, b) _mm256_mul_ps(a, b)
+#define dvf_div(a, b) _mm256_div_ps(a, b)
+#define dvf_sqrt(a) _mm256_sqrt_ps(a)
+#define dvf_alignr(a, b, r) ((r) < 4 ? \\
+  _mm256_castsi256_ps(_mm256_alignr_epi8( \\
+    _mm256_castps_si256(_mm256_permute2f128_ps(a, b, 0x21)), \\
+    _mm256_castps_si256(a), 4*((r) & 3))) : \\
+  _mm256_castsi256_ps(_mm256_alignr_epi8( \\
+    _mm256_castps_si256(b), \\
+    _mm256_castps_si256(_mm256_permute2f128_ps(a, b, 0x21)), 4*((r) & 3))))
+static inline dvf_mask dvf_mask_n(const int n)
+{
+  return _mm256_cmpgt_epi32(_mm256_set1_epi32(n),
+                            _mm256_setr_epi32(0, 1, 2, 3, 4, 5, 6, 7));
+}
+typedef __m256d dvd;
+typedef __m256i dvd_mask;
+#define dvd_load(p) _mm256_load_pd(p)
+#define dvd_loadu(p) _mm256_loadu_pd(p)
+#define dvd_maskload(p, m) _mm256_maskload_pd(p, m)
+#define dvd_store(p, v) _mm256_store_pd(p, v)
+#define dvd_storeu(p, v) _mm256_storeu_pd(p, v)
+#define dvd_stream(p, v) _mm256_stream_pd(p, v)
+#define dvd_maskstore(p, m, v) _mm256_maskstore_pd(p, m, v)
+#define dvd_set1(x) _mm256_set1_pd(x)
+#define dvd_add(a, b) _mm256_add_pd(a, b)
+#define dvd_sub(a, b) _mm256_sub_pd(a, b)
+#define dvd_mul(a, b) _mm256_mul_pd(a, b)
+#define dvd_div(a, b) _mm256_div_pd(a, b)
+#define dvd_sqrt(a) _mm256_sqrt_pd(a)
+#define dvd_alignr(a, b, r) ((r) < 2 ? \\
+  _mm256_castsi256_pd(_mm256_alignr_epi8( \\
+    _mm256_castpd_si256(_mm256_permute2f128_pd(a, b, 0x21)), \\
+    _mm256_castpd_si256(a), 8*((r) & 1))) : \\
+  _mm256_castsi256_pd(_mm256_alignr_epi8( \\
+    _mm256_castpd_si256(b), \\
+    _mm256_castpd_si256(_mm256_permute2f128_pd(a, b, 0x21)), 8*((r) & 1))))
+static inline dvd_mask dvd_mask_n(const int n)
+{
+  return _mm256_cmpgt_epi64(_mm256_set1_epi64x(n), _mm256_setr_epi64x(0, 1, 2, 3));
+}"""
+
+_header_avx512 = """\
+/* Portable vector abstraction: AVX-512 */
+typedef __m512 dvf;
+typedef __mmask16 dvf_mask;
+#define dvf_load(p) _mm512_load_ps(p)
+#define dvf_loadu(p) _mm512_loadu_ps(p)
+#define dvf_maskload(p, m) _mm512_maskz_loadu_ps(m, p)
+#define dvf_store(p, v) _mm512_store_ps(p, v)
+#define dvf_storeu(p, v) _mm512_storeu_ps(p, v)
+#define dvf_stream(p, v) _mm512_stream_ps(p, v)
+#define dvf_maskstore(p, m, v) _mm512_mask_storeu_ps(p, m, v)
+#define dvf_set1(x) _mm512_set1_ps(x)
+#define dvf_add(a, b) _mm512_add_ps(a, b)
+#define dvf_sub(a, b) _mm512_sub_ps(a, b)
+#define dvf_mul(a, b) _mm512_mul_ps(a, b)
+#define dvf_div(a, b) _mm512_div_ps(a, b)
+#define dvf_sqrt(a) _mm512_sqrt_ps(a)
+#define dvf_alignr(a, b, r) _mm512_castsi512_ps(_mm512_alignr_epi32( \\
+  _mm512_castps_si512(b), _mm512_castps_si512(a), r))
+static inline dvf_mask dvf_mask_n(const int n)
+{
+  return n >= 16 ? (dvf_mask) 0xFFFF : n <= 0 ? (dvf_mask) 0 : (dvf_mask) ((1U << n) - 1);
+}
+typedef __m512d dvd;
+typedef __mmask8 dvd_mask;
+#define dvd_load(p) _mm512_load_pd(p)
+#define dvd_loadu(p) _mm512_loadu_pd(p)
+#define dvd_maskload(p, m) _mm512_maskz_loadu_pd(m, p)
+#define dvd_store(p, v) _mm512_store_pd(p, v)
+#define dvd_storeu(p, v) _mm512_storeu_pd(p, v)
+#define dvd_stream(p, v) _mm512_stream_pd(p, v)
+#define dvd_maskstore(p, m, v) _mm512_mask_storeu_pd(p, m, v)
+#define dvd_set1(x) _mm512_set1_pd(x)
+#define dvd_add(a, b) _mm512_add_pd(a, b)
+#define dvd_sub(a, b) _mm512_sub_pd(a, b)
+#define dvd_mul(a, b) _mm512_mul_pd(a, b)
+#define dvd_div(a, b) _mm512_div_pd(a, b)
+#define dvd_sqrt(a) _mm512_sqrt_pd(a)
+#define dvd_alignr(a, b, r) _mm512_castsi512_pd(_mm512_alignr_epi64( \\
+  _mm512_castpd_si512(b), _mm512_castpd_si512(a), r))
+static inline dvd_mask dvd_mask_n(const int n)
+{
+  return n >= 8 ? (dvd_mask) 0xFF : n <= 0 ? (dvd_mask) 0 : (dvd_mask) ((1U << n) - 1);
+}"""
+
+
+def simd_header(isa):
+    """
+    Return the definition of the portable vector abstraction for the
+    instruction set ``isa``, as a :class:`cgen.Line`. The abstraction requires
+    the header file ``immintrin.h``.
+    """
+    return c.Line({'avx2': _header_avx2, 'avx512': _header_avx512}[isa])
+
+
+def simd_lowerable(iteration, isa):
+    """
+    Return True if the innermost :class:`Iteration` ``iteration`` can be
+    lowered through :func:`simd_lower`, False otherwise.
+    """
+    try:
+        _Lowering(iteration, isa)
+        return True
+    except VisitorException:
+        return False
+
+
+def simd_lower(iteration, isa, start, end):
+    """
+    Lower the innermost :class:`Iteration` ``iteration``, spanning the points
+    ``start`` to ``end`` (C strings or integers), into a :class:`cgen.Block`
+    using explicit vector intrinsics for the instruction set ``isa``.
+
+    The points are processed ``W`` at a time, with ``W`` the number of items
+    in a vector register. If all of the Tensors written are aligned (i.e., their
+    allocated innermost extent is a multiple of ``W``), a masked peel iteration
+    first aligns the stores, so that the aligned loads and stores are used for
+    all of the accesses that are provably aligned. The points left over are
+    processed by a masked remainder iteration. Each Tensor row is loaded into
+    as few vector registers as possible, and the shifted stencil operands (e.g.,
+    ``u[z-1]``, ``u[z+1]``) are obtained from these registers, rather than
+    through further (unaligned) loads, if that saves loads. The aligned stores
+    to the Tensors in ``iteration.ntstores`` are nontemporal.
+
+    :raises VisitorException: If ``iteration`` cannot be lowered, e.g. because
+                              it contains operations unsupported by the vector
+                              abstraction.
+    """
+    return _Lowering(iteration, isa).lower(start, end)
+
+
+class _Lowering(object):
+
+    def __init__(self, iteration, isa):
+        if not iteration.is_Vectorizable or iteration.uindices or\
+                iteration.limits[2] != 1 or iteration.direction == Backward:
+            raise VisitorException("Unsupported Iteration `%r`" % iteration)
+        exprs = self._flatten(iteration.nodes)
+        dtypes = set(np.dtype(i.dtype) for i in exprs)
+        if len(dtypes) != 1 or not dtypes <= {np.dtype(np.float32),
+                                              np.dtype(np.float64)}:
+            raise VisitorException("Unsupported data type")
+        self.dtype = dtypes.pop().type
+        self.prefix = 'dvf' if self.dtype == np.float32 else 'dvd'
+        self.W = simd_isas[isa] // np.dtype(self.dtype).itemsize
+        self.index = iteration.index
+        self.exprs = exprs
+        self.ntstores = set(iteration.ntstores)
+
+        # Analyse the accesses
+        self.groups = OrderedDict()
+        self.aligned = set()
+        self.temps = set()
+        self.written = set(i.expr.lhs.name for i in exprs if i.expr.lhs.is_Symbol)
+        for e in exprs:
+            for i in retrieve_indexed(e.expr, mode='all', deep=True):
+                self._check_function(i)
+                key, offset = self._access(i)
+                if key is not None and i is not e.expr.lhs:
+                    self.groups.setdefault(key, set()).add(offset)
+                if self._is_aligned(i):
+                    self.aligned.add(i.base.function.name)
+            self._translate(e.expr.rhs, lambda key, offset: '')
+            lhs = e.expr.lhs
+            if lhs.is_Symbol:
+                self.temps.add(lhs.name)
+            elif self._access(lhs)[0] is None:
+                raise VisitorException("Unsupported loop-invariant write")
+
+        # The stores are aligned through peeling, provided all written Tensors
+        # are aligned. The offset of the first store is taken as reference
+        writes = [e.expr.lhs for e in exprs if e.expr.lhs.is_Indexed]
+        if writes and all(self._is_aligned(i) for i in writes):
+            self.reference = self._access(writes[0])[1]
+        else:
+            self.reference = None
+
+    def _flatten(self, nodes):
+        """
+        Return the :class:`Expression`s in ``nodes``, which may only consist of
+        Expressions and plain Lists (e.g., :class:`ExpressionBundle`s).
+        """
+        ret = []
+        for i in nodes:
+            if isinstance(i, Expression) and not i.is_ForeignExpression:
+                ret.append(i)
+            elif i.is_List and not i.header and not i.footer:
+                ret.extend(self._flatten(i.body))
+            else:
+                raise VisitorException("Unsupported Iteration body")
+        if not ret:
+            raise VisitorException("Unsupported Iteration body")
+        return tuple(ret)
+
+    def _check_function(self, indexed):
+        function = indexed.base.function
+        if np.dtype(function.dtype) != np.dtype(self.dtype) or\
+                getattr(function, 'storage_dtype', function.dtype) != function.dtype:
+            raise VisitorException("Unsupported data type")
+
+    def _access(self, indexed):
+        """
+        Return the group of ``indexed`` -- its label and all of its indices but
+        the innermost one -- and the offset from the Iteration index of its
+        innermost index, or ``(None, None)`` if ``indexed`` does not vary along
+        the Iteration.
+        """
+        dims = [[j for j in as_tuple(getattr(i, 'free_symbols', ()))
+                 if getattr(j, 'is_Dimension', False) and j.name == self.index]
+                for i in indexed.indices]
+        if not any(dims):
+            return None, None
+        if any(dims[:-1]) or len(dims[-1]) != 1:
+            raise VisitorException("Unsupported access `%s`" % indexed)
+        offset = indexed.indices[-1] - dims[-1][0]
+        if not isinstance(offset, Integer):
+            raise VisitorException("Unsupported access `%s`" % indexed)
+        key = (indexed.base.function.name,
+               ''.join('[%s]' % ccode(i) for i in indexed.indices[:-1]), dims[-1][0])
+        return key, int(offset)
+
+    def _is_aligned(self, indexed):
+        function = indexed.base.function
+        try:
+            return getattr(function, 'shape_allocated', function.shape)[-1] %\
+                self.W == 0
+        except TypeError:
+            return False
+
+    def _pointer(self, key, offset):
+        name, indices, dim = key
+        return '&%s%s[%s]' % (name, indices, ccode(dim + offset))
+
+    def _plan(self, key):
+        """
+        Return the offsets of the vectors to be loaded for the group ``key``.
+        Only if the group's offsets are better served by a few loads followed by
+        shifts, the vectors are the consecutive ones covering all offsets.
+        """
+        offsets = sorted(self.groups[key])
+        start, span = offsets[0], offsets[-1] - offsets[0]
+        nvectors = -(-span // self.W) + 1
+        if nvectors < len(offsets):
+            return [start + j*self.W for j in range(nvectors)]
+        return offsets
+
+    def _is_invariant(self, expr):
+        """Return True if ``expr`` does not vary along the Iteration."""
+        if any(self._access(i)[0] is not None
+               for i in retrieve_indexed(expr, mode='all', deep=True)):
+            return False
+        return not any(i.name in self.written or i.name == self.index
+                       for i in expr.free_symbols if i.is_Symbol)
+
+    def _translate(self, expr, values):
+        """
+        Translate ``expr`` into a C string made of calls to the vector
+        abstraction. ``values`` maps the accesses varying along the Iteration,
+        given as group and offset, to C strings.
+        """
+        p = self.prefix
+        if not expr.is_Atom and not expr.is_Indexed and self._is_invariant(expr):
+            # Computed once, in scalar arithmetic, and then broadcast
+            return '%s_set1(%s)' % (p, ccode(expr, dtype=self.dtype))
+        elif expr.is_Indexed:
+            key, offset = self._access(expr)
+            if key is None:
+                return '%s_set1(%s)' % (p, ccode(expr, dtype=self.dtype))
+            return values(key, offset)
+        elif expr.is_Number:
+            return '%s_set1(%s)' % (p, ccode(expr, dtype=self.dtype))
+        elif expr.is_Symbol:
+            if expr.name in self.temps:
+                return expr.name
+            elif expr.name in self.written:
+                # Loop-carried scalar, e.g. a reduction
+                raise VisitorException("Unsupported scalar dependence")
+            elif getattr(expr, 'is_Dimension', False) and expr.name == self.index:
+                raise VisitorException("Unsupported use of the Iteration index")
+            return '%s_set1(%s)' % (p, ccode(expr, dtype=self.dtype))
+        elif expr.is_Add:
+            ret = None
+            for i in expr.args:
+                if ret is not None and i.could_extract_minus_sign():
+                    ret = '%s_sub(%s, %s)' % (p, ret, self._translate(-i, values))
+                else:
+                    handle = self._translate(i, values)
+                    ret = handle if ret is None else '%s_add(%s, %s)' % (p, ret, handle)
+            return ret
+        elif expr.is_Mul:
+            num, den = [], []
+            for i in expr.args:
+                if i.is_Pow and i.exp.is_Integer and i.exp < 0:
+                    den.append(self._translate(i.base**(-i.exp), values))
+                else:
+                    num.append(self._translate(i, values))
+            ret = num[0] if num else '%s_set1(1)' % p
+            for i in num[1:]:
+                ret = '%s_mul(%s, %s)' % (p, ret, i)
+            if den:
+                handle = den[0]
+                for i in den[1:]:
+                    handle = '%s_mul(%s, %s)' % (p, handle, i)
+                ret = '%s_div(%s, %s)' % (p, ret, handle)
+            return ret
+        elif expr.is_Pow:
+            base = self._translate(expr.base, values)
+            if expr.exp.is_Integer and expr.exp != 0:
+                ret = base
+                for _ in range(abs(int(expr.exp)) - 1):
+                    ret = '%s_mul(%s, %s)' % (p, ret, base)
+            elif expr.exp in (Rational(1, 2), Rational(-1, 2)):
+                ret = '%s_sqrt(%s)' % (p, base)
+            else:
+                raise VisitorException("Unsupported power `%s`" % expr)
+            if expr.exp < 0:
+                ret = '%s_div(%s_set1(1), %s)' % (p, p, ret)
+            return ret
+        elif isinstance(expr, FrozenExpr):
+            return self._translate(expr.args[0], values)
+        raise VisitorException("Unsupported operation `%s`" % expr)
+
+    def _body(self, masked):
+        """
+        Generate the body of a vector iteration. If ``masked``, only the
+        first ``_n`` points, out of ``W``, are computed.
+        """
+        p, W = self.prefix, self.W
+        body = []
+        loaded = {}
+        shifted = {}
+        counter = [0]
+
+        def new_vector(value):
+            name = '_v%d' % counter[0]
+            counter[0] += 1
+            body.append(c.Initializer(c.Value('const %s' % p, name), value))
+            return name
+
+        def load(key, offset, last):
+            # Only the points accessed by the scalar loop may be loaded; these
+            # extend up to ``last`` (the group's largest offset) plus the number
+            # of points computed, minus one
+            pointer = self._pointer(key, offset)
+            if masked:
+                mask = '_m' if offset == last else\
+                    '%s_mask_n(_n %s %d)' % (p, '+' if last > offset else '-',
+                                             abs(last - offset))
+                return '%s_maskload(%s, %s)' % (p, pointer, mask)
+            elif offset > last:
+                return '%s_maskload(%s, %s_mask_n(%d))' % (p, pointer, p,
+                                                           last - offset + W)
+            elif self.reference is not None and key[0] in self.aligned and\
+                    (offset - self.reference) % W == 0:
+                return '%s_load(%s)' % (p, pointer)
+            return '%s_loadu(%s)' % (p, pointer)
+
+        def values(key, offset):
+            if (key, offset) in shifted:
+                return shifted[(key, offset)]
+            plan = self._plan(key)
+            last = max(self.groups[key])
+            if key not in loaded:
+                loaded[key] = [new_vector(load(key, i, last)) for i in plan]
+            vectors = loaded[key]
+            if offset in plan:
+                ret = vectors[plan.index(offset)]
+            else:
+                j, r = divmod(offset - plan[0], W)
+                ret = new_vector('%s_alignr(%s, %s, %d)' %
+                                 (p, vectors[j], vectors[j + 1], r))
+            shifted[(key, offset)] = ret
+            return ret
+
+        declared = set()
+        for e in self.exprs:
+            value = self._translate(e.expr.rhs, values)
+            lhs = e.expr.lhs
+            if lhs.is_Symbol:
+                if lhs.name in declared:
+                    body.append(c.Assign(lhs.name, value))
+                else:
+                    body.append(c.Initializer(c.Value(p, lhs.name), value))
+                    declared.add(lhs.name)
+                continue
+            key, offset = self._access(lhs)
+            pointer = self._pointer(key, offset)
+            if masked:
+                body.append(c.Statement('%s_maskstore(%s, _m, %s)' %
+                                        (p, pointer, value)))
+            elif self.reference is not None and (offset - self.reference) % W == 0:
+                # Nontemporal stores, if requested, require aligned addresses
+                store = 'stream' if key[0] in self.ntstores else 'store'
+                body.append(c.Statement('%s_%s(%s, %s)' % (p, store, pointer, value)))
+            else:
+                body.append(c.Statement('%s_storeu(%s, %s)' % (p, pointer, value)))
+            # Any vector loaded from the Tensor just written is now stale
+            stale = [k for k in loaded if k[0] == key[0]]
+            for k in stale:
+                loaded.pop(k)
+                for i in [i for i in shifted if i[0] == k]:
+                    shifted.pop(i)
+        return body
+
+    def lower(self, start, end):
+        p, W, index = self.prefix, self.W, self.index
+        start, end = ccode(start), ccode(end)
+        mask = c.Initializer(c.Value('const %s_mask' % p, '_m'), '%s_mask_n(_n)' % p)
+
+        body = [c.Initializer(c.Value('int', index), start)]
+        if self.reference is not None:
+            # Peel iteration, to align the stores
+            peel = '(%d - (%s + %d) %% %d) %% %d' % (W, index, self.reference, W, W)
+            body.append(c.Block([
+                c.Initializer(c.Value('const int', '_p'), peel),
+                c.Initializer(c.Value('const int', '_n'),
+                              '(%s - %s + 1 < _p) ? %s - %s + 1 : _p' %
+                              (end, index, end, index)),
+                c.If('_n > 0', c.Block([mask] + self._body(True) +
+                                       [c.Statement('%s += _n' % index)]))
+            ]))
+        body.append(c.For('', '%s <= %s - %d' % (index, end, W - 1),
+                          '%s += %d' % (index, W), c.Block(self._body(False))))
+        body.append(c.If('%s <= %s' % (index, end), c.Block(
+            [c.Initializer(c.Value('const int', '_n'), '%s - %s + 1' % (end, index)),
+             mask] + self._body(True))))
+        return c.Block(body)
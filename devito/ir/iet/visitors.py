@@ -11,10 +11,11 @@ from operator import attrgetter
 
 import cgen as c
 
-from devito.cgen_utils import blankline, ccode
+from devito.cgen_utils import blankline, ccode, dtype_to_ctype
 from devito.exceptions import VisitorException
 from devito.function import TimeFunction
 from devito.ir.iet.nodes import Node
+from devito.ir.iet.simd import simd_lower
 from devito.ir.support.space import Backward
 from devito.symbolics import xreplace_indices
 from devito.tools import as_tuple, filter_sorted, flatten, GenericVisitor
@@ -22,7 +23,7 @@ from devito.tools import as_tuple, filter_sorted, flatten, GenericVisitor
 
 __all__ = ['FindNodes', 'FindSections', 'FindSymbols', 'MapExpressions',
            'IsPerfectIteration', 'ReplaceStepIndices', 'printAST', 'CGen',
-           'Transformer', 'NestedTransformer', 'FindAdjacentIterations',
+           'CGenShallow', 'Transformer', 'NestedTransformer', 'FindAdjacentIterations',
            'MapIteration']
 
 
@@ -50,6 +51,37 @@ class Visitor(GenericVisitor):
         return o._rebuild(*new_ops, **okwargs)
 
 
+def _copy(ret):
+    """Copy the (possibly nested) lists and dicts returned by a query."""
+    if isinstance(ret, list):
+        return list(ret)
+    elif isinstance(ret, dict):
+        return type(ret)((k, _copy(v)) for k, v in ret.items())
+    else:
+        return ret
+
+
+def cached_query(visit):
+    """
+    Decorator for the ``visit`` method of a query, that is a :class:`Visitor`
+    whose outcome only depends on the visited tree and on ``self._query_key``.
+    The outcome of a top-level visit (i.e., without the arguments used to pass
+    information down the call stack) is cached on the visited :class:`Node`,
+    so that repeated queries over the same tree are answered without
+    re-traversal.
+    """
+    def wrapper(self, o, *args, **kwargs):
+        if args or kwargs or not isinstance(o, Node) or not o._cacheable:
+            return visit(self, o, *args, **kwargs)
+        key = self._query_key
+        try:
+            ret = o._queries[key]
+        except KeyError:
+            ret = o._queries[key] = visit(self, o)
+        return _copy(ret)
+    return wrapper
+
+
 class PrintAST(Visitor):
 
     _depth = 0
@@ -150,7 +182,7 @@ class CGen(Visitor):
             elif i.is_Symbol:
                 ret.append(c.Value('const %s' % c.dtype_to_ctype(i.dtype), i.name))
             elif i.is_Tensor:
-                ret.append(c.Value(c.dtype_to_ctype(i.dtype),
+                ret.append(c.Value(dtype_to_ctype(i.storage_dtype),
                                    '*restrict %s_vec' % i.name))
             elif i.is_Dimension:
                 ret.append(c.Value('const %s' % c.dtype_to_ctype(i.dtype), i.name))
@@ -185,8 +217,9 @@ class CGen(Visitor):
         f = o.function
         align = "__attribute__((aligned(64)))"
         shape = ''.join(["[%s]" % ccode(j) for j in f.symbolic_shape[1:]])
-        lvalue = c.POD(f.dtype, '(*restrict %s)%s %s' % (f.name, shape, align))
-        rvalue = '(%s (*)%s) %s' % (c.dtype_to_ctype(f.dtype), shape, '%s_vec' % f.name)
+        ctype = dtype_to_ctype(f.storage_dtype)
+        lvalue = c.Value(ctype, '(*restrict %s)%s %s' % (f.name, shape, align))
+        rvalue = '(%s (*)%s) %s' % (ctype, shape, '%s_vec' % f.name)
         return c.Initializer(lvalue, rvalue)
 
     def visit_tuple(self, o):
@@ -227,9 +260,8 @@ class CGen(Visitor):
         else:
             return c.If(ccode(o.condition), then_body)
 
-    def visit_Iteration(self, o):
-        body = flatten(self.visit(i) for i in o.children)
-
+    def _bounds(self, o):
+        """Return the first and last points of the Iteration ``o``."""
         # Start
         if o.offsets[0] != 0:
             start = str(o.limits[0] + o.offsets[0])
@@ -250,6 +282,20 @@ class CGen(Visitor):
         else:
             end = o.limits[1]
 
+        return start, end
+
+    def visit_Iteration(self, o):
+        start, end = self._bounds(o)
+
+        # Use explicit vector intrinsics, if requested and possible
+        if o.intrinsics is not None:
+            try:
+                return simd_lower(o, o.intrinsics, start, end)
+            except VisitorException:
+                pass
+
+        body = flatten(self.visit(i) for i in o.children)
+
         # For backward direction flip loop bounds
         if o.direction == Backward:
             loop_init = 'int %s = %s' % (o.index, ccode(end))
@@ -313,6 +359,26 @@ class CGen(Visitor):
                         esigns + [blankline, kernel] + efuncs)
 
 
+class CGenShallow(CGen):
+
+    """
+    Like :class:`CGen`, but only the root of the Iteration/Expression tree is
+    turned into a :module:`cgen` tree; any other :class:`Node` is replaced by
+    a placeholder.
+    """
+
+    def __init__(self):
+        super(CGenShallow, self).__init__()
+        self._root = None
+
+    def visit(self, o, *args, **kwargs):
+        if self._root is None:
+            self._root = o
+        elif isinstance(o, Node):
+            return c.Line('<%s>' % o.__class__.__name__)
+        return super(CGenShallow, self).visit(o, *args, **kwargs)
+
+
 class FindSections(Visitor):
 
     @classmethod
@@ -359,6 +425,14 @@ class FindSections(Visitor):
     visit_Element = visit_Expression
     visit_Call = visit_Expression
 
+    @property
+    def _query_key(self):
+        return (self.__class__,)
+
+    @cached_query
+    def visit(self, o, *args, **kwargs):
+        return super(FindSections, self).visit(o, *args, **kwargs)
+
 
 class MapExpressions(FindSections):
 
@@ -417,8 +491,20 @@ class FindSymbols(Visitor):
 
     def __init__(self, mode='symbolics'):
         super(FindSymbols, self).__init__()
+        self.mode = mode
         self.rule = self.rules[mode]
 
+    @property
+    def _query_key(self):
+        return (self.__class__, self.mode)
+
+    @cached_query
+    def visit(self, o, *args, **kwargs):
+        # Note: as sub-trees are visited through ``visit`` too, the query is
+        # cached at every Node, so only the new Nodes in a rebuilt tree are
+        # actually walked over
+        return super(FindSymbols, self).visit(o, *args, **kwargs)
+
     def visit_tuple(self, o):
         symbols = flatten([self.visit(i) for i in o])
         return filter_sorted(symbols, key=attrgetter('name'))
@@ -462,8 +548,17 @@ class FindNodes(Visitor):
     def __init__(self, match, mode='type'):
         super(FindNodes, self).__init__()
         self.match = match
+        self.mode = mode
         self.rule = self.rules[mode]
 
+    @property
+    def _query_key(self):
+        return (self.__class__, self.match, self.mode)
+
+    @cached_query
+    def visit(self, o, *args, **kwargs):
+        return super(FindNodes, self).visit(o, *args, **kwargs)
+
     def visit_object(self, o, ret=None):
         return ret
 
@@ -602,6 +697,10 @@ class Transformer(Visitor):
                 return handle._rebuild(**handle.args)
         else:
             rebuilt = [self.visit(i, **kwargs) for i in o.children]
+            if all(len(i) == len(j) and all(a is b for a, b in zip(i, j))
+                   for i, j in zip(rebuilt, o.children)):
+                # Nothing has changed, so /o/ may be reused
+                return o
             return o._rebuild(*rebuilt, **o.args_frozen)
 
     def visit(self, o, *args, **kwargs):
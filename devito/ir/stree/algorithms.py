@@ -1,24 +1,49 @@
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 
 from anytree import LevelOrderIter, findall
 
 from devito.ir.stree.tree import (ScheduleTree, NodeIteration, NodeConditional,
                                   NodeExprs, NodeSection, NodeHalo, insert)
+from devito.ir.support import Any, Forward, Scope
 from devito.ir.support.space import IterationSpace
 from devito.mpi import HaloScheme, HaloSchemeException
 from devito.parameters import configuration
-from devito.tools import flatten
+from devito.symbolics import retrieve_indexed
+from devito.tools import flatten, is_integer
 
-__all__ = ['st_build']
+__all__ = ['st_build', 'st_fuse', 'st_sweeps']
+
+
+configuration.add('fusion', 1, [0, 1], lambda i: bool(i))
+
+
+MAX_FUSED_OPERANDS = 48
+"""
+The maximum number of distinct operands (i.e., array accesses) in the body of
+an innermost loop resulting from fusion. Beyond that, the body would likely
+exceed the register file, so the innermost loops are kept separate.
+"""
+
+
+Sweeps = namedtuple('Sweeps', 'unfused fused')
+"""The number of sweeps over the grid per timestep, before and after fusion."""
 
 
 def st_build(clusters):
     """
-    Create a :class:`ScheduleTree` from a :class:`ClusterGroup`.
+    Create a :class:`ScheduleTree` from a :class:`ClusterGroup`. The number
+    of sweeps over the grid per timestep, before and after fusion, is
+    attached to the returned tree as ``sweeps``.
     """
     # ClusterGroup -> Schedule tree
     stree = st_schedule(clusters)
 
+    # Fuse sibling loop nests
+    unfused = st_sweeps(stree)
+    if configuration['fusion']:
+        stree = st_fuse(stree)
+    stree.sweeps = Sweeps(unfused, st_sweeps(stree))
+
     # Add in section nodes
     stree = st_section(stree)
 
@@ -74,6 +99,180 @@ def st_schedule(clusters):
     return stree
 
 
+def st_fuse(stree):
+    """
+    Fuse adjacent sibling :class:`NodeIteration`s iterating over the same
+    :class:`Interval`, provided that no data dependence is violated. This
+    catches the loop nests that :func:`st_schedule` could not share, such as
+    those of guarded :class:`Cluster`s (e.g., saving a subsampled wavefield),
+    which otherwise sweep the grid one more time.
+
+    Fusion proceeds top-down: once two nests are fused, their sub-nests become
+    siblings and are, in turn, candidates for fusion. A :class:`NodeConditional`
+    is pushed down across the fused Iterations, but never into an innermost
+    loop, which would otherwise evaluate it at each point. Innermost loops are
+    not fused if the resulting body would have more than ``MAX_FUSED_OPERANDS``
+    operands, to limit the register pressure.
+
+    Examples
+    ========
+    Given: ::
+
+        for x
+          for y
+            u[t+1,x,y] = f(u[t,x,y])
+        if (t % 4 == 0)
+          for x
+            for y
+              usave[t/4,x,y] = u[t,x,y]
+
+    Produce: ::
+
+        for x
+          for y
+            u[t+1,x,y] = f(u[t,x,y])
+          if (t % 4 == 0)
+            for y
+              usave[t/4,x,y] = u[t,x,y]
+    """
+    _fuse_children(stree, [])
+    return stree
+
+
+def _fuse_children(node, shared):
+    processed = []
+    for n in list(node.children):
+        if processed and _fuse(processed[-1], n, shared):
+            continue
+        processed.append(n)
+    for n in processed:
+        _fuse_children(n, shared + ([n.dim] if n.is_Iteration else []))
+
+
+def _unwrap(node):
+    """
+    Return the :class:`NodeIteration` ``node`` is, or the one ``node`` guards
+    if ``node`` is a :class:`NodeConditional` guarding a single non-innermost
+    Iteration whose Dimension does not appear in the guard, otherwise None.
+    """
+    if node.is_Iteration:
+        return node
+    elif node.is_Conditional and len(node.children) == 1:
+        it = node.children[0]
+        if it.is_Iteration and not _is_innermost(it) and\
+                not ({it.dim, it.dim.root} & node.guard.free_symbols):
+            return it
+    return None
+
+
+def _is_innermost(node):
+    return not any(i.is_Iteration for i in node.descendants)
+
+
+def _push_down(node):
+    """
+    Swap the :class:`NodeConditional` ``node`` with the :class:`NodeIteration`
+    it guards; return the Iteration.
+    """
+    it = node.children[0]
+    parent = node.parent
+    cond = NodeConditional(node.guard)
+    cond.children = it.children
+    it.children = [cond]
+    parent.children = [it if i is node else i for i in parent.children]
+    return it
+
+
+def _fuse(a, b, shared):
+    """
+    Fuse the sub-tree ``b`` into its preceding sibling ``a``. Return True
+    if the fusion took place, False otherwise.
+    """
+    ita, itb = _unwrap(a), _unwrap(b)
+    if ita is None or itb is None or ita.dim is not itb.dim or ita.dim.is_Time:
+        return False
+    if ita.interval != itb.interval or ita.direction != itb.direction:
+        return False
+
+    exprs_a = flatten(i.exprs for i in findall(a, lambda i: i.is_Exprs))
+    exprs_b = flatten(i.exprs for i in findall(b, lambda i: i.is_Exprs))
+    if _is_innermost(ita) and _is_innermost(itb):
+        operands = set(flatten(retrieve_indexed(e) for e in exprs_a + exprs_b))
+        if len(operands) > MAX_FUSED_OPERANDS:
+            return False
+    direction = _fused_direction(exprs_a, exprs_b, shared, ita.dim, ita.direction)
+    if direction is None:
+        return False
+
+    if a.is_Conditional:
+        ita = _push_down(a)
+    if b.is_Conditional:
+        itb = _push_down(b)
+    ispace = IterationSpace.merge(ita.ispace, itb.ispace)
+    directions = dict(ispace.directions)
+    directions[ita.dim] = direction
+    ita.ispace = IterationSpace(ispace.intervals, ispace.sub_iterators, directions)
+    ita.children = ita.children + itb.children
+    itb.parent = None
+
+    return True
+
+
+def _fused_direction(source, sink, shared, dim, direction):
+    """
+    Return the direction in which the expressions ``sink``, executed after
+    ``source`` within the loops over the ``shared`` Dimensions, may be executed
+    within the same loop over ``dim``, or None if this would be illegal. This
+    is the case if, at any iteration along ``dim``, ``sink`` touches what
+    ``source`` touches at a later iteration, at least one of the two being a
+    write. If ``direction`` is ``Any`` and the fused loop carries a dependence,
+    then it must proceed ``Forward``.
+    """
+    n = len(source)
+    scope = Scope(source + sink)
+    for f, writes in scope.writes.items():
+        for w in writes:
+            for a in scope[f]:
+                if (w.timestamp < n) == (a.timestamp < n):
+                    continue
+                i, j = (w, a) if w.timestamp < n else (a, w)
+                if i.is_scalar or i.is_irregular or j.is_irregular or\
+                        dim not in i.findices:
+                    return None
+                try:
+                    distance = OrderedDict(zip(i.findices, j.distance(i)))
+                except TypeError:
+                    return None
+                if any(distance.get(d, 0) != 0 for d in shared):
+                    # Carried by an enclosing loop, hence unaffected by fusion
+                    continue
+                if not is_integer(distance[dim]):
+                    return None
+                elif distance[dim] == 0:
+                    continue
+                elif direction is Any:
+                    if distance[dim] > 0:
+                        return None
+                    direction = Forward
+                elif (distance[dim] > 0) == (direction is Forward):
+                    return None
+    return direction
+
+
+def st_sweeps(stree):
+    """
+    Return the number of sweeps over the grid per timestep, that is the number
+    of outermost loop nests over :class:`SpaceDimension`s within the time loop
+    (or within the entire ``stree``, if there is no time loop).
+    """
+    nests = [i for i in findall(stree, lambda i: i.is_Iteration and i.dim.is_Space)
+             if not any(j.is_Iteration and j.dim.is_Space for j in i.ancestors)]
+    if any(i.is_Iteration and i.dim.is_Time for i in stree.descendants):
+        nests = [i for i in nests
+                 if any(j.is_Iteration and j.dim.is_Time for j in i.ancestors)]
+    return len(nests)
+
+
 def st_make_halo(stree):
     """
     Add :class:`NodeHalo` to a :class:`ScheduleTree`. A halo node describes
@@ -0,0 +1,269 @@
+from __future__ import absolute_import
+
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+import os
+
+import numpy as np
+from psutil import cpu_count, virtual_memory
+
+from devito.ir.iet import FindNodes, FindSymbols, HaloSpot
+from devito.parameters import configuration
+from devito.tools import filter_sorted, prod
+
+__all__ = ['MemoryReport', 'MemoryPlanner']
+
+
+class MemoryEntry(namedtuple('MemoryEntry', 'kind shape dtype copies allocated')):
+
+    """
+    The memory required by an object accessed by an :class:`Operator`.
+
+    :param kind: One of ``'function'`` (the data of a :class:`TensorFunction`),
+                 ``'save'`` (the data of a :class:`TimeFunction` saving all of
+                 its timesteps), ``'heap'``/``'stack'`` (an :class:`Array`
+                 allocated by the Operator itself, such as a DSE temporary),
+                 ``'mpi'`` (the buffers for a halo exchange).
+    :param shape: The shape of the object.
+    :param dtype: The data type of the object.
+    :param copies: How many copies of the object are alive at once (e.g., one
+                   per thread for the thread-private stack :class:`Array`s).
+    :param allocated: True if the memory has already been allocated (i.e., it
+                      would not be allocated by ``apply``), False otherwise.
+    """
+
+    @property
+    def nbytes(self):
+        return int(prod(self.shape)) * np.dtype(self.dtype).itemsize * self.copies
+
+
+class MemoryReport(OrderedDict):
+
+    """
+    A special dictionary mapping the names of the objects accessed by an
+    :class:`Operator` to :class:`MemoryEntry`s.
+    """
+
+    @property
+    def nbytes(self):
+        """The total amount of memory, in bytes."""
+        return sum(i.nbytes for i in self.values())
+
+    @property
+    def nbytes_unallocated(self):
+        """The amount of memory, in bytes, yet to be allocated."""
+        return sum(i.nbytes for i in self.values() if not i.allocated)
+
+    @property
+    def kinds(self):
+        """The amount of memory, in bytes, for each kind of object."""
+        ret = OrderedDict()
+        for i in self.values():
+            ret[i.kind] = ret.get(i.kind, 0) + i.nbytes
+        return ret
+
+    def __str__(self):
+        lines = ["%-16s %-8s %-24s %12s %s" % ('name', 'kind', 'shape', 'MB', '')]
+        for k, v in self.items():
+            lines.append("%-16s %-8s %-24s %12.2f %s" %
+                         (k, v.kind, v.shape, v.nbytes/10**6,
+                          '' if v.allocated else '(unallocated)'))
+        lines.append("%-16s %-8s %-24s %12.2f" % ('total', '', '', self.nbytes/10**6))
+        return '\n'.join(lines)
+
+
+def memory_report(operator, **kwargs):
+    """
+    Compute the memory required to run ``operator.apply(**kwargs)``, without
+    allocating anything.
+
+    :param operator: The :class:`Operator`.
+    :param kwargs: The runtime arguments, as they would be passed to ``apply``.
+    """
+    carriers = _data_carriers(operator, kwargs)
+    args = _arguments(operator, carriers, kwargs)
+    return _memory_report(operator, carriers, args)
+
+
+def _data_carriers(operator, kwargs):
+    """
+    Map the names of the :class:`TensorFunction`s accessed by ``operator`` to
+    the objects (either :class:`TensorFunction`s or numpy arrays) that would
+    be used at runtime.
+    """
+    functions = filter_sorted(operator.input + operator.output)
+    return OrderedDict([(f.name, kwargs.get(f.name, f)) for f in functions
+                        if f.is_Tensor and not f.is_Array])
+
+
+@contextmanager
+def _placeholders(functions):
+    """
+    Within this context, any unallocated :class:`TensorFunction` among
+    ``functions`` carries zero-strided (i.e., virtually free) data, so that the
+    runtime arguments can be derived without allocating any memory.
+    """
+    unallocated = [f for f in functions if getattr(f, '_data', True) is None]
+    try:
+        for f in unallocated:
+            f._data = np.lib.stride_tricks.as_strided(
+                np.zeros(1, dtype=f.storage_dtype), shape=f.shape_allocated,
+                strides=(0,)*len(f.shape_allocated))
+        yield
+    finally:
+        for f in unallocated:
+            f._data = None
+
+
+def _arguments(operator, carriers, kwargs):
+    kwargs = dict(kwargs)
+    kwargs.update(carriers)
+    kwargs['autotune'] = False
+    if operator._scratch is not None:
+        # No need to allocate the scratch arena
+        kwargs[operator._scratch.name] = None
+    with _placeholders(carriers.values()):
+        # Note: as all data-carriers are explicitly passed, the default
+        # arguments, which might be cached by `operator`, are not computed
+        return operator.arguments(**kwargs)
+
+
+def _nthreads():
+    if not configuration['openmp']:
+        return 1
+    return int(os.environ.get('OMP_NUM_THREADS', cpu_count()))
+
+
+def _memory_report(operator, carriers, args):
+    report = MemoryReport()
+
+    # The data-carriers
+    for name, f in carriers.items():
+        if isinstance(f, np.ndarray):
+            report[name] = MemoryEntry('function', f.shape, f.dtype, 1, True)
+        else:
+            save = f.is_TimeFunction and not f._time_buffering
+            report[name] = MemoryEntry('save' if save else 'function',
+                                       f.shape_allocated, f.storage_dtype, 1,
+                                       f._data is not None)
+
+    # The Arrays allocated by the Operator itself. The stack Arrays are
+    # thread-private, so there is one copy per thread
+    functions = FindSymbols('symbolics').visit(operator.body +
+                                               operator.elemental_functions)
+    for i in functions:
+        if i.is_Array and (i._mem_heap or i._mem_stack):
+            shape = tuple(int(s.subs({j: args[j.name] for j in s.free_symbols}))
+                          for s in i.symbolic_shape)
+            report[i.name] = MemoryEntry('heap' if i._mem_heap else 'stack', shape,
+                                         i.dtype, _nthreads() if i._mem_stack else 1,
+                                         False)
+
+    # The heap Arrays may be carved out of a scratch arena, reused across runs
+    if operator._scratch is not None:
+        chunks = [(report[i.name].shape[0],
+                   prod(report[i.name].shape[1:])*np.dtype(i.dtype).itemsize)
+                  for i in operator._scratch_arrays]
+        if operator._scratch_arena.size(chunks) <= operator._scratch_arena.nbytes:
+            for i in operator._scratch_arrays:
+                report[i.name] = report[i.name]._replace(allocated=True)
+
+    # The halo exchange buffers, one to send and one to receive. These are
+    # allocated for one Dimension at a time, so only the largest counts
+    for hs in FindNodes(HaloSpot).visit(operator.body):
+        for f in hs.fmapper:
+            if f.name not in report or '%s_halo' % f.name in report:
+                continue
+            shape = report[f.name].shape
+            sizes = [(max(h), prod(shape[:n] + shape[n+1:]))
+                     for n, h in enumerate(f._extent_halo) if f.dimensions[n].is_Space]
+            width, size = max(sizes, key=lambda i: i[0]*i[1])
+            report['%s_halo' % f.name] = MemoryEntry('mpi', (width, size),
+                                                     f.storage_dtype, 2, False)
+
+    return report
+
+
+class MemoryPlanner(object):
+
+    """
+    Pick the largest value of a memory-hungry parameter (number of saved
+    timesteps, number of checkpoints, block size) such that the memory
+    required to run an :class:`Operator` fits in a given budget.
+
+    :param operator: The :class:`Operator`.
+    :param budget: (Optional) The memory budget, in bytes. Defaults to the
+                   memory currently available on the system, plus the memory
+                   already allocated for the Operator.
+    :param kwargs: The runtime arguments, as they would be passed to ``apply``.
+    """
+
+    def __init__(self, operator, budget=None, **kwargs):
+        self.operator = operator
+        self.carriers = _data_carriers(operator, kwargs)
+        self.args = _arguments(operator, self.carriers, kwargs)
+        self.report = _memory_report(operator, self.carriers, self.args)
+        if budget is None:
+            budget = virtual_memory().available + \
+                (self.report.nbytes - self.report.nbytes_unallocated)
+        self.budget = budget
+
+    def _check(self, value, what):
+        if value < 1:
+            raise ValueError("Not enough memory for a single %s (budget: %d bytes, "
+                             "required by the Operator: %d bytes)"
+                             % (what, self.budget, self.report.nbytes))
+        return value
+
+    def max_save(self, function):
+        """
+        The largest number of timesteps ``function``, a :class:`TimeFunction`
+        accessed by the Operator, may save.
+        """
+        entry = self.report[function.name]
+        nbytes = entry.nbytes // entry.shape[0]
+        available = self.budget - (self.report.nbytes - entry.nbytes)
+        return self._check(available // nbytes, 'timestep of `%s`' % function.name)
+
+    def max_checkpoints(self, functions):
+        """
+        The largest number of checkpoints of ``functions``, each checkpoint
+        being a copy of their data (domain region only), that may be stored
+        alongside the Operator data.
+        """
+        nbytes = sum(f.size*np.dtype(f.dtype).itemsize for f in functions)
+        available = self.budget - self.report.nbytes
+        return self._check(available // nbytes, 'checkpoint')
+
+    def max_block_size(self, candidates=None):
+        """
+        The largest block size, among ``candidates`` and applied to all blocked
+        Dimensions, such that the blocked :class:`Array`s fit both in the budget
+        and in the stack (see ``at_stack_limit`` in the auto-tuner options).
+
+        :param candidates: (Optional) The block sizes to choose from. Defaults
+                           to those attempted by the auto-tuner.
+        :returns: The block size, or None if the Operator is not blocked.
+        """
+        from devito.core.autotuning import options
+
+        mapper = OrderedDict([(i.argument.symbolic_size.name, i)
+                              for i in self.operator._dle_args])
+        if not mapper:
+            return None
+
+        for bs in sorted(candidates or options['at_blocksize'], reverse=True):
+            # A block size cannot be larger than the blocked Dimension
+            if any(bs > i.iteration.extent(i.original_dim.symbolic_start.subs(self.args),
+                                           i.original_dim.symbolic_end.subs(self.args))
+                   for i in mapper.values()):
+                continue
+            args = dict(self.args)
+            args.update({i: bs for i in mapper})
+            report = _memory_report(self.operator, self.carriers, args)
+            stack = sum(v.nbytes // v.copies for v in report.values()
+                        if v.kind == 'stack')
+            if stack <= options['at_stack_limit'] and report.nbytes <= self.budget:
+                return bs
+        raise ValueError("No feasible block size among %s"
+                         % str(candidates or options['at_blocksize']))
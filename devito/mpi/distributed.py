@@ -6,7 +6,6 @@ from cached_property import cached_property
 from cgen import Struct, Value
 
 import numpy as np
-from mpi4py import MPI
 
 from devito.types import LEFT, RIGHT
 
@@ -24,6 +23,10 @@ class Distributor(object):
     """
 
     def __init__(self, shape, dimensions, input_comm=None):
+        # Importing `mpi4py.MPI` initializes MPI, which is expensive, so it
+        # is deferred until an actual domain decomposition is required
+        from mpi4py import MPI
+
         self._glb_shape = shape
         self._dimensions = dimensions
         self._input_comm = (input_comm or MPI.COMM_WORLD).Clone()
@@ -119,6 +122,7 @@ class Distributor(object):
             https://github.com/mpi4py/mpi4py/blob/master/demo/wrap-ctypes/helloworld.py
         """
         from devito.types import CompositeObject
+        from mpi4py import MPI
         ptype = c_int if MPI._sizeof(self._comm) == sizeof(c_int) else c_void_p
         obj = CompositeObject('comm', 'MPI_Comm', ptype, [])
         comm_ptr = MPI._addressof(self._comm)
@@ -4,25 +4,34 @@ from collections import OrderedDict
 
 from cached_property import cached_property
 import ctypes
+from ctypes import POINTER
 import numpy as np
 import sympy
 
+from devito.cgen_utils import split_translation_unit
 from devito.compiler import jit_compile, load, save
+from devito.data import ScratchArena
 from devito.dimension import Dimension
-from devito.dle import transform
+from devito.dle import PrefetchArg, UnrollArg, transform
 from devito.dse import rewrite
 from devito.exceptions import InvalidOperator
 from devito.logger import bar, info
+from devito.memory import memory_report
 from devito.ir.equations import LoweredEq
 from devito.ir.clusters import clusterize
 from devito.ir.iet import (Callable, List, MetaCall, iet_build, iet_insert_C_decls,
-                           ArrayCast, derive_parameters)
+                           ArrayCast, FindSymbols, derive_parameters)
 from devito.ir.stree import st_build
 from devito.parameters import configuration
 from devito.profiling import create_profile
-from devito.symbolics import indexify
-from devito.tools import (Signer, ReducerMap, as_tuple, flatten,
-                          filter_sorted, numpy_to_ctypes, split)
+from devito.symbolics import indexify, lambdify_by_name, retrieve_indexed
+from devito.tools import (Signer, ReducerMap, as_tuple, ctypes_pointer, flatten,
+                          filter_sorted, numpy_to_ctypes, prod, split)
+from devito.types import CacheManager, Object
+
+configuration.add('scratch-arena', 0, [0, 1], lambda i: bool(i))
+configuration.add('pgo', 0, [0, 1], lambda i: bool(i))
+configuration.add('autotuning-flags', 0, [0, 1], lambda i: bool(i))
 
 
 class Operator(Callable):
@@ -31,6 +40,12 @@ class Operator(Callable):
     _default_includes = ['stdlib.h', 'math.h', 'sys/time.h']
     _default_globals = []
 
+    # The body of an Operator is modified throughout its construction
+    _cacheable = False
+
+    # The OperatorBundle, if any, the Operator is JIT-compiled within
+    _bundle = None
+
     """A special :class:`Callable` to generate and compile C code evaluating
     an ordered sequence of stencil expressions.
 
@@ -53,6 +68,9 @@ class Operator(Callable):
         if any(not isinstance(i, sympy.Eq) for i in expressions):
             raise InvalidOperator("Only SymPy expressions are allowed.")
 
+        # Operator construction is a safe point to shrink the symbol cache
+        CacheManager.enforce_limits()
+
         self.name = kwargs.get("name", "Kernel")
         subs = kwargs.get("subs", {})
         dse = kwargs.get("dse", configuration['dse'])
@@ -86,8 +104,16 @@ class Operator(Callable):
         clusters = rewrite(clusters, mode=set_dse_mode(dse))
         self._dtype, self._dspace = clusters.meta
 
+        # The DSE may have introduced further inputs (e.g., tabulated Functions).
+        # The inputs it might have replaced are retained, as they are still
+        # legal arguments to `apply`
+        self.input = filter_sorted(self.input + [i.function for i in flatten(
+            retrieve_indexed(e) for c in clusters for e in c.exprs)
+            if i.function.is_Input])
+
         # Lower Clusters to a Schedule tree
         stree = st_build(clusters)
+        self._sweeps = stree.sweeps
 
         # Lower Schedule tree to an Iteration/Expression tree (IET)
         iet = iet_build(stree)
@@ -98,8 +124,10 @@ class Operator(Callable):
         # Translate into backend-specific representation
         iet = self._specialize_iet(iet, **kwargs)
 
-        # Insert the required symbol declarations
-        iet = iet_insert_C_decls(iet, self._func_table)
+        # Insert the required symbol declarations. Unless a scratch arena is
+        # used, the Arrays are allocated and freed on the heap at every run
+        self._scratch = self._build_scratch(iet)
+        iet = iet_insert_C_decls(iet, self._func_table, self._scratch)
 
         # Insert code for MPI support
         iet = self._generate_mpi(iet, **kwargs)
@@ -109,6 +137,8 @@ class Operator(Callable):
 
         # Derive parameters as symbols not defined in the kernel itself
         parameters = self._build_parameters(iet)
+        if self._scratch is not None:
+            parameters.append(self._scratch)
 
         # Finish instantiation
         super(Operator, self).__init__(self.name, iet, 'int', parameters, ())
@@ -118,31 +148,45 @@ class Operator(Callable):
         Process runtime arguments passed to ``.apply()` and derive
         default values for any remaining arguments.
         """
-        # Process data-carriers (first overrides, then fill up with whatever is needed)
-        args = ReducerMap()
-        args.update([p._arg_values(**kwargs) for p in self.input if p.name in kwargs])
-        args.update([p._arg_values() for p in self.input if p.name not in args])
-        args = args.reduce_all()
+        overrides = [p for p in self.input if p.name in kwargs]
+        if overrides or configuration['mpi']:
+            # Process data-carriers (first overrides, then fill up with whatever
+            # is needed)
+            args = ReducerMap()
+            args.update([p._arg_values(**kwargs) for p in overrides])
+            args.update([p._arg_values() for p in self.input if p.name not in args])
+            args = args.reduce_all()
+        else:
+            # Fast path: no data-carrier overrides, so the default values derived
+            # in a previous run can be recycled. Only the Constants need to be
+            # re-evaluated, as their value may have changed in the meantime
+            args = dict(self._default_arguments)
+            for p in self.input:
+                if p.is_Constant:
+                    args.update(p._arg_values())
 
         # Process dimensions (derived go after as they might need/affect their parents)
+        intervals = self._arg_intervals
         derived, main = split(self.dimensions, lambda i: i.is_Derived)
         for p in main:
-            args.update(p._arg_values(args, self._dspace[p], **kwargs))
+            args.update(p._arg_values(args, intervals[p], **kwargs))
         for p in derived:
-            args.update(p._arg_values(args, self._dspace[p], **kwargs))
+            args.update(p._arg_values(args, intervals[p], **kwargs))
 
         # Sanity check
         for p in self.input:
-            p._arg_check(args, self._dspace[p])
+            p._arg_check(args, intervals[p])
 
         # Derive additional values for DLE arguments
         # TODO: This is not pretty, but it works for now. Ideally, the
         # DLE arguments would be massaged into the IET so as to comply
         # with the rest of the argument derivation procedure.
-        for arg in self._dle_args:
+        for arg, osize in zip(self._dle_args, self._dle_osizes):
+            if isinstance(arg, (UnrollArg, PrefetchArg)):
+                args[arg.argument.name] = kwargs.get(arg.argument.name, arg.value)
+                continue
             dim = arg.argument
-            osize = (1 + arg.original_dim.symbolic_end
-                     - arg.original_dim.symbolic_start).subs(args)
+            osize = osize(args)
             if arg.value is None:
                 args[dim.symbolic_size.name] = osize
             elif isinstance(arg.value, int):
@@ -150,6 +194,17 @@ class Operator(Callable):
             else:
                 args[dim.symbolic_size.name] = arg.value(osize)
 
+        # Add in the scratch arena, grown if the Arrays do not fit in it
+        if self._scratch is not None:
+            if self._scratch.name in kwargs:
+                args[self._scratch.name] = kwargs.pop(self._scratch.name)
+            else:
+                shapes = [([int(j) for j in f(args)], itemsize)
+                          for f, itemsize in self._scratch_layout]
+                chunks = [(i[0], prod(i[1:])*itemsize) for i, itemsize in shapes]
+                address = self._scratch_arena.reserve(chunks)
+                args[self._scratch.name] = ctypes.cast(address, self._scratch.dtype)
+
         # Add in the profiler argument
         args[self.profiler.name] = self.profiler.timer.reset()
 
@@ -167,25 +222,103 @@ class Operator(Callable):
 
         return args
 
+    def memory_report(self, **kwargs):
+        """
+        Compute, without allocating anything, the memory required to run the
+        Operator with the given runtime arguments (see ``apply``). This
+        includes the data of the :class:`TensorFunction`s, whether or not
+        already allocated, the temporary :class:`Array`s allocated by the
+        Operator itself on the heap or on the stack (one copy per thread), and
+        the halo exchange buffers.
+
+        :returns: A :class:`MemoryReport`, mapping the name of each object
+                  to a :class:`MemoryEntry`.
+        """
+        return memory_report(self, **kwargs)
+
     @cached_property
     def known_arguments(self):
         """Return an iterable of arguments that can be passed to ``apply``
         when running the operator."""
         ret = set.union(*[set(i._arg_names) for i in self.input + self.dimensions])
+        ret.update(i.argument.name for i in self._dle_args
+                   if isinstance(i, (UnrollArg, PrefetchArg)))
         return tuple(sorted(ret))
 
     def arguments(self, **kwargs):
         args = self.prepare_arguments(**kwargs)
         # Check all arguments are present
-        for p in self.parameters:
-            if p.name not in args:
-                raise ValueError("No value found for parameter %s" % p.name)
+        for p in self._parameter_names:
+            if p not in args:
+                raise ValueError("No value found for parameter %s" % p)
         return args
 
+    @cached_property
+    def _parameter_names(self):
+        """The names of the Operator parameters, in the same order as they
+        are passed to the JIT-compiled function."""
+        return tuple(p.name for p in self.parameters)
+
+    @cached_property
+    def _arg_intervals(self):
+        """Map each data-carrier and dimension to the :class:`Interval`s used
+        to derive and check its runtime values."""
+        mapper = {p: self._dspace[p] for p in self.input + self.dimensions}
+        # Looking up an IntervalGroup is a linear search, so for tensors we
+        # rather resort to a plain mapper from indices to Intervals
+        for p in self.input:
+            if p.is_Tensor:
+                mapper[p] = {i: mapper[p][i] for i in p.indices}
+        return mapper
+
+    @cached_property
+    def _default_arguments(self):
+        """
+        The default runtime values of the data-carriers, as derived the first
+        time they were requested. Subsequent runs without data-carrier overrides
+        can start off this mapper rather than rebuilding it from scratch.
+        """
+        args = ReducerMap()
+        args.update([p._arg_values() for p in self.input])
+        return args.reduce_all()
+
+    @cached_property
+    def _dle_osizes(self):
+        """The sizes of the original iteration spaces of the DLE arguments
+        (e.g., the blocked dimensions), as functions of the runtime arguments."""
+        return [lambdify_by_name(1 + i.original_dim.symbolic_end
+                                 - i.original_dim.symbolic_start)
+                for i in self._dle_args]
+
+    @cached_property
+    def _scratch_layout(self):
+        """The shapes, as functions of the runtime arguments, and the item
+        sizes of the Arrays carved out of the scratch arena, in the same order
+        as they are laid out in the arena."""
+        return [(lambdify_by_name(sympy.Tuple(*i.symbolic_shape)),
+                 np.dtype(i.dtype).itemsize) for i in self._scratch_arrays]
+
+    # Runtime caches which must be rebuilt upon unpickling
+    _runtime_caches = ('_parameter_names', '_arg_intervals', '_default_arguments',
+                       '_dle_osizes', '_scratch_layout', 'ccode')
+
     @property
     def elemental_functions(self):
         return tuple(i.root for i in self._func_table.values())
 
+    @cached_property
+    def ccode(self):
+        """
+        The C code of the Operator. Generated at most once, as it is required
+        both to sign and to JIT-compile the Operator.
+        """
+        return super(Operator, self).ccode
+
+    def _signature_items(self):
+        # Unlike the other IET nodes, an Operator is updated throughout its
+        # construction, so its signature is derived from the final C code
+        return (str(self.ccode),)
+
     @cached_property
     def _soname(self):
         """
@@ -204,33 +337,45 @@ class Operator(Callable):
         :returns: The file name of the JIT-compiled function.
         """
         if self._lib is None:
-            jit_compile(self._soname, str(self.ccode), self._compiler)
+            if self._bundle is not None:
+                # Compiled, and loaded, along with the rest of the bundle
+                self._bundle._compile()
+            else:
+                jit_compile(self._soname, jit_code(self.ccode), self._compiler)
 
     @property
     def cfunction(self):
         """Returns the JIT-compiled C function as a ctypes.FuncPtr object."""
         if self._lib is None:
             self._compile()
+        if self._lib is None:
             self._lib = load(self._soname)
             self._lib.name = self._soname
 
         if self._cfunction is None:
-            self._cfunction = getattr(self._lib, self.name)
-            # Associate a C type to each argument for runtime type check
-            argtypes = []
-            for i in self.parameters:
-                if i.is_Object:
-                    argtypes.append(i.dtype)
-                elif i.is_Scalar:
-                    argtypes.append(numpy_to_ctypes(i.dtype))
-                elif i.is_Tensor:
-                    argtypes.append(np.ctypeslib.ndpointer(dtype=i.dtype, flags='C'))
-                else:
-                    argtypes.append(ctypes.c_void_p)
-            self._cfunction.argtypes = argtypes
+            self._cfunction = self._kernel(self._lib)
 
         return self._cfunction
 
+    def _kernel(self, lib):
+        """Retrieve the kernel function from the loaded shared object ``lib``,
+        as a ctypes.FuncPtr object."""
+        cfunction = getattr(lib, self.name)
+        # Associate a C type to each argument for runtime type check
+        argtypes = []
+        for i in self.parameters:
+            if i.is_Object:
+                argtypes.append(i.dtype)
+            elif i.is_Scalar:
+                argtypes.append(numpy_to_ctypes(i.dtype))
+            elif i.is_Tensor:
+                argtypes.append(np.ctypeslib.ndpointer(dtype=i.storage_dtype,
+                                                       flags='C'))
+            else:
+                argtypes.append(ctypes.c_void_p)
+        cfunction.argtypes = argtypes
+        return cfunction
+
     def _profile_sections(self, iet):
         """Introduce C-level profiling nodes within the Iteration/Expression tree."""
         return List(body=iet), None
@@ -240,6 +385,16 @@ class Operator(Callable):
         best block sizes when loop blocking is in use."""
         return args
 
+    def _autotune_flags(self, args):
+        """Use auto-tuning on this Operator to determine empirically the
+        best compiler flags. Return the kernel function to be run."""
+        return self.cfunction
+
+    def _profile_guided(self, args):
+        """Use profile-guided optimisation to JIT-compile this Operator for
+        the runtime arguments ``args``. Return the kernel function to be run."""
+        return self.cfunction
+
     def _specialize_exprs(self, expressions):
         """Transform ``expressions`` into a backend-specific representation."""
         return [LoweredEq(i) for i in expressions]
@@ -260,6 +415,7 @@ class Operator(Callable):
         self.dimensions.extend([i.argument for i in self._dle_args
                                 if isinstance(i.argument, Dimension)])
         self._includes.extend(list(dle_state.includes))
+        self._globals.extend(list(dle_state.globals))
 
         return dle_state.nodes
 
@@ -269,6 +425,22 @@ class Operator(Callable):
         :class:`TensorFunction`s."""
         return iet
 
+    def _build_scratch(self, iet):
+        """If requested through ``configuration['scratch-arena']``, create the
+        :class:`Object` through which the temporary :class:`Array`s, rather
+        than being allocated on the heap at every run, are carved out of a
+        :class:`ScratchArena` reused across runs."""
+        if not configuration['scratch-arena']:
+            return None
+        roots = (iet,) + tuple(i.root for i in self._func_table.values() if i.local)
+        self._scratch_arrays = sorted([i for i in FindSymbols().visit(roots)
+                                       if i.is_Array and i._mem_heap],
+                                      key=lambda i: i.name)
+        if not self._scratch_arrays:
+            return None
+        self._scratch_arena = ScratchArena()
+        return Object(name='scratch', dtype=POINTER(ctypes_pointer('char')))
+
     def _build_parameters(self, iet):
         """Determine the Operator parameters based on the Iteration/Expression
         tree ``iet``."""
@@ -281,8 +453,9 @@ class Operator(Callable):
         return List(body=casts + [iet])
 
     def __getstate__(self):
+        state = {k: v for k, v in self.__dict__.items()
+                 if k not in self._runtime_caches + ('_bundle',)}
         if self._lib:
-            state = dict(self.__dict__)
             # The compiled shared-object will be pickled; upon unpickling, it
             # will be restored into a potentially different temporary directory,
             # so the entire process during which the shared-object is loaded and
@@ -291,15 +464,14 @@ class Operator(Callable):
             state['_cfunction'] = None
             with open(self._lib._name, 'rb') as f:
                 state['binary'] = f.read()
-            return state
-        else:
-            return self.__dict__
+        return state
 
     def __setstate__(self, state):
-        binary = state.pop('binary')
+        binary = state.pop('binary', None)
         for k, v in state.items():
             setattr(self, k, v)
-        save(self._soname, binary, self._compiler)
+        if binary is not None:
+            save(self._soname, binary, self._compiler)
 
 
 class OperatorRunnable(Operator):
@@ -378,21 +550,57 @@ class OperatorRunnable(Operator):
             >>> u3 = TimeFunction(name='u', grid=grid)
             >>> op = Operator(Eq(u3.forward, u3 + 1))
             >>> op.apply(time_M=10)
+
+        When an operator is run many times, for example over short time windows,
+        the performance summaries of the individual runs may be aggregated into
+        a single :class:`PerformanceSummary`, passed as ``summary``. In this case,
+        nothing is logged at each run.
+
+        >>> from devito.profiling import PerformanceSummary
+        >>> summary = PerformanceSummary()
+        >>> for i in range(0, 10, 2):
+        ...     op.apply(time_m=i, time_M=i+1, summary=summary)
+
+        Passing ``pgo=True`` (defaults to ``configuration['pgo']``) makes the
+        operator run a kernel function JIT-compiled through profile-guided
+        optimisation (PGO) for the shapes of the runtime arguments. The first
+        such run trains an instrumented build over a few timesteps.
+
+        Likewise, passing ``autotune_flags=True`` (defaults to
+        ``configuration['autotuning-flags']``) makes the operator run a kernel
+        function JIT-compiled with the best compiler flags found by timing a
+        few variants over a few timesteps. PGO takes precedence, if requested.
         """
+        summary = kwargs.pop('summary', None)
+        pgo = kwargs.pop('pgo', configuration['pgo'])
+        autotune_flags = kwargs.pop('autotune_flags', configuration['autotuning-flags'])
+
         # Build the arguments list to invoke the kernel function
         args = self.arguments(**kwargs)
 
         # Invoke kernel function with args
-        arg_values = [args[p.name] for p in self.parameters]
-        self.cfunction(*arg_values)
+        if pgo:
+            cfunction = self._profile_guided(args)
+        elif autotune_flags:
+            cfunction = self._autotune_flags(args)
+        else:
+            cfunction = self.cfunction
+        arg_values = [args[p] for p in self._parameter_names]
+        cfunction(*arg_values)
 
         # Output summary of performance achieved
-        return self._profile_output(args)
+        if summary is None:
+            return self._profile_output(args)
+        else:
+            return summary.accumulate(self.profiler.summary(args))
 
     def _profile_output(self, args):
         """Return a performance summary of the profiled sections."""
-        summary = self.profiler.summary(args, self._dtype)
+        summary = self.profiler.summary(args)
         with bar():
+            if summary.sweeps and summary.sweeps.fused != summary.sweeps.unfused:
+                info("Sweeps over the grid per timestep: %d (%d without fusion)" %
+                     (summary.sweeps.fused, summary.sweeps.unfused))
             for k, v in summary.items():
                 itershapes = [",".join(str(i) for i in its) for its in v.itershapes]
                 if len(itershapes) > 1:
@@ -407,6 +615,7 @@ class OperatorRunnable(Operator):
     def _profile_sections(self, iet):
         """Instrument the Iteration/Expression tree for C-level profiling."""
         profiler = create_profile('timers')
+        profiler.sweeps = self._sweeps
         iet = profiler.instrument(iet)
         self._globals.append(profiler.cdef)
         self._includes.extend(profiler._default_includes)
@@ -417,6 +626,19 @@ class OperatorRunnable(Operator):
 # Misc helpers
 
 
+def jit_code(ccode):
+    """
+    The C code to be JIT-compiled, that is ``ccode`` itself or, if requested
+    through ``configuration['jit-split']``, a list of compilation units, one
+    per function defined in ``ccode``.
+    """
+    if configuration['jit-split']:
+        units = split_translation_unit(ccode)
+        if len(units) > 1:
+            return [str(i) for i in units]
+    return str(ccode)
+
+
 def set_dse_mode(mode):
     """
     Transform :class:`Operator` input in a format understandable by the DLE.
@@ -94,8 +94,16 @@ class Parameters(OrderedDict, Signer):
         return self._name
 
     def _signature_items(self):
+        # `autopadding` is excluded as any padding is already part of the
+        # generated code, through the ArrayCasts; likewise, `loop-shifting`,
+        # `scratch-arena` and `fusion` only affect the generated code, while
+        # `jit-split`, `pgo` and `autotuning-flags` only affect how the generated
+        # code is compiled
         items = sorted(it for it in self.items()
-                       if it[0] not in ['log_level', 'first_touch'])
+                       if it[0] not in ['log_level', 'first_touch', 'cache_limits',
+                                        'autopadding', 'loop-shifting',
+                                        'scratch-arena', 'fusion', 'jit-split',
+                                        'pgo', 'autotuning-flags'])
         return tuple(str(items)) + tuple(str(sorted(self.backend.items())))
 
 
@@ -114,7 +122,15 @@ env_vars_mapper = {
     'DEVITO_AUTOTUNING': 'autotuning',
     'DEVITO_LOGGING': 'log_level',
     'DEVITO_FIRST_TOUCH': 'first_touch',
+    'DEVITO_AUTOPADDING': 'autopadding',
+    'DEVITO_LOOP_SHIFTING': 'loop-shifting',
+    'DEVITO_SCRATCH_ARENA': 'scratch-arena',
+    'DEVITO_FUSION': 'fusion',
+    'DEVITO_CACHE_LIMITS': 'cache_limits',
     'DEVITO_DEBUG_COMPILER': 'debug_compiler',
+    'DEVITO_JIT_SPLIT': 'jit-split',
+    'DEVITO_PGO': 'pgo',
+    'DEVITO_AUTOTUNING_FLAGS': 'autotuning-flags',
 }
 
 
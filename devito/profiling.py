@@ -9,13 +9,14 @@ import os
 
 from cgen import Struct, Value
 from cached_property import cached_property
+import numpy as np
 
 from devito.ir.iet import (Call, ExpressionBundle, List, TimedList, Section,
                            FindNodes, Transformer)
 from devito.ir.support import IntervalGroup
 from devito.logger import warning
 from devito.parameters import configuration
-from devito.symbolics import estimate_cost
+from devito.symbolics import estimate_cost, lambdify_by_name
 from devito.tools import flatten
 from devito.types import CompositeObject
 
@@ -32,6 +33,9 @@ class Profiler(object):
         self.name = name
         self._sections = OrderedDict()
 
+        # The number of sweeps over the grid per timestep (see `st_sweeps`)
+        self.sweeps = None
+
         self.initialized = True
 
     def instrument(self, iet):
@@ -50,13 +54,15 @@ class Profiler(object):
             # Operation count at each section iteration
             sops = sum(estimate_cost(i.expr) for i in flatten(b.exprs for b in bundles))
 
-            # Total memory traffic
+            # Total memory traffic, in bytes
             mapper = {}
             for i in bundles:
                 for k, v in i.traffic.items():
                     mapper.setdefault(k, []).append(v)
-            traffic = [IntervalGroup.generate('merge', *i) for i in mapper.values()]
-            traffic = sum(i.extent for i in traffic)
+            traffic = [IntervalGroup.generate('merge', *v).extent *
+                       np.dtype(f.storage_dtype).itemsize
+                       for (f, _), v in mapper.items()]
+            traffic = sum(traffic)
 
             # Each ExpressionBundle lives in its own iteration space
             itershapes = [i.shape for i in bundles]
@@ -77,32 +83,31 @@ class Profiler(object):
 
         return iet
 
-    def summary(self, arguments, dtype):
+    def summary(self, arguments):
         """
         Return a :class:`PerformanceSummary` of the profiled sections.
 
         :param arguments: A mapper from argument names to run-time values from which
                           the Profiler infers iteration space and execution times
                           of a run.
-        :param dtype: The data type of the objects in the profiled sections. Used
-                      to compute the operational intensity.
         """
         summary = PerformanceSummary()
-        for section, data in self._sections.items():
+        summary.sweeps = self.sweeps
+        for section, data in self._evaluators.items():
             # Time to run the section
             time = max(getattr(arguments[self.name]._obj, section.name), 10e-7)
 
             # Number of FLOPs performed
-            ops = data.ops.subs(arguments)
+            ops = data.ops(arguments)
 
             # Number of grid points computed
-            points = data.points.subs(arguments)
+            points = data.points(arguments)
 
             # Compulsory traffic
-            traffic = float(data.traffic.subs(arguments)*dtype().itemsize)
+            traffic = float(data.traffic(arguments))
 
             # Runtime itershapes
-            itershapes = [tuple(i.subs(arguments) for i in j) for j in data.itershapes]
+            itershapes = [tuple(i(arguments) for i in j) for j in data.itershapes]
 
             # Do not show unexecuted Sections (i.e., because the loop trip count was 0)
             if ops == 0 or traffic == 0:
@@ -121,6 +126,28 @@ class Profiler(object):
 
         return summary
 
+    @cached_property
+    def _evaluators(self):
+        """
+        The metadata of the profiled sections, with all symbolic quantities
+        compiled into plain Python functions of the runtime arguments. This
+        makes :meth:`summary` much cheaper than evaluating the metadata
+        through SymPy at every run.
+        """
+        mapper = OrderedDict()
+        for section, data in self._sections.items():
+            itershapes = [[lambdify_by_name(i) for i in j] for j in data.itershapes]
+            mapper[section] = SectionData(lambdify_by_name(data.ops), data.sops,
+                                          lambdify_by_name(data.points),
+                                          lambdify_by_name(data.traffic), itershapes)
+        return mapper
+
+    def __getstate__(self):
+        # The compiled evaluators can't be pickled; they are rebuilt on demand
+        state = dict(self.__dict__)
+        state.pop('_evaluators', None)
+        return state
+
     @cached_property
     def timer(self):
         return Timer(self.name, [i.name for i in self._sections])
@@ -193,11 +220,37 @@ class PerformanceSummary(OrderedDict):
 
     """
     A special dictionary to track and quickly access performance data.
+    The number of sweeps over the grid per timestep, before and after loop
+    fusion, is available as ``sweeps``.
     """
 
+    sweeps = None
+
     def add(self, key, time, gflopss, gpointss, oi, ops, itershapes):
         self[key] = PerfEntry(time, gflopss, gpointss, oi, ops, itershapes)
 
+    def accumulate(self, other):
+        """
+        Aggregate the entries of the :class:`PerformanceSummary` ``other``
+        into ``self``. Timings add up, while the derived metrics are recomputed
+        over the cumulative amount of work. Useful to obtain a single summary
+        out of many runs of the same :class:`Operator`.
+        """
+        self.sweeps = other.sweeps
+        for k, v in other.items():
+            if k not in self:
+                self[k] = v
+                continue
+            mine = self[k]
+            time = mine.time + v.time
+            gflops = mine.gflopss*mine.time + v.gflopss*v.time
+            gpoints = mine.gpointss*mine.time + v.gpointss*v.time
+            traffic = sum(i.gflopss*i.time/i.oi for i in [mine, v] if i.oi)
+            # Note: very short runs may be timed as zero seconds
+            self.add(k, time, gflops/time if time else 0., gpoints/time if time else 0.,
+                     gflops/traffic if traffic else v.oi, v.ops, v.itershapes)
+        return self
+
     @property
     def gflopss(self):
         return OrderedDict([(k, v.gflopss) for k, v in self.items()])
@@ -10,7 +10,8 @@ from devito.tools import as_tuple, flatten
 from devito.types import Symbol as dSymbol
 
 __all__ = ['freeze_expression', 'xreplace_constrained', 'xreplace_indices',
-           'pow_to_mul', 'as_symbol', 'indexify', 'convert_to_SSA', 'split_affine']
+           'pow_to_mul', 'as_symbol', 'indexify', 'convert_to_SSA', 'split_affine',
+           'lambdify_by_name']
 
 
 def freeze_expression(expr):
@@ -207,6 +208,26 @@ def split_affine(expr):
     return AffineFunction(LM(poly), LC(poly), poly.TC())
 
 
+def lambdify_by_name(expr):
+    """
+    Compile a SymPy expression into a plain Python function. The returned
+    function takes a single argument, a mapper from symbol names to numeric
+    values, and evaluates ``expr`` without any SymPy machinery.
+
+    This is useful when the same symbolic expression must be evaluated many
+    times with different runtime values, where ``expr.subs(...)`` would be
+    far too expensive.
+    """
+    expr = sympy.sympify(expr)
+    symbols = sorted(expr.free_symbols, key=lambda i: i.name)
+    names = tuple(i.name for i in symbols)
+    func = sympy.lambdify(symbols, expr, ['math', 'sympy'])
+
+    def evaluate(values):
+        return func(*[values[i] for i in names])
+    return evaluate
+
+
 def indexify(expr):
     """
     Given a SymPy expression, return a new SymPy expression in which all
@@ -1,4 +1,4 @@
-from collections import Hashable
+from collections import Hashable, OrderedDict
 from functools import partial
 
 __all__ = ['memoized_func', 'memoized_meth']
@@ -12,26 +12,31 @@ class memoized_func(object):
     but it will cache at the class level; to cache at the instance level,
     use ``memoized_meth``.
 
+    By default, the cache grows unbounded. Use ``@memoized_func(maxsize=N)``
+    to only retain the ``N`` most recently used return values.
+
     Adapted from: ::
 
         https://wiki.python.org/moin/PythonDecoratorLibrary#Memoize
     """
 
-    def __init__(self, func):
+    def __new__(cls, func=None, maxsize=None):
+        if func is None:
+            # Used as `@memoized_func(maxsize=...)`
+            return partial(cls, maxsize=maxsize)
+        return super(memoized_func, cls).__new__(cls)
+
+    def __init__(self, func, maxsize=None):
         self.func = func
-        self.cache = {}
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
 
     def __call__(self, *args):
         if not isinstance(args, Hashable):
             # Uncacheable, a list, for instance.
             # Better to not cache than blow up.
             return self.func(*args)
-        if args in self.cache:
-            return self.cache[args]
-        else:
-            value = self.func(*args)
-            self.cache[args] = value
-            return value
+        return _lookup(self.cache, args, self.maxsize, lambda: self.func(*args))
 
     def __repr__(self):
         """Return the function's docstring."""
@@ -41,6 +46,10 @@ class memoized_func(object):
         """Support instance methods."""
         return partial(self.__call__, obj)
 
+    def cache_clear(self):
+        """Drop all cached return values."""
+        self.cache.clear()
+
 
 class memoized_meth(object):
     """
@@ -60,13 +69,24 @@ class memoized_meth(object):
         Obj.add_to(1) # not enough arguments
         Obj.add_to(1, 2) # returns 3, result is not cached
 
+    As with ``memoized_func``, ``@memoized_meth(maxsize=N)`` bounds the number
+    of return values retained, for each instance, to the ``N`` most recently
+    used ones.
+
     Adapted from: ::
 
         code.activestate.com/recipes/577452-a-memoize-decorator-for-instance-methods/
     """
 
-    def __init__(self, func):
+    def __new__(cls, func=None, maxsize=None):
+        if func is None:
+            # Used as `@memoized_meth(maxsize=...)`
+            return partial(cls, maxsize=maxsize)
+        return super(memoized_meth, cls).__new__(cls)
+
+    def __init__(self, func, maxsize=None):
         self.func = func
+        self.maxsize = maxsize
 
     def __get__(self, obj, objtype=None):
         if obj is None:
@@ -83,9 +103,22 @@ class memoized_meth(object):
             cache = obj.__cache
         except AttributeError:
             cache = obj.__cache = {}
-        key = (self.func, args[1:], frozenset(kw.items()))
-        try:
-            res = cache[key]
-        except KeyError:
-            res = cache[key] = self.func(*args, **kw)
-        return res
+        cache = cache.setdefault(self.func, OrderedDict())
+        key = (args[1:], frozenset(kw.items()))
+        return _lookup(cache, key, self.maxsize, lambda: self.func(*args, **kw))
+
+
+def _lookup(cache, key, maxsize, compute):
+    """
+    Return ``cache[key]``; upon a miss, ``compute()`` the value and store it.
+    If ``maxsize`` is given, ``cache`` is treated as a LRU cache, that is the
+    least recently used entry is evicted when ``cache`` outgrows ``maxsize``.
+    """
+    try:
+        value = cache.pop(key) if maxsize else cache[key]
+    except KeyError:
+        value = compute()
+    cache[key] = value
+    if maxsize and len(cache) > maxsize:
+        cache.popitem(last=False)
+    return value
@@ -1,8 +1,11 @@
+from functools import wraps
+import json
 import os
+import platform
 from pathlib import Path
-from tempfile import gettempdir
+from tempfile import NamedTemporaryFile, gettempdir
 
-__all__ = ['change_directory', 'make_tempdir']
+__all__ = ['change_directory', 'make_tempdir', 'cpu_model', 'host_cached']
 
 
 class change_directory(object):
@@ -34,3 +37,54 @@ def make_tempdir(prefix=None):
     tmpdir = Path(gettempdir()).joinpath(name)
     tmpdir.mkdir(parents=True, exist_ok=True)
     return tmpdir
+
+
+def cpu_model():
+    """Return a string identifying the host CPU model."""
+    try:
+        with open('/proc/cpuinfo') as f:
+            return next(i for i in f if i.startswith('model name')).split(':')[1].strip()
+    except (IOError, StopIteration):
+        return platform.machine()
+
+
+def host_cached(key):
+    """
+    Decorator. Cache a function's return value on disk, within a deterministic
+    temporary directory, so that it is computed once per host rather than once
+    per process. The return value must be JSON-serializable, and is returned
+    as read back from JSON (e.g., a tuple is returned as a list).
+
+    :param key: A callable, taking the same arguments as the decorated function,
+                returning a string identifying the state of the host the return
+                value depends on (e.g., the CPU model). The cached value is
+                recomputed whenever the key changes.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args):
+            entry = json.dumps([func.__name__, args, key(*args)])
+            cachefile = make_tempdir('hostcache').joinpath('%s.json' % func.__module__)
+            try:
+                with open(str(cachefile)) as f:
+                    cache = json.load(f)
+            except (IOError, ValueError):
+                cache = {}
+            try:
+                return cache[entry]
+            except KeyError:
+                pass
+            # Round trip, so that the same value is returned with or without cache
+            cache[entry] = value = json.loads(json.dumps(func(*args)))
+            try:
+                # Write then rename, as concurrent processes may be reading
+                with NamedTemporaryFile('w', dir=str(cachefile.parent),
+                                        delete=False) as f:
+                    json.dump(cache, f)
+                os.replace(f.name, str(cachefile))
+            except OSError:
+                # E.g., a read-only file system; the value will be recomputed
+                pass
+            return value
+        return wrapper
+    return decorator
@@ -153,7 +153,10 @@ def numpy_to_ctypes(dtype):
     return {np.int32: ctypes.c_int,
             np.float32: ctypes.c_float,
             np.int64: ctypes.c_int64,
-            np.float64: ctypes.c_double}[dtype]
+            np.float64: ctypes.c_double,
+            # There is no half-precision ctype; an integer type of the same
+            # size suffices to allocate and move around the raw data
+            np.float16: ctypes.c_uint16}[dtype]
 
 
 def numpy_to_mpitypes(dtype):
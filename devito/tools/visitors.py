@@ -30,12 +30,26 @@ class GenericVisitor(object):
     """
 
     def __init__(self):
+        self._handlers = self._dispatch_table()
+
+    @classmethod
+    def _dispatch_table(cls):
+        """
+        Map type names to the names of the ``visit_Foo`` handlers of ``cls``.
+        The table is built once per visitor class, upon the first instantiation,
+        and it is then shared by all instances; it grows lazily as the MRO of
+        new visitee types is walked in :meth:`lookup_method`.
+        """
+        try:
+            return cls.__dict__['_dispatch']
+        except KeyError:
+            pass
         handlers = {}
         # visit methods are spelt visit_Foo.
         prefix = "visit_"
-        # Inspect the methods on this instance to find out which
+        # Inspect the methods on this class to find out which
         # handlers are defined.
-        for (name, meth) in inspect.getmembers(self, predicate=inspect.ismethod):
+        for (name, meth) in inspect.getmembers(cls, predicate=callable):
             if not name.startswith(prefix):
                 continue
             # Check the argument specification
@@ -45,8 +59,9 @@ class GenericVisitor(object):
             if len(argspec.args) < 2:
                 raise RuntimeError("Visit method signature must be "
                                    "visit_Foo(self, o, [*args, **kwargs])")
-            handlers[name[len(prefix):]] = meth
-        self._handlers = handlers
+            handlers[name[len(prefix):]] = name
+        cls._dispatch = handlers
+        return handlers
 
     """
     :attr:`default_args`. A dict of default keyword arguments for the visitor.
@@ -79,7 +94,7 @@ class GenericVisitor(object):
         cls = instance.__class__
         try:
             # Do we have a method handler defined for this type name
-            return self._handlers[cls.__name__]
+            return getattr(self, self._handlers[cls.__name__])
         except KeyError:
             # No, walk the MRO.
             for klass in cls.mro()[1:]:
@@ -87,7 +102,7 @@ class GenericVisitor(object):
                 if entry:
                     # Save it on this type name for faster lookup next time
                     self._handlers[cls.__name__] = entry
-                    return entry
+                    return getattr(self, entry)
         raise RuntimeError("No handler found for class %s", cls.__name__)
 
     def visit(self, o, *args, **kwargs):
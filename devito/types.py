@@ -4,18 +4,20 @@ import abc
 import gc
 from collections import namedtuple
 from operator import mul
-from functools import reduce
+from functools import partial, reduce
 from ctypes import POINTER, byref
 
 import numpy as np
 import sympy
 
+from devito.logger import debug
 from devito.parameters import configuration
 from devito.tools import ArgProvider, EnrichedTuple, Pickable, Tag, ctypes_to_C
 
 __all__ = ['Symbol', 'Indexed']
 
 configuration.add('first_touch', 0, [0, 1], lambda i: bool(i))
+configuration.add('cache_limits', {'entries': 0, 'bytes': 0})
 
 # This cache stores a reference to each created data object
 # so that we may re-create equivalent symbols during symbolic
@@ -105,11 +107,12 @@ class Cached(object):
 
     @classmethod
     def _cache_put(cls, obj):
-        """Store given object instance in symbol cache.
+        """Store given object instance in symbol cache. The entry is dropped
+        as soon as the object gets garbage collected.
 
         :param obj: Object to be cached.
         """
-        _SymbolCache[cls] = weakref.ref(obj)
+        _SymbolCache[cls] = weakref.ref(obj, partial(_cache_drop, cls))
 
     @classmethod
     def _symbol_type(cls, name):
@@ -426,6 +429,13 @@ class AbstractCachedFunction(AbstractFunction, Cached):
         """Extract a :class:`IndexedData` object from the current object."""
         return IndexedData(self.name, shape=self.shape, function=self.function)
 
+    @property
+    def storage_dtype(self):
+        """The data type of the function data in memory. Unless overridden by
+        subclasses, this is the same as ``self.dtype``, the data type in which
+        arithmetic on the function data is carried out."""
+        return self.dtype
+
     @property
     def _mem_external(self):
         """Return True if the associated data was/is/will be allocated directly
@@ -844,20 +854,81 @@ class Indexed(sympy.Indexed):
 # Utilities
 
 
+def _cache_drop(key, ref):
+    """Weakref callback dropping a dead entry from the symbol cache."""
+    # Note: at interpreter shutdown, the module globals may already be gone
+    if _SymbolCache is not None and _SymbolCache.get(key) is ref:
+        del _SymbolCache[key]
+
+
 class CacheManager(object):
 
     """
     Drop unreferenced objects from the SymPy and Devito caches. The associated
     data is lost (and thus memory is freed).
+
+    The Devito symbol cache drops its entries as soon as the corresponding
+    objects are garbage collected. However, objects may be kept alive by the
+    SymPy cache well beyond their last use. To bound the growth of the caches
+    in long-running applications, ``configuration['cache_limits']`` may be
+    used to set: ::
+
+        * entries: the maximum number of new symbol cache entries;
+        * bytes: the maximum amount of new :class:`Data` memory reachable
+                 through the symbol cache.
+
+    When any of these limits is exceeded, the caches are cleared. The limits
+    are relative to the state left behind by the last clean-up, so that the
+    objects still in use do not trigger a clean-up over and over again. A
+    value of 0 means no limit, which is the default.
     """
 
+    # The symbol cache state after the last clean-up
+    _baseline = {'entries': 0, 'bytes': 0}
+
     @classmethod
     def clear(cls):
         sympy.cache.clear_cache()
         gc.collect()
         for key, val in list(_SymbolCache.items()):
             if val() is None:
-                del _SymbolCache[key]
+                _SymbolCache.pop(key, None)
+        cls._baseline = {'entries': len(_SymbolCache), 'bytes': cls.nbytes()}
+
+    @classmethod
+    def memory_usage(cls):
+        """
+        Return a list of ``(name, nbytes)`` with the amount of :class:`Data`
+        memory reachable through each live entry of the symbol cache, largest
+        first. Entries carrying no data (e.g., Dimensions, Scalars) or whose
+        data hasn't been allocated yet are not reported.
+        """
+        ret = []
+        for val in list(_SymbolCache.values()):
+            obj = val()
+            nbytes = getattr(getattr(obj, '_data', None), 'nbytes', 0)
+            if nbytes:
+                ret.append((obj.name, nbytes))
+        return sorted(ret, key=lambda i: i[1], reverse=True)
+
+    @classmethod
+    def nbytes(cls):
+        """The overall amount of :class:`Data` memory reachable through the
+        symbol cache."""
+        return sum(i for _, i in cls.memory_usage())
+
+    @classmethod
+    def enforce_limits(cls):
+        """Clear the caches if any of ``configuration['cache_limits']`` is
+        exceeded."""
+        limits = configuration['cache_limits']
+        usage = {'entries': lambda: len(_SymbolCache), 'bytes': cls.nbytes}
+        for k, v in usage.items():
+            if limits.get(k) and v() > cls._baseline[k] + limits[k]:
+                debug("Symbol cache limit `%s=%d` exceeded, clearing caches"
+                      % (k, limits[k]))
+                cls.clear()
+                return
 
 
 class DataRegion(Tag):
@@ -1,6 +1,7 @@
 from sympy import solve, Symbol
 
-from devito import Eq, Operator, Function, TimeFunction, Inc
+from devito import Eq, Operator, Function, TimeFunction, Inc, DefaultDimension
+from devito.dle.backends.utils import get_simd_items
 from examples.seismic import PointSource, Receiver
 
 
@@ -51,8 +52,61 @@ def iso_stencil(field, m, s, damp, kernel, **kwargs):
     return [Eq(next, eq_time.subs({H: lap}))]
 
 
+def shot_layout(nshots, dtype):
+    """
+    Choose where to place the shot dimension of a batched wavefield. If the
+    number of shots fills an integral number of SIMD registers, the shots
+    are laid out innermost, so that the vectorized loop runs over independent
+    shots (unit stride, no unaligned stencil accesses). Otherwise, they are
+    laid out outermost, where the shot loop is trivially parallel.
+
+    :param nshots: Number of shots in the batch
+    :param dtype: Data type of the wavefield
+    :return: Either 'inner' or 'outer'
+    """
+    try:
+        simd_items = get_simd_items(dtype)
+    except KeyError:
+        # Unknown SIMD architecture
+        return 'outer'
+    return 'inner' if nshots % simd_items == 0 else 'outer'
+
+
+def BatchedTimeFunction(name, grid, shot_dim, layout='outer', save=None,
+                        time_order=2, space_order=4):
+    """
+    Create a :class:`TimeFunction` carrying one wavefield per shot, that is
+    with an additional shot dimension preceding ('outer') or following
+    ('inner') the space dimensions.
+
+    :param name: Name of the symbol
+    :param grid: :class:`Grid` object defining the computational domain
+    :param shot_dim: :class:`DefaultDimension` over the shots
+    :param layout: Position of the shot dimension, 'outer' or 'inner'
+    :param save: (Optional) Number of timesteps to be saved
+    :param time_order: Time discretization order
+    :param space_order: Space discretization order
+    """
+    nshots = (int(shot_dim.symbolic_size),)
+    if layout == 'outer':
+        dimensions = (shot_dim,) + grid.dimensions
+        shape = nshots + grid.shape_domain
+    elif layout == 'inner':
+        dimensions = grid.dimensions + (shot_dim,)
+        shape = grid.shape_domain + nshots
+    else:
+        raise ValueError("Unrecognized shot layout `%s`" % layout)
+    # A `save`d wavefield is indexed by `time`, a buffered one by the
+    # modulo-stepping dimension `t`
+    shape = ((save or time_order + 1),) + shape
+    time_dim = grid.time_dim if save else grid.stepping_dim
+    return TimeFunction(name=name, dimensions=dimensions, shape=shape,
+                        time_dim=time_dim, dtype=grid.dtype,
+                        time_order=time_order, space_order=space_order)
+
+
 def ForwardOperator(model, source, receiver, space_order=4,
-                    save=False, kernel='OT2', **kwargs):
+                    save=False, kernel='OT2', nshots=None, layout=None, **kwargs):
     """
     Constructor method for the forward modelling operator in an acoustic media
 
@@ -61,17 +115,31 @@ def ForwardOperator(model, source, receiver, space_order=4,
     :param receiver: :class:`PointData` object containing the acquisition geometry
     :param space_order: Space discretization order
     :param save: Saving flag, True saves all time steps, False only the three
+    :param nshots: (Optional) Number of independent shots propagated at once.
+                   The shots share ``m`` and ``damp``, while the wavefield,
+                   the sources and the receivers gain a shot dimension
+    :param layout: (Optional) Position of the shot dimension in the wavefield,
+                   'outer' or 'inner'. Defaults to ``shot_layout(nshots, dtype)``
     """
     m, damp = model.m, model.damp
 
     # Create symbols for forward wavefield, source and receivers
-    u = TimeFunction(name='u', grid=model.grid,
-                     save=source.nt if save else None,
-                     time_order=2, space_order=space_order)
+    if nshots is None:
+        u = TimeFunction(name='u', grid=model.grid,
+                         save=source.nt if save else None,
+                         time_order=2, space_order=space_order)
+        shot_dim = None
+    else:
+        shot_dim = DefaultDimension(name='shot', default_value=nshots)
+        layout = layout or shot_layout(nshots, model.dtype)
+        u = BatchedTimeFunction(name='u', grid=model.grid, shot_dim=shot_dim,
+                                layout=layout, save=source.nt if save else None,
+                                time_order=2, space_order=space_order)
     src = PointSource(name='src', grid=model.grid, time_range=source.time_range,
-                      npoint=source.npoint)
+                      npoint=source.npoint, shot_dim=shot_dim)
     rec = Receiver(name='rec', grid=model.grid, time_range=receiver.time_range,
-                   npoint=receiver.npoint)
+                   npoint=receiver.npoint, shot_dim=shot_dim,
+                   buffer_size=receiver.buffer_size)
 
     s = model.grid.stepping_dim.spacing
     eqn = iso_stencil(u, m, s, damp, kernel)
@@ -1,7 +1,15 @@
-from devito import Function, TimeFunction, memoized_meth
-from examples.seismic import PointSource, Receiver
+from multiprocessing import get_context
+
+import numpy as np
+from mpi4py import MPI
+
+from devito import (Function, TimeFunction, DefaultDimension, OperatorBundle,
+                    memoized_meth)
+from devito.tools import numpy_to_ctypes
+from examples.seismic import PointSource, Receiver, TraceWriter
 from examples.seismic.acoustic.operators import (
-    ForwardOperator, AdjointOperator, GradientOperator, BornOperator
+    ForwardOperator, AdjointOperator, GradientOperator, BornOperator,
+    BatchedTimeFunction, shot_layout
 )
 from examples.checkpointing.checkpoint import DevitoCheckpoint, CheckpointOperator
 from pyrevolve import Revolver
@@ -50,6 +58,24 @@ class AcousticWaveSolver(object):
                                receiver=self.receiver, kernel=self.kernel,
                                space_order=self.space_order, **self._kwargs)
 
+    @memoized_meth
+    def op_fwd_batched(self, nshots, layout):
+        """Cached operator for forward runs over a batch of ``nshots`` shots"""
+        return ForwardOperator(self.model, source=self.source,
+                               receiver=self.receiver, kernel=self.kernel,
+                               space_order=self.space_order, nshots=nshots,
+                               layout=layout, **self._kwargs)
+
+    @memoized_meth
+    def op_fwd_stream(self, buffer_size):
+        """Cached operator for forward runs with ring-buffered receivers"""
+        receiver = Receiver(name='rec', grid=self.model.grid,
+                            time_range=self.receiver.time_range,
+                            npoint=self.receiver.npoint, buffer_size=buffer_size)
+        return ForwardOperator(self.model, source=self.source, receiver=receiver,
+                               kernel=self.kernel, space_order=self.space_order,
+                               **self._kwargs)
+
     @memoized_meth
     def op_adj(self):
         """Cached operator for adjoint runs"""
@@ -71,6 +97,14 @@ class AcousticWaveSolver(object):
                             receiver=self.receiver, kernel=self.kernel,
                             space_order=self.space_order, **self._kwargs)
 
+    @memoized_meth
+    def op_bundle(self, save=None):
+        """Cached bundle of the operators for forward (as in ``forward(save=save)``),
+        adjoint, gradient and born runs, all compiled into a single shared object
+        upon the first run of any of them"""
+        return OperatorBundle(self.op_fwd(save), self.op_adj(), self.op_grad(),
+                              self.op_born())
+
     def forward(self, src=None, rec=None, u=None, m=None, save=None, **kwargs):
         """
         Forward modelling function that creates the necessary
@@ -104,6 +138,48 @@ class AcousticWaveSolver(object):
                                           dt=kwargs.pop('dt', self.dt), **kwargs)
         return rec, u, summary
 
+    def forward_stream(self, filename=None, callback=None, buffer_size=64, src=None,
+                       u=None, m=None, **kwargs):
+        """
+        Forward modelling function in which the receiver data is streamed out,
+        every ``buffer_size`` timesteps, to a file and/or a callback (see
+        :class:`TraceWriter`), rather than kept in memory. The receivers
+        thus take ``O(buffer_size*npoint)`` memory, regardless of the number
+        of timesteps.
+
+        :param filename: (Optional) Path of the output traces file
+        :param callback: (Optional) Callable ``callback(start, samples)``
+                         consuming blocks of receiver samples
+        :param buffer_size: (Optional) Number of timesteps between two flushes
+        :param src: Symbol with time series data for the injected source term
+        :param u: (Optional) Symbol to store the computed wavefield
+        :param m: (Optional) Symbol for the time-constant square slowness
+
+        :returns: Memory-mapped traces (None if no ``filename``), of shape
+                  ``(npoint, nt)``, wavefield and performance summary
+        """
+        # Source term is read-only, so re-use the default
+        src = src or self.source
+        rec = Receiver(name='rec', grid=self.model.grid,
+                       time_range=self.receiver.time_range,
+                       coordinates=self.receiver.coordinates.data,
+                       buffer_size=buffer_size)
+
+        # Create the forward wavefield if not provided
+        u = u or TimeFunction(name='u', grid=self.model.grid,
+                              time_order=2, space_order=self.space_order)
+
+        # Pick m from model unless explicitly provided
+        m = m or self.model.m
+
+        writer = TraceWriter(rec, filename=filename, callback=callback)
+        try:
+            summary = writer.apply(self.op_fwd_stream(buffer_size), src=src, rec=rec,
+                                   u=u, m=m, dt=kwargs.pop('dt', self.dt), **kwargs)
+        finally:
+            traces = writer.close()
+        return traces, u, summary
+
     def adjoint(self, rec, srca=None, v=None, m=None, **kwargs):
         """
         Adjoint modelling function that creates the necessary
@@ -196,6 +272,13 @@ class AcousticWaveSolver(object):
                               time_range=self.receiver.time_range,
                               coordinates=self.receiver.coordinates.data)
 
+        # A plain array only carries the domain values, while the operator
+        # expects the allocated (possibly padded) data
+        if isinstance(dmin, np.ndarray):
+            dm = Function(name='dm', grid=self.model.grid, space_order=0)
+            dm.data[:] = dmin
+            dmin = dm
+
         # Create the forward wavefields u and U if not provided
         u = u or TimeFunction(name='u', grid=self.model.grid,
                               time_order=2, space_order=self.space_order)
@@ -209,3 +292,254 @@ class AcousticWaveSolver(object):
         summary = self.op_born().apply(dm=dmin, u=u, U=U, src=src, rec=rec,
                                        m=m, dt=kwargs.pop('dt', self.dt), **kwargs)
         return rec, u, U, summary
+
+    def forward_shots(self, geometries, nworkers=1, comm=None, **kwargs):
+        """
+        Forward modelling of a batch of shots. The operator is compiled once,
+        then the shots are distributed over either a pool of ``nworkers``
+        processes or the ranks of the MPI communicator ``comm`` (e.g., a
+        communicator obtained through ``Split``). Each worker allocates its
+        wavefield and sparse functions once, and reuses them across shots.
+
+        :param geometries: Iterable of ``(src_coordinates, rec_coordinates)``,
+                           one entry per shot. The source wavelet is taken from
+                           the ``source`` of this solver.
+        :param nworkers: (Optional) Number of worker processes; ignored if
+                         ``comm`` is provided.
+        :param comm: (Optional) An MPI communicator whose ranks share the shots.
+
+        :returns: A generator yielding ``(shot index, receiver data)`` as soon
+                  as each shot is completed. With ``comm``, only the shots
+                  assigned to the calling rank are yielded.
+        """
+        # Plain arrays are cheaper to ship to the workers than Devito objects
+        geometries = [(np.array(i), np.array(j)) for i, j in geometries]
+        # JIT-compile before spawning the workers, so that they all share it
+        self.op_fwd(None).cfunction
+        tasks = [('forward', i, g, None) for i, g in enumerate(geometries)]
+        for ret in _run_shots(self, tasks, nworkers, comm, None, kwargs):
+            yield ret
+
+    def forward_batched(self, geometries, layout=None, **kwargs):
+        """
+        Forward modelling of a batch of shots propagated simultaneously by a
+        single operator. All shots share the velocity model and the damping
+        field, which are therefore streamed from memory once per timestep
+        rather than once per shot and timestep. All shots must use the
+        same number of receivers.
+
+        :param geometries: Iterable of ``(src_coordinates, rec_coordinates)``.
+        :param layout: (Optional) Position of the shot dimension in the
+                       wavefield, 'outer' or 'inner'; by default, chosen
+                       through :func:`shot_layout`.
+
+        :returns: Receiver data, as a :class:`numpy.ndarray` of shape
+                  ``(nshots, nt, nrec)``, and performance summary
+        """
+        src_coordinates, rec_coordinates = zip(*geometries)
+        nshots = len(src_coordinates)
+        layout = layout or shot_layout(nshots, self.model.dtype)
+
+        grid = self.model.grid
+        shot_dim = DefaultDimension(name='shot', default_value=nshots)
+        src = PointSource(name='src', grid=grid, time_range=self.source.time_range,
+                          coordinates=np.array(src_coordinates), shot_dim=shot_dim)
+        src.data[:] = self.source.data[:, np.newaxis, :]
+        rec = Receiver(name='rec', grid=grid, time_range=self.receiver.time_range,
+                       coordinates=np.array(rec_coordinates), shot_dim=shot_dim)
+        u = BatchedTimeFunction(name='u', grid=grid, shot_dim=shot_dim,
+                                layout=layout, space_order=self.space_order)
+
+        summary = self.op_fwd_batched(nshots, layout).apply(
+            src=src, rec=rec, u=u, m=kwargs.pop('m', self.model.m),
+            dt=kwargs.pop('dt', self.dt), **kwargs
+        )
+        return np.array(rec.data).transpose(1, 0, 2), summary
+
+    def gradient_shots(self, geometries, observed, nworkers=1, comm=None, **kwargs):
+        """
+        FWI gradient of the least-squares misfit summed over a batch of shots.
+        Shots are distributed as in :meth:`forward_shots`; each worker
+        accumulates the gradient of its shots in place, and the partial
+        gradients are eventually reduced into a single array.
+
+        :param geometries: Iterable of ``(src_coordinates, rec_coordinates)``.
+        :param observed: Iterable of observed receiver data, one per shot.
+        :param nworkers: (Optional) Number of worker processes; ignored if
+                         ``comm`` is provided.
+        :param comm: (Optional) An MPI communicator whose ranks share the shots;
+                     the returned gradient is the sum over all ranks.
+
+        :returns: The gradient as a :class:`numpy.ndarray` and the list of
+                  ``(shot index, misfit)`` of the shots run by the calling process
+                  or rank.
+        """
+        geometries = [(np.array(i), np.array(j)) for i, j in geometries]
+        observed = [np.array(i) for i in observed]
+        self.op_fwd(True).cfunction
+        self.op_grad().cfunction
+        tasks = [('gradient', i, g, d) for i, (g, d) in
+                 enumerate(zip(geometries, observed))]
+        grad = np.zeros(self.model.grid.shape, dtype=self.model.dtype)
+        misfits = list(_run_shots(self, tasks, nworkers, comm, grad, kwargs))
+        return grad, misfits
+
+
+class ShotWorker(object):
+    """
+    Run shots through an :class:`AcousticWaveSolver`, allocating the required
+    wavefields and sparse functions once and reusing them across shots.
+
+    :param solver: The :class:`AcousticWaveSolver`.
+    :param kwargs: (Optional) Extra arguments for the operators.
+    """
+
+    def __init__(self, solver, **kwargs):
+        self.solver = solver
+        self.kwargs = kwargs
+        self._rec = None
+        self._u = {}
+
+    @property
+    def model(self):
+        return self.solver.model
+
+    @property
+    def src(self):
+        try:
+            return self._src
+        except AttributeError:
+            source = self.solver.source
+            self._src = PointSource(name='src', grid=self.model.grid,
+                                    time_range=source.time_range,
+                                    npoint=source.npoint, data=source.data)
+            return self._src
+
+    def rec(self, npoint):
+        if self._rec is None or self._rec.npoint != npoint:
+            self._rec = Receiver(name='rec', grid=self.model.grid, npoint=npoint,
+                                 time_range=self.solver.receiver.time_range)
+        return self._rec
+
+    def u(self, save):
+        try:
+            u = self._u[save]
+            u.data_allocated[:] = 0.
+        except KeyError:
+            u = self._u[save] = TimeFunction(name='u', grid=self.model.grid,
+                                             save=self.solver.source.nt if save
+                                             else None, time_order=2,
+                                             space_order=self.solver.space_order)
+        return u
+
+    @property
+    def v(self):
+        try:
+            self._v.data_allocated[:] = 0.
+        except AttributeError:
+            self._v = TimeFunction(name='v', grid=self.model.grid,
+                                   time_order=2, space_order=self.solver.space_order)
+        return self._v
+
+    @property
+    def grad(self):
+        try:
+            return self._grad
+        except AttributeError:
+            self._grad = Function(name='grad', grid=self.model.grid)
+            return self._grad
+
+    def setup(self, geometry):
+        src_coordinates, rec_coordinates = geometry
+        self.src.coordinates.data[:] = src_coordinates
+        rec = self.rec(rec_coordinates.shape[0])
+        rec.coordinates.data[:] = rec_coordinates
+        return self.src, rec
+
+    def forward(self, geometry):
+        """Run a forward shot; return the receiver data."""
+        src, rec = self.setup(geometry)
+        self.solver.forward(src=src, rec=rec, u=self.u(None), **self.kwargs)
+        return np.array(rec.data)
+
+    def gradient(self, geometry, observed):
+        """
+        Run a forward shot and then the adjoint, accumulating the gradient
+        into ``self.grad``; return the shot misfit.
+        """
+        src, rec = self.setup(geometry)
+        u = self.u(True)
+        self.solver.forward(src=src, rec=rec, u=u, save=True, **self.kwargs)
+        rec.data[:] -= observed
+        misfit = .5*np.linalg.norm(rec.data)**2
+        self.solver.gradient(rec=rec, u=u, v=self.v, grad=self.grad, **self.kwargs)
+        return misfit
+
+    def run(self, task):
+        mode, i, geometry, observed = task
+        if mode == 'forward':
+            return i, self.forward(geometry)
+        else:
+            return i, self.gradient(geometry, observed)
+
+    def flush(self, grad):
+        """Add the gradient accumulated so far into ``grad`` and reset it."""
+        if hasattr(self, '_grad'):
+            grad += self._grad.data
+            self._grad.data[:] = 0.
+
+
+# Process-pool machinery. The workers are forked, so they inherit the solver
+# along with its already JIT-compiled operators
+
+_worker = None
+_shared = None
+
+
+def _init_worker(solver, kwargs, shared):
+    global _worker, _shared
+    _worker = ShotWorker(solver, **kwargs)
+    _shared = shared
+
+
+def _run_task(task):
+    ret = _worker.run(task)
+    if _shared is not None:
+        # In-place reduction of the gradient into the shared buffer
+        lock, buf = _shared
+        with lock:
+            _worker.flush(np.frombuffer(buf, dtype=_worker.grad.dtype)
+                          .reshape(_worker.grad.shape))
+    return ret
+
+
+def _run_shots(solver, tasks, nworkers, comm, grad, kwargs):
+    """
+    Execute ``tasks`` either serially, over a process pool, or over the ranks
+    of ``comm``, yielding each task output as soon as it becomes available. If
+    ``grad`` is provided, the accumulated gradients are reduced into it.
+    """
+    if comm is not None:
+        worker = ShotWorker(solver, **kwargs)
+        for task in tasks[comm.rank::comm.size]:
+            yield worker.run(task)
+        if grad is not None:
+            worker.flush(grad)
+            comm.Allreduce(MPI.IN_PLACE, grad, op=MPI.SUM)
+    elif nworkers == 1:
+        worker = ShotWorker(solver, **kwargs)
+        for task in tasks:
+            yield worker.run(task)
+        if grad is not None:
+            worker.flush(grad)
+    else:
+        context = get_context('fork')
+        shared = None
+        if grad is not None:
+            shared = (context.Lock(),
+                      context.RawArray(numpy_to_ctypes(solver.model.dtype), grad.size))
+        with context.Pool(nworkers, _init_worker, (solver, kwargs, shared)) as pool:
+            for ret in pool.imap_unordered(_run_task, tasks):
+                yield ret
+        if grad is not None:
+            grad += np.frombuffer(shared[1], dtype=grad.dtype).reshape(grad.shape)
@@ -1,5 +1,6 @@
 import numpy as np
 import os
+from sympy import cos, sin
 
 from devito import Grid, Function, Constant
 from devito.logger import warning
@@ -361,7 +362,7 @@ def damp_boundary(damp, nbpml, spacing, mask=False):
     if mask:
         damp.data[:] = 1.0
     dampcoeff = 1.5 * np.log(1.0 / 0.001) / (40.)
-    assert all(damp._offset_domain[0] == i for i in damp._offset_domain)
+    assert all(damp._extent_halo[0] == i for i in damp._extent_halo)
     for i in range(damp.ndim):
         for j in range(nbpml):
             # Dampening coefficient
@@ -388,7 +389,7 @@ def initialize_function(function, data, nbpml):
     :param data: The data array used for initialisation.
     :param nbpml: Number of PML layers for boundary damping.
     """
-    pad_list = [(nbpml + i.left, nbpml + i.right) for i in function._offset_domain]
+    pad_list = [(nbpml + i.left, nbpml + i.right) for i in function._extent_halo]
     function.data_with_halo[:] = np.pad(data, pad_list, 'edge')
 
 
@@ -469,6 +470,12 @@ class Model(Pysical_Model):
     :param delta: Thomsen delta parameter (0<delta<1), delta<epsilon
     :param theta: Tilt angle in radian
     :param phi: Asymuth angle in radian
+    :param storage_dtype: (Optional) data type in which the parameter fields
+                          are stored in memory, for example ``np.float16``;
+                          defaults to ``dtype``
+    :param precompute_trig: (Optional) tabulate the cosine and sine of the angle
+                            fields ``theta`` and ``phi``, see :meth:`tabulate_angles`.
+                            Defaults to False
 
     The :class:`Model` provides two symbolic data objects for the
     creation of seismic wave propagation operators:
@@ -478,7 +485,7 @@ class Model(Pysical_Model):
     """
     def __init__(self, origin, spacing, shape, space_order, vp, nbpml=20,
                  dtype=np.float32, epsilon=None, delta=None, theta=None, phi=None,
-                 **kwargs):
+                 storage_dtype=None, precompute_trig=False, **kwargs):
 
         super(Model, self).__init__(origin, spacing, shape, space_order,
                                     nbpml=nbpml, dtype=dtype)
@@ -498,9 +505,13 @@ class Model(Pysical_Model):
 
         assert (self.grid.extent == extent)
         assert (self.grid.shape == shape_pml).all()
+        # The parameter fields may be stored in a reduced precision
+        storage_dtype = storage_dtype or dtype
+
         # Create square slowness of the wave as symbol `m`
         if isinstance(vp, np.ndarray):
-            self.m = Function(name="m", grid=self.grid, space_order=space_order)
+            self.m = Function(name="m", grid=self.grid, space_order=space_order,
+                              storage_dtype=storage_dtype)
         else:
             self.m = Constant(name="m", value=1/vp**2)
         self._physical_parameters = ('m',)
@@ -508,7 +519,7 @@ class Model(Pysical_Model):
         self.vp = vp
 
         # Create dampening field as symbol `damp`
-        self.damp = Function(name="damp", grid=self.grid)
+        self.damp = Function(name="damp", grid=self.grid, storage_dtype=storage_dtype)
         damp_boundary(self.damp, self.nbpml, spacing=self.spacing)
 
         # Additional parameter fields for TTI operators
@@ -517,7 +528,8 @@ class Model(Pysical_Model):
         if epsilon is not None:
             if isinstance(epsilon, np.ndarray):
                 self._physical_parameters += ('epsilon',)
-                self.epsilon = Function(name="epsilon", grid=self.grid)
+                self.epsilon = Function(name="epsilon", grid=self.grid,
+                                        storage_dtype=storage_dtype)
                 initialize_function(self.epsilon, 1 + 2 * epsilon, self.nbpml)
                 # Maximum velocity is scale*max(vp) if epsilon > 0
                 if np.max(self.epsilon.data_with_halo[:]) > 0:
@@ -531,7 +543,8 @@ class Model(Pysical_Model):
         if delta is not None:
             if isinstance(delta, np.ndarray):
                 self._physical_parameters += ('delta',)
-                self.delta = Function(name="delta", grid=self.grid)
+                self.delta = Function(name="delta", grid=self.grid,
+                                      storage_dtype=storage_dtype)
                 initialize_function(self.delta, np.sqrt(1 + 2 * delta), self.nbpml)
             else:
                 self.delta = delta
@@ -542,7 +555,8 @@ class Model(Pysical_Model):
             if isinstance(theta, np.ndarray):
                 self._physical_parameters += ('theta',)
                 self.theta = Function(name="theta", grid=self.grid,
-                                      space_order=space_order)
+                                      space_order=space_order,
+                                      storage_dtype=storage_dtype)
                 initialize_function(self.theta, theta, self.nbpml)
             else:
                 self.theta = theta
@@ -555,13 +569,29 @@ class Model(Pysical_Model):
                 self.phi = 0
             elif isinstance(phi, np.ndarray):
                 self._physical_parameters += ('phi',)
-                self.phi = Function(name="phi", grid=self.grid, space_order=space_order)
+                self.phi = Function(name="phi", grid=self.grid, space_order=space_order,
+                                    storage_dtype=storage_dtype)
                 initialize_function(self.phi, phi, self.nbpml)
             else:
                 self.phi = phi
         else:
             self.phi = 0
 
+        if precompute_trig:
+            self.tabulate_angles()
+
+    def tabulate_angles(self):
+        """
+        Tabulate the cosine and sine of the angle fields ``theta`` and ``phi``
+        into :class:`Function`s. Operators subsequently created load these,
+        rather than evaluating the trigonometric functions at every timestep.
+        This must be called again if the angle fields are modified.
+        """
+        for i in [self.theta, self.phi]:
+            if isinstance(i, Function):
+                i.precompute(cos)
+                i.precompute(sin)
+
     @property
     def critical_dt(self):
         """Critical computational time step value from the CFL condition."""
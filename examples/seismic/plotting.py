@@ -1,5 +1,14 @@
 import numpy as np
-try:
+
+from devito.tools import memoized_func
+
+
+@memoized_func
+def _matplotlib():
+    """
+    Import and set up matplotlib. This is deferred until something is actually
+    plotted, as importing matplotlib is slow.
+    """
     import matplotlib as mpl
     import matplotlib.pyplot as plt
     from matplotlib import cm
@@ -7,9 +16,7 @@ try:
 
     mpl.rc('font', size=16)
     mpl.rc('figure', figsize=(8, 6))
-except:
-    plt = None
-    cm = None
+    return plt, cm, make_axes_locatable
 
 
 def plot_perturbation(model, model1, colorbar=True):
@@ -22,6 +29,7 @@ def plot_perturbation(model, model1, colorbar=True):
     :param source: Coordinates of the source point.
     :param receiver: Coordinates of the receiver points.
     """
+    plt, cm, make_axes_locatable = _matplotlib()
     domain_size = 1.e-3 * np.array(model.domain_size)
     extent = [model.origin[0], model.origin[0] + domain_size[0],
               model.origin[1] + domain_size[1], model.origin[1]]
@@ -52,6 +60,7 @@ def plot_velocity(model, source=None, receiver=None, colorbar=True):
     :param source: Coordinates of the source point.
     :param receiver: Coordinates of the receiver points.
     """
+    plt, cm, make_axes_locatable = _matplotlib()
     domain_size = 1.e-3 * np.array(model.domain_size)
     extent = [model.origin[0], model.origin[0] + domain_size[0],
               model.origin[1] + domain_size[1], model.origin[1]]
@@ -94,6 +103,7 @@ def plot_shotrecord(rec, model, t0, tn, colorbar=True):
     :param t0: Start of time dimension to plot
     :param tn: End of time dimension to plot
     """
+    plt, cm, make_axes_locatable = _matplotlib()
     scale = np.max(rec) / 10.
     extent = [model.origin[0], model.origin[0] + 1e-3*model.domain_size[0],
               1e-3*tn, t0]
@@ -119,6 +129,7 @@ def plot_image(data, vmin=None, vmax=None, colorbar=True, cmap="gray"):
     :param cmap: Choice of colormap, default is gray scale for images as a
     seismic convention
     """
+    plt, cm, make_axes_locatable = _matplotlib()
     plot = plt.imshow(np.transpose(data),
                       vmin=vmin or 0.9 * np.min(data),
                       vmax=vmax or 1.1 * np.max(data),
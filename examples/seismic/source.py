@@ -1,17 +1,17 @@
-from scipy import interpolate
+from queue import Queue
+from threading import Thread
+
 from devito import Dimension
 from devito.function import SparseTimeFunction
+from devito.profiling import PerformanceSummary
+from devito.tools import memoized_func
 
 from cached_property import cached_property
 
 import numpy as np
-try:
-    import matplotlib.pyplot as plt
-except:
-    plt = None
 
 __all__ = ['PointSource', 'Receiver', 'Shot', 'WaveletSource',
-           'RickerSource', 'GaborSource', 'TimeAxis']
+           'RickerSource', 'GaborSource', 'TimeAxis', 'TraceWriter', 'Resampler']
 
 
 class TimeAxis(object):
@@ -62,6 +62,19 @@ class TimeAxis(object):
         return "TimeAxis: start=%g, stop=%g, step=%g, num=%g" % \
                (self.start, self.stop, self.step, self.num)
 
+    def __eq__(self, other):
+        return isinstance(other, TimeAxis) and self._key == other._key
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self._key)
+
+    @property
+    def _key(self):
+        return (self.start, self.stop, self.step, self.num)
+
     def _rebuild(self):
         return TimeAxis(start=self.start, stop=self.stop, num=self.num)
 
@@ -82,22 +95,52 @@ class PointSource(SparseTimeFunction):
     :param time_order: (Optional) Time discretization order (defaults to 2).
     :param dimension: :(Optional) class:`Dimension` object for
                        representing the number of points in this source.
+    :param shot_dim: (Optional) :class:`DefaultDimension` over a batch of
+                     independent shots. If provided, the data layout becomes
+                     ``(nt, nshots, npoint)`` and each shot has its own
+                     coordinates, of shape ``(nshots, npoint, ndim)``.
+    :param buffer_size: (Optional) If provided, only the ``buffer_size`` most
+                        recent samples are kept in memory, in a ring buffer
+                        indexed by ``time % buffer_size``, rather than the
+                        whole ``time_range``. Use a :class:`TraceWriter` to
+                        drain the samples while the simulation progresses.
     """
 
     def __new__(cls, name, grid, time_range, npoint=None,
                 data=None, coordinates=None, **kwargs):
         p_dim = kwargs.get('dimension', Dimension(name='p_%s' % name))
+        shot_dim = kwargs.pop('shot_dim', None)
         time_order = kwargs.get('time_order', 2)
-        npoint = npoint or coordinates.shape[0]
+        buffer_size = kwargs.pop('buffer_size', None)
+
+        if buffer_size is None:
+            time_dim = grid.time_dim
+            nt = time_range.num
+        else:
+            time_dim = Dimension(name='tb_%s' % name)
+            nt = buffer_size
+
+        if shot_dim is None:
+            npoint = npoint or coordinates.shape[0]
+            dimensions = [time_dim, p_dim]
+            shape = (nt, npoint)
+            batch_dims = ()
+        else:
+            npoint = npoint or coordinates.shape[1]
+            dimensions = [time_dim, shot_dim, p_dim]
+            shape = (nt, int(shot_dim.symbolic_size), npoint)
+            batch_dims = (shot_dim,)
 
         # Create the underlying SparseTimeFunction object
         obj = SparseTimeFunction.__new__(cls, name=name, grid=grid,
-                                         dimensions=[grid.time_dim, p_dim],
-                                         npoint=npoint, nt=time_range.num,
+                                         dimensions=dimensions, shape=shape,
+                                         batch_dims=batch_dims,
+                                         npoint=npoint, nt=nt,
                                          time_order=time_order,
                                          coordinates=coordinates, **kwargs)
 
         obj._time_range = time_range._rebuild()
+        obj._buffer_size = buffer_size
 
         # If provided, copy initial data into the allocated buffer
         if data is not None:
@@ -117,7 +160,25 @@ class PointSource(SparseTimeFunction):
     def time_range(self):
         return self._time_range
 
+    @property
+    def buffer_size(self):
+        return self._buffer_size
+
+    def interpolate(self, expr, offset=0, u_t=None, p_t=None, **kwargs):
+        if p_t is None and self.buffer_size is not None:
+            p_t = self.grid.time_dim % self.buffer_size
+        return super(PointSource, self).interpolate(expr, offset=offset, u_t=u_t,
+                                                    p_t=p_t, **kwargs)
+
+    def inject(self, field, expr, offset=0, u_t=None, p_t=None):
+        if p_t is None and self.buffer_size is not None:
+            p_t = self.grid.time_dim % self.buffer_size
+        return super(PointSource, self).inject(field, expr, offset=offset,
+                                               u_t=u_t, p_t=p_t)
+
     def resample(self, dt=None, num=None, rtol=1e-5, order=3):
+        if self.buffer_size is not None:
+            raise ValueError("Cannot resample a ring-buffered PointSource")
         # Only one of dt or num may be set.
         if dt is None:
             assert num is not None
@@ -136,24 +197,275 @@ class PointSource(SparseTimeFunction):
         if np.isclose(dt, dt0):
             return
 
-        nsamples, ntraces = self.data.shape
-
-        new_traces = np.zeros((new_time_range.num, ntraces))
-
-        for i in range(ntraces):
-            tck = interpolate.splrep(self._time_range.time_values,
-                                     self.data[:, i], k=order)
-            new_traces[:, i] = interpolate.splev(new_time_range.time_values, tck)
+        new_traces = resampler(self._time_range, new_time_range, order)(self.data)
 
         # Return new object
+        shot_dim = self.dimensions[1] if len(self.dimensions) == 3 else None
         return PointSource(self.name, self.grid, data=new_traces,
-                           time_range=new_time_range, coordinates=self.coordinates.data)
+                           time_range=new_time_range, coordinates=self.coordinates.data,
+                           shot_dim=shot_dim)
 
 
 Receiver = PointSource
 Shot = PointSource
 
 
+def bspline_basis(knots, degree, x):
+    """
+    Evaluate the B-splines of degree ``degree`` on the knot vector ``knots``
+    at the points ``x``. At each point, only ``degree + 1`` consecutive
+    B-splines are non-zero.
+
+    :returns: The index of the first non-zero B-spline at each point, and
+              an array of shape ``(degree + 1, len(x))`` with their values.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    n = len(knots) - degree - 1
+
+    # The knot interval containing each point; points out of the knot range
+    # belong to the first/last interval (i.e., extrapolation)
+    i = np.clip(np.searchsorted(knots, x, side='right') - 1, degree, n - 1)
+
+    # de Boor's recurrence
+    values = np.zeros((degree + 1, len(x)))
+    values[0] = 1.
+    for j in range(1, degree + 1):
+        saved = np.zeros(len(x))
+        for r in range(j):
+            right = knots[i + r + 1] - x
+            left = x - knots[i + r + 1 - j]
+            term = values[r] / (right + left)
+            values[r] = saved + right*term
+            saved = left*term
+        values[j] = saved
+
+    return i - degree, values
+
+
+class Resampler(object):
+    """
+    Interpolation of traces from one :class:`TimeAxis` onto another.
+
+    The traces are interpolated by splines of degree ``order`` with not-a-knot
+    end conditions, i.e. the same splines as ``scipy.interpolate.splrep(...,
+    s=0)``, but all traces are processed at once, with every operation acting
+    on whole rows (i.e., timesteps) of the ``(nt, ...)`` data array:
+
+        * the spline coefficients are the solution of a banded linear system,
+          whose LU factorization is computed upfront;
+        * each resampled timestep is a combination of ``order + 1`` rows
+          of spline coefficients, whose weights are computed upfront.
+
+    As both only depend on the two time axes, they are reused across shots
+    (see :func:`resampler`).
+
+    :param time_range: :class:`TimeAxis` of the input traces.
+    :param new_time_range: :class:`TimeAxis` of the output traces.
+    :param order: (Optional) Degree of the splines. Defaults to 3.
+    """
+
+    def __init__(self, time_range, new_time_range, order=3):
+        x = time_range.time_values
+        n = len(x)
+        if not 0 < order < n:
+            raise ValueError("Cannot interpolate %d samples with splines of "
+                             "degree %d" % (n, order))
+
+        # Not-a-knot knot vector
+        k2 = (order + 1) // 2
+        inner = x if order % 2 else (x[1:] + x[:-1]) / 2
+        knots = np.r_[(x[0],)*(order + 1), inner[k2:len(inner) - k2],
+                      (x[-1],)*(order + 1)]
+
+        # Collocation matrix, in band storage: `band[i, j - i + width]` is the
+        # entry `(i, j)`, with `|j - i| <= width`
+        first, values = bspline_basis(knots, order, x)
+        width = int(np.abs(first[:, None] + np.arange(order + 1) -
+                           np.arange(n)[:, None]).max())
+        band = np.zeros((n, 2*width + 1))
+        for r in range(order + 1):
+            band[np.arange(n), first + r - np.arange(n) + width] = values[r]
+
+        # LU factorization without pivoting, which is stable as spline
+        # collocation matrices are totally positive [de Boor, 1977]
+        for k in range(n):
+            for i in range(k + 1, min(k + width + 1, n)):
+                f = band[i, k - i + width] / band[k, width]
+                band[i, k - i + width] = f
+                band[i, k - i + width + 1:k - i + 2*width + 1] -= \
+                    f*band[k, width + 1:2*width + 1]
+
+        self.time_range = time_range
+        self.new_time_range = new_time_range
+        self.order = order
+        self._band = band
+        self._width = width
+        self._first, self._weights = bspline_basis(knots, order,
+                                                   new_time_range.time_values)
+
+    def __call__(self, data):
+        """
+        Resample ``data``, an array of shape ``(time_range.num, ...)``.
+
+        :returns: An array of shape ``(new_time_range.num, ...)``.
+        """
+        band, width = self._band, self._width
+        n = self.time_range.num
+
+        data = np.asarray(data)
+        if data.shape[0] != n:
+            raise ValueError("Expected %d samples, got %d" % (n, data.shape[0]))
+        coefficients = np.array(data.reshape(n, -1), dtype=np.float64)
+
+        # Forward and backward substitutions, one timestep at a time
+        for i in range(1, n):
+            lower = max(i - width, 0)
+            coefficients[i] -= np.dot(band[i, lower - i + width:width],
+                                      coefficients[lower:i])
+        coefficients[n - 1] /= band[n - 1, width]
+        for i in reversed(range(n - 1)):
+            upper = min(i + width + 1, n)
+            coefficients[i] -= np.dot(band[i, width + 1:upper - i + width],
+                                      coefficients[i + 1:upper])
+            coefficients[i] /= band[i, width]
+
+        # Evaluate the splines at the new time values
+        resampled = np.empty((self.new_time_range.num, coefficients.shape[1]))
+        for i, (first, weights) in enumerate(zip(self._first, self._weights.T)):
+            np.dot(weights, coefficients[first:first + self.order + 1], out=resampled[i])
+        return resampled.reshape((self.new_time_range.num,) + data.shape[1:])
+
+
+@memoized_func(maxsize=16)
+def resampler(time_range, new_time_range, order=3):
+    """
+    Return a (cached) :class:`Resampler` from ``time_range`` to ``new_time_range``.
+    """
+    return Resampler(time_range, new_time_range, order)
+
+
+class TraceWriter(object):
+    """
+    Drain the samples of a ring-buffered :class:`PointSource` (that is, one
+    created with ``buffer_size``) while the simulation progresses. Every
+    ``buffer_size`` timesteps, the freshly computed samples are copied out of
+    the ring buffer and handed over to a background thread, which stores them
+    into a memory-mapped file and/or passes them to a user callback, while the
+    :class:`Operator` keeps running.
+
+    :param traces: The ring-buffered :class:`PointSource`.
+    :param filename: (Optional) Path of the output file. The traces are stored
+                     one after the other (i.e., time is the fastest varying
+                     index), as in SEG-Y, in the NumPy binary format, so they
+                     can be read back lazily via ``np.load(filename, mmap_mode='r')``.
+    :param callback: (Optional) A callable ``callback(start, samples)``, where
+                     ``samples`` is an array of shape ``(n,) + traces.shape[1:]``
+                     carrying the samples of the timesteps ``[start, start + n)``.
+    :param maxpending: (Optional) Maximum number of flushed blocks waiting to
+                       be drained, after which :meth:`flush` blocks. Defaults
+                       to 2, which bounds the memory in use to a few times that
+                       of the ring buffer.
+    """
+
+    def __init__(self, traces, filename=None, callback=None, maxpending=2):
+        if traces.buffer_size is None:
+            raise ValueError("`%s` is not ring-buffered" % traces.name)
+        if filename is None and callback is None:
+            raise ValueError("Either `filename` or `callback` must be provided")
+
+        self.traces = traces
+        self.callback = callback
+        if filename is not None:
+            shape = traces.shape[1:] + (traces.time_range.num,)
+            self.output = np.lib.format.open_memmap(filename, mode='w+', shape=shape,
+                                                    dtype=traces.dtype)
+        else:
+            self.output = None
+
+        self._error = None
+        self._queue = Queue(maxsize=maxpending)
+        self._thread = Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            if self._error is not None:
+                # Keep consuming, so that `flush` never blocks forever
+                continue
+            start, samples = item
+            try:
+                if self.output is not None:
+                    self.output[..., start:start + len(samples)] = \
+                        np.moveaxis(samples, 0, -1)
+                if self.callback is not None:
+                    self.callback(start, samples)
+            except Exception as e:
+                self._error = e
+
+    def _check(self):
+        if self._error is not None:
+            raise self._error
+
+    def flush(self, start, nsamples):
+        """
+        Hand the samples of the timesteps ``[start, start + nsamples)`` over
+        to the background thread. These must not wrap around the ring buffer.
+        """
+        self._check()
+        row = start % self.traces.buffer_size
+        if row + nsamples > self.traces.buffer_size:
+            raise ValueError("Cannot flush %d samples from row %d of a ring buffer "
+                             "of size %d" % (nsamples, row, self.traces.buffer_size))
+        # Copy, as the ring buffer is about to be overwritten
+        self._queue.put((start, np.array(self.traces.data[row:row + nsamples])))
+
+    def apply(self, op, time_m=None, time_M=None, **kwargs):
+        """
+        Run ``op`` over the timesteps ``[time_m, time_M]``, in chunks of at
+        most ``buffer_size`` timesteps, flushing the samples after each chunk.
+
+        :param op: The :class:`Operator` writing into the ring buffer.
+        :param time_m: (Optional) First timestep. Defaults to the one ``op``
+                       would pick by itself.
+        :param time_M: (Optional) Last timestep. Defaults to the one ``op``
+                       would pick by itself.
+        :param kwargs: Further runtime arguments, passed to ``op.apply``.
+        :returns: The :class:`PerformanceSummary` cumulated over all chunks.
+        """
+        size = self.traces.buffer_size
+        if time_m is None or time_M is None:
+            time_dim = self.traces.grid.time_dim
+            args = op.arguments(**kwargs)
+            time_m = args[time_dim.min_name] if time_m is None else time_m
+            time_M = args[time_dim.max_name] if time_M is None else time_M
+
+        summary = PerformanceSummary()
+        start = time_m
+        while start <= time_M:
+            stop = min(start - start % size + size, time_M + 1)
+            summary.accumulate(op.apply(time_m=start, time_M=stop - 1, **kwargs))
+            self.flush(start, stop - start)
+            start = stop
+        return summary
+
+    def close(self):
+        """
+        Wait for all pending samples to be drained.
+
+        :returns: The memory-mapped output traces, or None if no ``filename``
+                  was provided.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        self._check()
+        if self.output is not None:
+            self.output.flush()
+        return self.output
+
+
 class WaveletSource(PointSource):
     """
     Abstract base class for symbolic objects that encapsulate a set of
@@ -201,6 +513,7 @@ class WaveletSource(PointSource):
         :param wavelet: Prescribed wavelet instead of one from this symbol
         :param time: Prescribed time instead of time from this symbol
         """
+        import matplotlib.pyplot as plt  # Slow to import, so only when plotting
         wavelet = wavelet or self.data[:, idx]
         plt.figure()
         plt.plot(self.time_values, wavelet)
@@ -11,7 +11,9 @@ def tti_setup(shape=(50, 50, 50), spacing=(20.0, 20.0, 20.0), tn=250.0,
 
     nrec = 101
     # Two layer model for true velocity
-    model = demo_model(preset, shape=shape, spacing=spacing, nbpml=nbpml)
+    model = demo_model(preset, shape=shape, spacing=spacing, nbpml=nbpml,
+                       storage_dtype=kwargs.pop('storage_dtype', None),
+                       precompute_trig=kwargs.pop('precompute_trig', False))
     # Derive timestepping from model spacing
     dt = model.critical_dt
     t0 = 0.0
@@ -54,6 +56,9 @@ if __name__ == "__main__":
                         help="Whether or not to use an azimuth angle")
     parser.add_argument('-a', '--autotune', default=False, action='store_true',
                         help="Enable autotuning for block sizes")
+    parser.add_argument('--precompute-trig', dest='trig', default=False,
+                        action='store_true',
+                        help="Tabulate the trigonometric functions of the angles")
     parser.add_argument("-so", "--space_order", default=4,
                         type=int, help="Space order of the simulation")
     parser.add_argument("--nbpml", default=40,
@@ -83,4 +88,4 @@ if __name__ == "__main__":
 
     run(shape=shape, spacing=spacing, nbpml=args.nbpml, tn=tn,
         space_order=args.space_order, autotune=args.autotune, dse=args.dse,
-        dle=args.dle, kernel=args.kernel, preset=preset)
+        dle=args.dle, kernel=args.kernel, preset=preset, precompute_trig=args.trig)
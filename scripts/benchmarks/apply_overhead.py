@@ -0,0 +1,57 @@
+"""
+Measure the Python overhead of repeatedly running an Operator over short time
+windows, as it happens, for example, within a checkpointing loop.
+
+The problem size is kept tiny on purpose, so that the measured time is
+dominated by the argument processing rather than by the C kernel.
+"""
+
+from timeit import default_timer as timer
+
+import click
+
+from devito import Grid, TimeFunction, Constant, Eq, Operator, configuration
+from devito.profiling import PerformanceSummary
+
+
+@click.command()
+@click.option('-d', '--shape', default=(16, 16, 16), help='Grid shape')
+@click.option('-so', '--space-order', default=4, help='Space order')
+@click.option('-w', '--window', default=2, help='Timesteps per `apply`')
+@click.option('-n', '--ncalls', default=1000, help='Number of `apply` calls')
+@click.option('--dle', default='advanced', help='DLE mode')
+def run(shape, space_order, window, ncalls, dle):
+    configuration['log_level'] = 'ERROR'
+
+    grid = Grid(shape=shape)
+    u = TimeFunction(name='u', grid=grid, space_order=space_order)
+    c = Constant(name='c', value=1.)
+    op = Operator(Eq(u.forward, c*u.laplace + u), dle=dle)
+
+    # Warm up (JIT compilation, data allocation, ...)
+    op.apply(time_M=window)
+
+    start = timer()
+    for i in range(ncalls):
+        op.arguments(time_m=i, time_M=i + window)
+    elapsed_args = timer() - start
+
+    start = timer()
+    for i in range(ncalls):
+        op.apply(time_m=0, time_M=window)
+    elapsed_apply = timer() - start
+
+    summary = PerformanceSummary()
+    start = timer()
+    for i in range(ncalls):
+        op.apply(time_m=0, time_M=window, summary=summary)
+    elapsed_accumulate = timer() - start
+
+    print("Argument processing:       %.1f us/call" % (elapsed_args / ncalls * 1e6))
+    print("Full `apply`:              %.1f us/call" % (elapsed_apply / ncalls * 1e6))
+    print("Full `apply`, accumulated: %.1f us/call" %
+          (elapsed_accumulate / ncalls * 1e6))
+
+
+if __name__ == "__main__":
+    run()
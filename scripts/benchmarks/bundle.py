@@ -0,0 +1,56 @@
+"""
+Compare the time taken to JIT-compile and load the acoustic forward, adjoint,
+gradient and Born Operators one by one, that is one shared object each, with
+that taken when they are bundled into a single shared object.
+
+To always measure an actual compilation, rather than a cache hit, a unique
+macro is added to the compiler flags.
+"""
+
+from timeit import default_timer as timer
+from uuid import uuid4
+
+import click
+
+from devito import OperatorBundle, configuration
+from examples.seismic.acoustic.acoustic_example import acoustic_setup
+
+
+def build(shape, space_order, dle):
+    solver = acoustic_setup(shape=shape, spacing=tuple(10. for _ in shape), tn=50.,
+                            space_order=space_order, dle=dle)
+    return [solver.op_fwd(None), solver.op_adj(), solver.op_grad(), solver.op_born()]
+
+
+@click.command()
+@click.option('-d', '--shape', default=(50, 50, 50), help='Grid shape')
+@click.option('-so', '--space-order', default=4, help='Space order')
+@click.option('--dle', default='advanced', help='DLE mode')
+def run(shape, space_order, dle):
+    configuration['log_level'] = 'ERROR'
+    configuration['compiler'].cflags.append('-DDEVITO_BENCHMARK=%s' % uuid4().hex)
+
+    operators = build(shape, space_order, dle)
+    start = timer()
+    for op in operators:
+        op.cfunction
+    t_separate = timer() - start
+
+    bundle = OperatorBundle(build(shape, space_order, dle))
+    start = timer()
+    for op in bundle:
+        op.cfunction
+    t_bundle = timer() - start
+
+    nefuncs = sum(len([i for i in op._func_table.values() if i.local])
+                  for op in bundle)
+    print("%d Operators, %d elemental functions (%d once bundled)" %
+          (len(bundle), nefuncs, len(set(k for v in bundle._efuncs.values()
+                                         for _, k in v.values()))))
+    print("%24s %12s" % ('', 'time (s)'))
+    print("%24s %12.2f" % ('one shared object each', t_separate))
+    print("%24s %12.2f" % ('bundle', t_bundle))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,54 @@
+"""
+Measure the time taken to build (but not to JIT-compile) the seismic Operators,
+as well as the time taken to sign them, that is to derive the name of the
+shared object to be compiled or fetched from the JIT cache.
+"""
+
+from timeit import default_timer as timer
+
+import click
+
+from devito import configuration
+from devito.ir.iet import FindNodes, Node
+from examples.seismic.acoustic.acoustic_example import acoustic_setup
+from examples.seismic.tti.tti_example import tti_setup
+
+
+def builders(problem, shape, space_order):
+    spacing = tuple(10. for _ in shape)
+    if problem == 'acoustic':
+        solver = acoustic_setup(shape=shape, spacing=spacing, tn=50.,
+                                space_order=space_order)
+        return [('forward', lambda: solver.op_fwd(save=False)),
+                ('adjoint', solver.op_adj), ('gradient', solver.op_grad),
+                ('born', solver.op_born)]
+    else:
+        solver = tti_setup(shape=shape, spacing=spacing, tn=50.,
+                           space_order=space_order)
+        return [('forward', solver.op_fwd)]
+
+
+@click.command()
+@click.option('-P', '--problem', default='acoustic',
+              type=click.Choice(['acoustic', 'tti']), help='Seismic problem')
+@click.option('-d', '--shape', default=(50, 50, 50), help='Grid shape')
+@click.option('-so', '--space-order', default=4, help='Space order')
+def run(problem, shape, space_order):
+    configuration['log_level'] = 'ERROR'
+
+    print("%12s %8s %12s %12s" % ('', 'nodes', 'build (s)', 'sign (s)'))
+    for name, builder in builders(problem, shape, space_order):
+        start = timer()
+        op = builder()
+        t_build = timer() - start
+
+        start = timer()
+        op._soname
+        t_sign = timer() - start
+
+        nodes = len(FindNodes(Node).visit(op))
+        print("%12s %8d %12.3f %12.3f" % (name, nodes, t_build, t_sign))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,54 @@
+"""
+Measure the time taken by ``import devito`` in a fresh interpreter, as it
+happens, for example, for each of many short-lived shot workers.
+
+The first import on a host populates the on-disk cache of the host detection
+(CPU, compiler), so it is reported separately. With ``--budget``, the script
+fails if the median import time exceeds the budget.
+"""
+
+from statistics import median
+from subprocess import check_output
+import sys
+
+import click
+
+PROBE = """
+from timeit import default_timer as timer
+start = timer()
+import devito
+elapsed = timer() - start
+import sys
+print(elapsed, ' '.join(i for i in %s if i in sys.modules))
+"""
+
+LAZY = ['cpuinfo', 'matplotlib', 'mpi4py', 'devito.yask']
+
+
+def probe():
+    out = check_output([sys.executable, '-c', PROBE % LAZY]).decode().split()
+    return float(out[0]), out[1:]
+
+
+@click.command()
+@click.option('-n', '--nruns', default=10, help='Number of fresh interpreters')
+@click.option('--budget', default=None, type=float,
+              help='Maximum median import time, in seconds')
+def run(nruns, budget):
+    first, _ = probe()
+    times, eager = zip(*[probe() for _ in range(nruns)])
+
+    print("%24s %12s" % ('', 'time (s)'))
+    print("%24s %12.3f" % ('first import', first))
+    print("%24s %12.3f" % ('min', min(times)))
+    print("%24s %12.3f" % ('median', median(times)))
+    if any(eager):
+        print("Eagerly imported: %s" % ', '.join(sorted(set(sum(eager, [])))))
+
+    if budget is not None and median(times) > budget:
+        raise click.ClickException("Median import time %.3f s exceeds the budget "
+                                   "of %.3f s" % (median(times), budget))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,54 @@
+"""
+Compare the time taken to JIT-compile a seismic Operator as a single
+compilation unit with that taken when each of its functions (i.e., the kernel
+and the elemental functions created by the DLE) is compiled as a separate
+compilation unit, all units concurrently (see ``configuration['jit-split']``).
+
+To always measure an actual compilation, rather than a cache hit, a unique
+macro is added to the compiler flags.
+"""
+
+from timeit import default_timer as timer
+from uuid import uuid4
+
+import click
+
+from devito import configuration
+from devito.operator import jit_code
+from examples.seismic.acoustic.acoustic_example import acoustic_setup
+from examples.seismic.tti.tti_example import tti_setup
+
+
+def build(problem, shape, space_order, dle):
+    spacing = tuple(10. for _ in shape)
+    setup = acoustic_setup if problem == 'acoustic' else tti_setup
+    solver = setup(shape=shape, spacing=spacing, tn=50., space_order=space_order,
+                   dle=dle)
+    return solver.op_fwd(save=False)
+
+
+@click.command()
+@click.option('-P', '--problem', default='tti',
+              type=click.Choice(['acoustic', 'tti']), help='Seismic problem')
+@click.option('-d', '--shape', default=(50, 50, 50), help='Grid shape')
+@click.option('-so', '--space-order', default=8, help='Space order')
+@click.option('--dle', default='advanced', help='DLE mode')
+def run(problem, shape, space_order, dle):
+    configuration['log_level'] = 'ERROR'
+    configuration['compiler'].cflags.append('-DDEVITO_BENCHMARK=%s' % uuid4().hex)
+
+    print("%12s %8s %12s" % ('', 'units', 'time (s)'))
+    for split in [False, True]:
+        configuration['jit-split'] = split
+        op = build(problem, shape, space_order, dle)
+        start = timer()
+        op.cfunction
+        elapsed = timer() - start
+        units = jit_code(op.ccode)
+        print("%12s %8d %12.2f" % ('split' if split else 'single',
+                                   len(units) if split else 1, elapsed))
+    configuration['jit-split'] = False
+
+
+if __name__ == "__main__":
+    run()
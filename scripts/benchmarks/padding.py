@@ -0,0 +1,48 @@
+"""
+Compare the throughput of an acoustic-like stencil with and without
+automatic padding (``configuration['autopadding']``).
+
+Without padding, the rows of the allocated data (domain plus halo) are
+usually not a multiple of the cache line, and power-of-two extents may
+produce strides that are multiples of the cache's critical stride.
+"""
+
+import click
+
+from devito import Grid, Function, TimeFunction, Eq, Operator, configuration
+from devito.tools import prod
+
+
+@click.command()
+@click.option('-d', '--shape', default=(256, 256, 256), help='Grid shape')
+@click.option('-so', '--space-order', default=4, help='Space order')
+@click.option('-nt', '--timesteps', default=20, help='Number of timesteps')
+@click.option('--dle', default='advanced', help='DLE mode')
+def run(shape, space_order, timesteps, dle):
+    configuration['log_level'] = 'ERROR'
+
+    results = []
+    for autopadding in [False, True]:
+        configuration['autopadding'] = autopadding
+
+        grid = Grid(shape=shape)
+        m = Function(name='m', grid=grid, space_order=space_order)
+        u = TimeFunction(name='u', grid=grid, time_order=2, space_order=space_order)
+        m.data[:] = 1.
+        u.data[:] = 1.
+        op = Operator(Eq(u.forward, 2*u - u.backward + m*u.laplace), dle=dle)
+
+        # Warm up (JIT compilation, first touch, ...)
+        op.apply(time_M=1)
+        summary = op.apply(time_M=timesteps)
+        time = sum(i.time for i in summary.values())
+        gpointss = prod(shape)*timesteps/time/10**9
+        results.append((autopadding, u.shape_allocated, time, gpointss))
+
+    print("%12s %24s %12s %12s" % ('autopadding', 'allocated', 'time (s)', 'GPts/s'))
+    for autopadding, allocated, time, gpointss in results:
+        print("%12s %24s %12.4f %12.4f" % (autopadding, allocated, time, gpointss))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,58 @@
+"""
+Compare the throughput of a seismic forward operator JIT-compiled as usual
+with that achieved when it is JIT-compiled through profile-guided optimisation
+(see ``configuration['pgo']``).
+
+The first PGO run trains an instrumented build over a few timesteps and then
+rebuilds the operator; that cost is reported separately, as it is only paid
+once per operator and grid shape.
+"""
+
+from timeit import default_timer as timer
+
+import click
+import numpy as np
+
+from devito import configuration
+from devito.tools import prod
+from examples.seismic.acoustic.acoustic_example import acoustic_setup
+from examples.seismic.tti.tti_example import tti_setup
+
+
+@click.command()
+@click.option('-P', '--problem', default='acoustic',
+              type=click.Choice(['acoustic', 'tti']), help='Seismic problem')
+@click.option('-d', '--shape', default=(200, 200, 200), help='Grid shape')
+@click.option('-so', '--space-order', default=8, help='Space order')
+@click.option('--tn', default=250., help='End time of the simulation')
+@click.option('--dle', default='advanced', help='DLE mode')
+def run(problem, shape, space_order, tn, dle):
+    configuration['log_level'] = 'ERROR'
+
+    setup = acoustic_setup if problem == 'acoustic' else tti_setup
+    solver = setup(shape=shape, spacing=tuple(10. for _ in shape), tn=tn,
+                   space_order=space_order, dle=dle)
+    timesteps = solver.source.time_range.num
+
+    # Warm up (JIT compilation, PGO training, first touch, ...)
+    solver.op_fwd(save=False).cfunction
+    start = timer()
+    solver.forward(save=False, pgo=True)
+    t_pgo = timer() - start
+
+    results = []
+    for pgo in [False, True]:
+        ret = solver.forward(save=False, pgo=pgo)
+        rec, summary = ret[0], ret[-1]
+        time = sum(i.time for i in summary.values())
+        gpointss = prod(solver.model.shape_domain)*timesteps/time/10**9
+        results.append((pgo, time, gpointss, np.linalg.norm(rec.data)))
+
+    print("First run with PGO (training and rebuild included): %.2f s" % t_pgo)
+    print("%12s %12s %12s %14s" % ('pgo', 'time (s)', 'GPts/s', '||rec||'))
+    for pgo, time, gpointss, norm in results:
+        print("%12s %12.4f %12.4f %14.6e" % (pgo, time, gpointss, norm))
+
+
+if __name__ == "__main__":
+    run()
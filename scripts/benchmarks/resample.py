@@ -0,0 +1,60 @@
+"""
+Compare the batched spline resampling of shot records (``Resampler``) with
+the trace-by-trace ``scipy.interpolate.splrep``/``splev`` loop it replaces.
+
+The ``Resampler`` is timed twice: when built from scratch, and when reused
+for another shot with the same time axes, as it happens within an FWI loop.
+"""
+
+from timeit import default_timer as timer
+
+import click
+import numpy as np
+from scipy import interpolate
+
+from examples.seismic import TimeAxis, Resampler
+
+
+def resample_loop(data, time_values, new_time_values, order):
+    new_data = np.zeros((len(new_time_values), data.shape[1]))
+    for i in range(data.shape[1]):
+        tck = interpolate.splrep(time_values, data[:, i], k=order)
+        new_data[:, i] = interpolate.splev(new_time_values, tck)
+    return new_data
+
+
+@click.command()
+@click.option('--nt', default=3000, help='Number of input samples')
+@click.option('--ntraces', default=10000, help='Number of traces')
+@click.option('--ratio', default=2.5, help='Ratio between output and input dt')
+@click.option('--order', default=3, help='Spline degree')
+def run(nt, ntraces, ratio, order):
+    time_range = TimeAxis(start=0., step=1., num=nt)
+    new_time_range = TimeAxis(start=0., step=ratio, stop=time_range.stop)
+    data = np.random.RandomState(0).randn(nt, ntraces).astype(np.float32)
+
+    start = timer()
+    reference = resample_loop(data, time_range.time_values,
+                              new_time_range.time_values, order)
+    t_loop = timer() - start
+
+    start = timer()
+    resampler = Resampler(time_range, new_time_range, order)
+    resampled = resampler(data)
+    t_first = timer() - start
+
+    start = timer()
+    resampler(data)
+    t_reuse = timer() - start
+
+    error = np.abs(resampled - reference).max() / np.abs(reference).max()
+    print("%d traces, %d -> %d samples (max relative difference: %.2e)" %
+          (ntraces, nt, new_time_range.num, error))
+    print("%24s %12s %12s" % ('', 'time (s)', 'speedup'))
+    for name, t in [('splrep/splev loop', t_loop), ('Resampler (first)', t_first),
+                    ('Resampler (reused)', t_reuse)]:
+        print("%24s %12.4f %12.1f" % (name, t, t_loop / t))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,52 @@
+"""
+Measure the throughput of the acoustic forward operator when propagating a
+batch of K shots at once, through a shot dimension in the wavefield, rather
+than one shot at a time.
+
+All shots share the velocity model and the damping field, so batching
+amortizes their memory traffic over K shots.
+"""
+
+from timeit import default_timer as timer
+
+import click
+import numpy as np
+
+from devito import configuration
+from examples.seismic.acoustic.acoustic_example import acoustic_setup
+
+
+@click.command()
+@click.option('-d', '--shape', default=(100, 100, 100), help='Grid shape')
+@click.option('-so', '--space-order', default=4, help='Space order')
+@click.option('--tn', default=250., help='Simulation time (ms)')
+@click.option('-k', '--nshots', type=int, default=[1, 2, 4, 8, 16], multiple=True,
+              help='Batch sizes')
+@click.option('--layout', default=None, type=click.Choice(['outer', 'inner']),
+              help='Position of the shot dimension (default: automatic)')
+@click.option('--dle', default='advanced', help='DLE mode')
+def run(shape, space_order, tn, nshots, layout, dle):
+    configuration['log_level'] = 'ERROR'
+
+    solver = acoustic_setup(shape=shape, spacing=[15. for _ in shape], tn=tn,
+                            space_order=space_order, dle=dle)
+    src0 = np.array(solver.source.coordinates.data)
+    rec0 = np.array(solver.receiver.coordinates.data)
+
+    print("%8s %16s %16s" % ('nshots', 'time/shot (s)', 'shots/s'))
+    for k in nshots:
+        geometries = [(src0 + ([10.*i] + [0.]*(len(shape) - 1)), rec0)
+                      for i in range(k)]
+
+        # Warm up (JIT compilation, data allocation, ...)
+        solver.forward_batched(geometries, layout=layout)
+
+        start = timer()
+        solver.forward_batched(geometries, layout=layout)
+        elapsed = timer() - start
+
+        print("%8d %16.4f %16.2f" % (k, elapsed / k, k / elapsed))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,68 @@
+"""
+Compare the throughput of an acoustic-like stencil without and with the DLE
+option ``streaming``, that is nontemporal stores for the write-only streams
+larger than the last level cache and software prefetching of the rows ahead
+in the blocked loops, for each of the prefetch distances (0 meaning no
+prefetching).
+
+Nontemporal stores are only emitted by the compilers providing a specific
+pragma or, with ``--intrinsics``, for the aligned stores; with ``--llc``, the
+size of the last level cache may be overridden, e.g. to emulate larger grids.
+"""
+
+import click
+
+from devito import Grid, Function, TimeFunction, Eq, Operator, configuration
+from devito.dle import PrefetchArg
+from devito.tools import prod
+
+
+@click.command()
+@click.option('-d', '--shape', default=(256, 256, 256), help='Grid shape')
+@click.option('-so', '--space-order', default=8, help='Space order')
+@click.option('-nt', '--timesteps', default=20, help='Number of timesteps')
+@click.option('-bs', '--blockshape', default=(32, 32), help='Block shape')
+@click.option('--intrinsics', is_flag=True, help='Use explicit vector intrinsics')
+@click.option('--llc', default=0, help='Size of the last level cache, in bytes')
+def run(shape, space_order, timesteps, blockshape, intrinsics, llc):
+    configuration['log_level'] = 'ERROR'
+
+    grid = Grid(shape=shape)
+    m = Function(name='m', grid=grid, space_order=space_order)
+    u = TimeFunction(name='u', grid=grid, time_order=2, space_order=space_order)
+    m.data[:] = 1.
+    u.data[:] = 1.
+    eq = Eq(u.forward, 2*u - u.backward + m*u.laplace)
+
+    def bench(op, **kwargs):
+        # Each run is repeated three times, and the best run is retained
+        time = min(sum(i.time for i in op.apply(time_M=timesteps, **kwargs).values())
+                   for _ in range(3))
+        return time, prod(shape)*timesteps/time/10**9
+
+    results = []
+    options = {'intrinsics': intrinsics, 'blockshape': blockshape}
+    op = Operator(eq, dle=('advanced', options))
+    op.apply(time_M=1)  # Warm up (JIT compilation, first touch, ...)
+    results.append(('baseline', '-') + bench(op))
+
+    options['streaming'] = llc or True
+    op = Operator(eq, dle=('advanced', options))
+    op.apply(time_M=1)
+    ntstores = 'yes' if '_stream(' in str(op.ccode) or 'nontemporal' in str(op.ccode)\
+        else 'no'
+    prefetched = [i for i in op._dle_args if isinstance(i, PrefetchArg)]
+    for distance in (prefetched[0].candidates if prefetched else [0]):
+        results.append(('streaming', ntstores, distance) + bench(op, **{
+            i.argument.name: distance for i in prefetched}))
+
+    print("%12s %12s %12s %12s %12s" %
+          ('mode', 'ntstores', 'prefetch', 'time (s)', 'GPts/s'))
+    for i in results:
+        if len(i) == 4:
+            i = i[:2] + ('-',) + i[2:]
+        print("%12s %12s %12s %12.4f %12.4f" % i)
+
+
+if __name__ == "__main__":
+    run()
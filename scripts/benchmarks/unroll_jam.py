@@ -0,0 +1,54 @@
+"""
+Compare the throughput of an acoustic-like stencil for each of the unroll
+factors of the loops enclosing the innermost ones (see the DLE option
+``unrolljam``), the unroll factor 1 meaning no unroll-and-jam.
+
+Whether unroll-and-jam pays off depends on the stencil: the loads it saves
+must outweigh the increased register pressure, hence the unroll factor is
+subject to auto-tuning.
+"""
+
+import click
+
+from devito import Grid, Function, TimeFunction, Eq, Operator, configuration
+from devito.dle import UnrollArg
+from devito.tools import prod
+
+
+@click.command()
+@click.option('-d', '--shape', default=(256, 256, 256), help='Grid shape')
+@click.option('-so', '--space-order', default=16, help='Space order')
+@click.option('-nt', '--timesteps', default=20, help='Number of timesteps')
+@click.option('-bs', '--blockshape', default=(32, 32), help='Block shape')
+@click.option('--intrinsics', is_flag=True, help='Use explicit vector intrinsics')
+def run(shape, space_order, timesteps, blockshape, intrinsics):
+    configuration['log_level'] = 'ERROR'
+
+    grid = Grid(shape=shape)
+    m = Function(name='m', grid=grid, space_order=space_order)
+    u = TimeFunction(name='u', grid=grid, time_order=2, space_order=space_order)
+    m.data[:] = 1.
+    u.data[:] = 1.
+    op = Operator(Eq(u.forward, 2*u - u.backward + m*u.laplace),
+                  dle=('advanced', {'unrolljam': True, 'intrinsics': intrinsics,
+                                    'blockshape': blockshape}))
+    unrolled = [i for i in op._dle_args if isinstance(i, UnrollArg)]
+
+    # Warm up (JIT compilation, first touch, ...)
+    op.apply(time_M=1)
+
+    results = []
+    for factor in unrolled[0].candidates:
+        # Each unroll factor is run three times, and the best run is retained
+        time = min(sum(i.time for i in op.apply(time_M=timesteps, **{
+            i.argument.name: factor for i in unrolled}).values()) for _ in range(3))
+        gpointss = prod(shape)*timesteps/time/10**9
+        results.append((factor, time, gpointss))
+
+    print("%12s %12s %12s" % ('unroll', 'time (s)', 'GPts/s'))
+    for factor, time, gpointss in results:
+        print("%12s %12.4f %12.4f" % (factor, time, gpointss))
+
+
+if __name__ == "__main__":
+    run()
@@ -1,6 +1,7 @@
 from __future__ import absolute_import
 
 from functools import reduce
+from hashlib import sha1
 from operator import mul
 try:
     from StringIO import StringIO
@@ -113,3 +114,140 @@ def test_timesteps_per_at_run():
     temporary_handler.close()
     buffer.flush()
     buffer.close()
+
+
+@silencio(log_level='DEBUG')
+@skipif_yask
+def test_flags_autotuning():
+    """
+    Check that autotuning the compiler flags times each flag variant, and
+    that the winning shared object is persisted and then loaded directly.
+    """
+    from devito.compiler import get_jit_dir
+    from devito.core.autotuning import _tuned, options
+    from devito.tools import cpu_model
+
+    compiler = configuration['compiler']
+    if not compiler.tuning_flags():
+        pytest.skip("No compiler flags to tune with compiler `%s`" % compiler)
+
+    buffer = StringIO()
+    temporary_handler = logging.StreamHandler(buffer)
+    logger.addHandler(temporary_handler)
+
+    grid = Grid(shape=(16, 16, 16))
+    u = TimeFunction(name='u', grid=grid, space_order=2)
+    op = Operator(Eq(u.forward, 0.1*u.laplace + 1.))
+
+    # Start from scratch, as a previous run may have persisted the tuned binary
+    name = '%s-tuned-%s' % (op._soname, sha1(cpu_model().encode()).hexdigest())
+    sofile = get_jit_dir().joinpath(name + compiler.so_ext)
+    if sofile.is_file():
+        sofile.unlink()
+    _tuned.pop(name, None)
+
+    op.apply(time_M=9)
+    expected = u.data.copy()
+
+    u.data[:] = 0.
+    op.apply(time_M=9, autotune_flags=True)
+    assert np.allclose(u.data, expected, rtol=1e-5)
+    out = [i for i in buffer.getvalue().split('\n') if 'AT: Compiler flags' in i]
+    assert len(out) == 1 + len(compiler.tuning_flags())
+    assert all('in %d timesteps' % options['at_squeezer'] in i for i in out)
+    assert sofile.is_file()
+    buffer.truncate(0)
+
+    # In a new process, the tuned shared object would be loaded directly
+    _tuned.pop(name)
+    u.data[:] = 0.
+    op.apply(time_M=9, autotune_flags=True)
+    assert np.allclose(u.data, expected, rtol=1e-5)
+    assert not [i for i in buffer.getvalue().split('\n') if 'AT:' in i]
+
+    logger.removeHandler(temporary_handler)
+
+    temporary_handler.flush()
+    temporary_handler.close()
+    buffer.flush()
+    buffer.close()
+
+
+@silencio(log_level='DEBUG')
+@skipif_yask
+def test_at_unroll_jam():
+    """
+    Check that the unroll factor of the unroll-and-jammed loops is auto-tuned,
+    after the block shape, and that the tuned run gives the expected results.
+    """
+    from devito.dle.backends import AdvancedRewriter
+
+    buffer = StringIO()
+    temporary_handler = logging.StreamHandler(buffer)
+    logger.addHandler(temporary_handler)
+
+    grid = Grid(shape=(30, 30, 30))
+    u = TimeFunction(name='u', grid=grid, space_order=4)
+    eq = Eq(u.forward, u + 1e-4*u.dy2 + 1.)
+
+    init = np.random.rand(*grid.shape)
+    u.data[0, :] = init
+    Operator(eq, dle='noop')(time_M=4)
+    expected = u.data.copy()
+
+    u.data[:] = 0.
+    u.data[0, :] = init
+    op = Operator(eq, dle=('advanced', {'unrolljam': True, 'blockalways': True}))
+    op(time_M=4, autotune=True)
+
+    out = [i for i in buffer.getvalue().split('\n') if 'AT: Unroll factor' in i]
+    assert len(out) == len(AdvancedRewriter.UNROLL_JAM) + 1
+    assert 'Auto-tuned unroll factor' in buffer.getvalue()
+    assert np.allclose(u.data, expected)
+
+    logger.removeHandler(temporary_handler)
+
+    temporary_handler.flush()
+    temporary_handler.close()
+    buffer.flush()
+    buffer.close()
+
+
+@silencio(log_level='DEBUG')
+@skipif_yask
+def test_at_prefetch():
+    """
+    Check that the prefetch distance is auto-tuned, after the block shape, and
+    that the tuned run gives the expected results.
+    """
+    from devito.dle.backends import AdvancedRewriter
+
+    buffer = StringIO()
+    temporary_handler = logging.StreamHandler(buffer)
+    logger.addHandler(temporary_handler)
+
+    grid = Grid(shape=(30, 30, 30))
+    u = TimeFunction(name='u', grid=grid, space_order=4)
+    eq = Eq(u.forward, u + 1e-4*u.dy2 + 1.)
+
+    init = np.random.rand(*grid.shape)
+    u.data[0, :] = init
+    Operator(eq, dle='noop')(time_M=4)
+    expected = u.data.copy()
+
+    u.data[:] = 0.
+    u.data[0, :] = init
+    op = Operator(eq, dle=('advanced', {'streaming': True, 'blockalways': True}))
+    op(time_M=4, autotune=True)
+
+    out = [i for i in buffer.getvalue().split('\n') if 'AT: Prefetch distance' in i]
+    assert len(out) == len(AdvancedRewriter.PREFETCH)
+    assert 'Auto-tuned prefetch distance' in buffer.getvalue()
+    assert np.allclose(u.data, expected)
+
+    logger.removeHandler(temporary_handler)
+
+    temporary_handler.flush()
+    temporary_handler.close()
+    buffer.flush()
+    buffer.close()
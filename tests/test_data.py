@@ -1,4 +1,4 @@
-from conftest import skipif_yask
+from conftest import skipif_yask, configuration_override
 import pytest
 import numpy as np
 
@@ -196,6 +196,39 @@ def test_domain_vs_halo():
     assert v._extent_padding.left == v._extent_padding.right == (1, 3, 4)
 
 
+@configuration_override('autopadding', True)
+def test_autopadding():
+    """
+    Tests the automatic padding policy: rows are rounded up to a multiple of
+    the cache line, and critical (power-of-two) strides are skewed.
+    """
+    # Innermost rows are rounded up to 64 bytes, i.e. 16 float32 or 8 float64
+    grid = Grid(shape=(30, 41))
+    u = TimeFunction(name='u', grid=grid, space_order=4)
+    assert u.shape_allocated == (2, 38, 64)
+    assert u._offset_domain.left == (0, 4, 4)
+    v = Function(name='v', grid=grid, space_order=4, dtype=np.float64)
+    assert v.shape_allocated == (38, 56)
+
+    # Power-of-two grids, where all strides would be multiples of 4 KB
+    grid = Grid(shape=(256, 256, 256))
+    w = Function(name='w', grid=grid, space_order=0)
+    assert w._padding == ((0, 0), (0, 1), (0, 0))
+    assert w.shape_allocated == (256, 257, 256)
+
+    # User-provided padding takes precedence
+    f = Function(name='f', grid=grid, space_order=0, padding=0)
+    assert f.shape_allocated == f.shape
+
+    # Padding doesn't affect the numerics
+    grid = Grid(shape=(30, 41))
+    u1 = TimeFunction(name='u1', grid=grid, space_order=4, padding=0)
+    u.data[:] = u1.data[:] = np.random.RandomState(0).rand(*u.shape)
+    Operator(Eq(u.forward, u.laplace + u))(time_M=2)
+    Operator(Eq(u1.forward, u1.laplace + u1))(time_M=2)
+    assert np.all(u.data == u1.data)
+
+
 def test_scalar_arg_substitution(t0, t1):
     """
     Tests the relaxed (compared to other devito sympy subclasses)
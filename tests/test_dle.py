@@ -10,10 +10,12 @@ from sympy import solve
 from conftest import EVAL
 
 from devito.dle import transform
-from devito import Grid, Function, TimeFunction, Eq, Operator
+from devito import (Grid, Function, TimeFunction, Eq, Operator, configuration,
+                    infer_cpu, ISAs)
 from devito.ir.equations import DummyEq
 from devito.ir.iet import (ELEMENTAL, Expression, Callable, Iteration, List, tagger,
                            Transformer, FindNodes, iet_analyze, retrieve_iteration_tree)
+from devito.tools import flatten
 from unittest.mock import patch
 
 
@@ -439,3 +441,143 @@ def test_loops_collapsed(fe, t0, t1, t2, t3, exprs, expected, iters):
         else:
             for k in pragmas:
                 assert 'omp for collapse' not in k.value
+
+
+@skipif_yask
+@pytest.mark.parametrize('isa', ['avx2', 'avx512'])
+@pytest.mark.parametrize('dtype', [np.float32, np.float64])
+@pytest.mark.parametrize('shape,space_order', [
+    ((17, 37), 2), ((16, 40), 4), ((10, 5), 8)
+])
+def test_intrinsics(isa, dtype, shape, space_order):
+    """
+    Test that lowering the innermost loops to explicit vector intrinsics
+    produces the same results as the compiler-vectorized code.
+    """
+    host_isa = infer_cpu()[0]
+    if ISAs.index(host_isa) < ISAs.index(isa):
+        pytest.skip("Host does not support `%s`" % isa)
+
+    grid = Grid(shape=shape, dtype=dtype)
+    u = TimeFunction(name='u', grid=grid, space_order=space_order)
+    u.data[0, :] = np.random.rand(*shape).astype(dtype)
+    eq = Eq(u.forward, u + 0.1*u.laplace + 0.2*u.dx)
+
+    results = []
+    default_isa = configuration['isa']
+    configuration['isa'] = isa
+    for intrinsics in [False, True]:
+        u.data[1, :] = 0.
+        op = Operator(eq, dle=('advanced', {'intrinsics': intrinsics}))
+        assert ('dvf_' in str(op.ccode) or 'dvd_' in str(op.ccode)) is intrinsics
+        op(time_m=0, time_M=0)
+        results.append(u.data[1].copy())
+    configuration['isa'] = default_isa
+
+    # Relative to the largest value, as the stencils cancel out elementwise
+    error = np.abs(results[0] - results[1]).max() / np.abs(results[0]).max()
+    assert error < (1e-6 if dtype == np.float32 else 1e-14)
+
+
+@skipif_yask
+@pytest.mark.parametrize('intrinsics', [False, True])
+@pytest.mark.parametrize('unrolljam,factors', [
+    (2, [None]), (3, [None]), (True, [None, 0, 1, 2, 3, 4, 7])
+])
+def test_unroll_jam(intrinsics, unrolljam, factors):
+    """
+    Test that unroll-and-jamming the loops enclosing the innermost ones
+    produces the same results as the original loops, for any unroll factor.
+    """
+    host_isa = infer_cpu()[0]
+    if intrinsics and host_isa not in ['avx2', 'avx512']:
+        pytest.skip("Host does not support vector intrinsics")
+
+    grid = Grid(shape=(13, 21, 37))
+    u = TimeFunction(name='u', grid=grid, space_order=8)
+    eq = Eq(u.forward, u + 0.1*u.laplace + 0.2*u.dy)
+    init = np.random.rand(*grid.shape).astype(grid.dtype)
+
+    u.data[0, :] = init
+    Operator(eq, dle='noop')(time_m=0, time_M=0)
+    expected = u.data[1].copy()
+
+    default_isa = configuration['isa']
+    configuration['isa'] = host_isa
+    op = Operator(eq, dle=('advanced', {'unrolljam': unrolljam,
+                                        'intrinsics': intrinsics}))
+    configuration['isa'] = default_isa
+    step = 4 if unrolljam is True else unrolljam
+    assert 'y += %d' % step in str(op.ccode)
+
+    for factor in factors:
+        u.data[:] = 0.
+        u.data[0, :] = init
+        op(time_m=0, time_M=0, **({} if factor is None else {'y_jam': factor}))
+        error = np.abs(u.data[1] - expected).max() / np.abs(expected).max()
+        assert error < 1e-6
+
+
+@skipif_yask
+@pytest.mark.parametrize('intrinsics', [False, True])
+@pytest.mark.parametrize('unrolljam', [False, True])
+def test_streaming(intrinsics, unrolljam):
+    """
+    Test that nontemporal stores and software prefetching produce the same
+    results as the original loops, for any prefetch distance.
+    """
+    host_isa = infer_cpu()[0]
+    if intrinsics and host_isa not in ['avx2', 'avx512']:
+        pytest.skip("Host does not support vector intrinsics")
+
+    # The innermost extent, 32 plus the halo, is a multiple of the vector length
+    grid = Grid(shape=(13, 21, 32))
+    u = TimeFunction(name='u', grid=grid, space_order=8)
+    eq = Eq(u.forward, u + 0.1*u.laplace + 0.2*u.dy)
+    init = np.random.rand(*grid.shape).astype(grid.dtype)
+
+    u.data[0, :] = init
+    Operator(eq, dle='noop')(time_m=0, time_M=0)
+    expected = u.data[1].copy()
+
+    # Any stream larger than 1KB is deemed too large for the cache
+    default_isa = configuration['isa']
+    configuration['isa'] = host_isa
+    op = Operator(eq, dle=('advanced', {'streaming': 1024, 'intrinsics': intrinsics,
+                                        'unrolljam': unrolljam, 'blockalways': True}))
+    configuration['isa'] = default_isa
+    assert '__builtin_prefetch' in str(op.ccode)
+    assert ('_stream(' in str(op.ccode)) is intrinsics
+
+    for distance in [None, 0, 1, 2, 40]:
+        u.data[:] = 0.
+        u.data[0, :] = init
+        op(time_m=0, time_M=0, **({} if distance is None else {'y_pf': distance}))
+        error = np.abs(u.data[1] - expected).max() / np.abs(expected).max()
+        assert error < 1e-6
+
+
+@skipif_yask
+def test_streaming_write_only():
+    """
+    Test that nontemporal stores are only used for the write-only streams
+    larger than the last level cache.
+    """
+    host_isa = infer_cpu()[0]
+    if host_isa not in ['avx2', 'avx512']:
+        pytest.skip("Host does not support vector intrinsics")
+
+    grid = Grid(shape=(16, 32))
+    u = TimeFunction(name='u', grid=grid, space_order=2)
+    p = TimeFunction(name='p', grid=grid, space_order=2)
+    v = Function(name='v', grid=grid, space_order=2)
+    # The buffer slot of `u` written is never read, unlike that of `p`
+    eqs = [Eq(u.forward, u + v.dx), Eq(p.forward, 2*p.forward + v)]
+
+    default_isa = configuration['isa']
+    configuration['isa'] = host_isa
+    for streaming, expected in [(1024, ['u']), (2**20, [])]:
+        op = Operator(eqs, dle=('advanced', {'streaming': streaming, 'intrinsics': True}))
+        streamed = [i.ntstores for i in FindNodes(Iteration).visit(op) if i.ntstores]
+        assert sorted(set(flatten(streamed))) == expected
+    configuration['isa'] = default_isa
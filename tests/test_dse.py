@@ -136,6 +136,18 @@ def test_tti_rewrite_aggressive(tti_nodse):
     assert np.allclose(tti_nodse[1].data, rec.data, atol=10e-1)
 
 
+@skipif_yask
+def test_tti_rewrite_precomputed_trig(tti_nodse):
+    operator = tti_operator(dse='advanced')
+    operator.model.tabulate_angles()
+    rec, u, v, _ = operator.forward()
+
+    assert 'cos_theta' in str(operator.op_fwd('centered', False))
+    assert 'cos(' not in str(operator.op_fwd('centered', False))
+    assert np.allclose(tti_nodse[0].data, v.data, atol=10e-1)
+    assert np.allclose(tti_nodse[1].data, rec.data, atol=10e-1)
+
+
 @skipif_yask
 @pytest.mark.parametrize('kernel,space_order,expected', [
     ('shifted', 8, 355), ('shifted', 16, 622),
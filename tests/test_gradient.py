@@ -5,7 +5,7 @@ from conftest import skipif_yask
 
 from devito import Function, info, clear_cache
 from examples.seismic.acoustic.acoustic_example import smooth10, acoustic_setup as setup
-from examples.seismic import Receiver
+from examples.seismic import PointSource, Receiver
 
 
 @skipif_yask
@@ -201,6 +201,85 @@ class TestGradient(object):
         assert np.isclose(p1[0], 1.0, rtol=0.1)
         assert np.isclose(p2[0], 2.0, rtol=0.1)
 
+    @pytest.mark.parametrize('nworkers', [1, 2])
+    def test_gradient_shots(self, nworkers, shape=(50, 60), space_order=4):
+        """
+        This test ensures that the batched shot runner gives the same receiver
+        data as individual forward runs, and that the reduced gradient equals
+        the sum of the individual shot gradients.
+        """
+        wave = setup(shape=shape, spacing=(15., 15.), tn=300., nbpml=10,
+                     space_order=space_order)
+        src0 = np.array(wave.source.coordinates.data)
+        rec0 = np.array(wave.receiver.coordinates.data)
+        geometries = [(src0 + [20.*i, 0.], rec0[:30 + i]) for i in range(3)]
+
+        # Reference: one shot at a time
+        observed = []
+        grad = Function(name='grad', grid=wave.model.grid)
+        for src_coords, rec_coords in geometries:
+            src = PointSource(name='src', grid=wave.model.grid,
+                              time_range=wave.source.time_range,
+                              coordinates=src_coords, data=wave.source.data)
+            rec = Receiver(name='rec', grid=wave.model.grid, coordinates=rec_coords,
+                           time_range=wave.receiver.time_range)
+            rec, u, _ = wave.forward(src=src, rec=rec, save=True)
+            observed.append(np.array(rec.data))
+            # Residual against the observed data used below, i.e. `2*rec`
+            rec.data[:] *= -1.
+            wave.gradient(rec, u, grad=grad)
+
+        shots = dict(wave.forward_shots(geometries, nworkers=nworkers))
+        assert sorted(shots) == [0, 1, 2]
+        for i, d in enumerate(observed):
+            assert np.allclose(shots[i], d)
+
+        gradient, misfits = wave.gradient_shots(geometries, [2.*i for i in observed],
+                                                nworkers=nworkers)
+        assert sorted(i for i, _ in misfits) == [0, 1, 2]
+        assert np.allclose(gradient, grad.data, atol=1e-5*np.abs(grad.data).max())
+
+    @pytest.mark.parametrize('layout', ['outer', 'inner'])
+    def test_forward_batched(self, layout, shape=(50, 60), space_order=4):
+        """
+        This test ensures that propagating a batch of shots through a single
+        operator gives the same receiver data as individual forward runs,
+        regardless of the position of the shot dimension.
+        """
+        wave = setup(shape=shape, spacing=(15., 15.), tn=300., nbpml=10,
+                     space_order=space_order)
+        src0 = np.array(wave.source.coordinates.data)
+        rec0 = np.array(wave.receiver.coordinates.data)
+        geometries = [(src0 + [20.*i, 0.], rec0 - [10.*i, 0.]) for i in range(4)]
+
+        data, _ = wave.forward_batched(geometries, layout=layout)
+        assert data.shape == (4, wave.receiver.nt, wave.receiver.npoint)
+        for i, d in sorted(wave.forward_shots(geometries)):
+            assert np.allclose(data[i], d, atol=1e-6*np.abs(d).max())
+
+    @pytest.mark.parametrize('buffer_size', [16, 500])
+    def test_forward_stream(self, tmpdir, buffer_size, shape=(50, 60), space_order=4):
+        """
+        This test ensures that streaming the receiver data out of a ring buffer,
+        to both a file and a callback, gives the same traces as a regular
+        forward run.
+        """
+        wave = setup(shape=shape, spacing=(15., 15.), tn=300., nbpml=10,
+                     space_order=space_order)
+        rec, _, _ = wave.forward()
+
+        blocks = []
+        filename = str(tmpdir.join('traces.npy'))
+        traces, _, _ = wave.forward_stream(filename=filename, buffer_size=buffer_size,
+                                           callback=lambda *args: blocks.append(args))
+        assert traces.shape == (wave.receiver.npoint, wave.receiver.nt)
+        assert np.allclose(np.load(filename, mmap_mode='r').T, rec.data)
+        # The first and last timesteps are not computed, as with `forward`
+        assert blocks[0][0] == 1
+        assert [i for i, _ in blocks[1:]] == list(range(buffer_size,
+                                                        wave.receiver.nt, buffer_size))
+        assert np.allclose(np.concatenate([i for _, i in blocks]), rec.data[1:-1])
+
 
 if __name__ == "__main__":
     TestGradient().test_gradientFWI(shape=(70, 80), kernel='OT2', space_order=4)
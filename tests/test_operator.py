@@ -4,10 +4,16 @@ from conftest import EVAL, dims, time, x, y, z, skipif_yask
 
 import numpy as np
 import pytest
-
-from devito import (clear_cache, Grid, Eq, Operator, Constant, Function, TimeFunction,
-                    SparseFunction, SparseTimeFunction, Dimension, error)
-from devito.ir.iet import (Expression, Iteration, ArrayCast, FindNodes,
+from sympy import cos, sin
+
+from devito import (clear_cache, configuration, Grid, Eq, Operator, Constant, Function,
+                    TimeFunction, SparseFunction, SparseTimeFunction, Dimension,
+                    ConditionalDimension, error, MemoryPlanner, OperatorBundle)
+from devito.compiler import get_jit_dir
+from devito.exceptions import InvalidArgument
+from devito.operator import jit_code
+from devito.profiling import PerformanceSummary
+from devito.ir.iet import (Expression, Iteration, ArrayCast, Conditional, FindNodes,
                            IsPerfectIteration, retrieve_iteration_tree)
 from devito.ir.support import Any, Backward, Forward
 from devito.symbolics import indexify, retrieve_indexed
@@ -321,6 +327,25 @@ class TestAllocation(object):
         assert(np.allclose(m2.data, 0))
         assert(np.array_equal(m.data, m2.data))
 
+    @pytest.mark.parametrize('first_touch', [False, True])
+    def test_first_touch_initializer(self, first_touch):
+        grid = Grid(shape=(11, 12, 13))
+        shape = (3, 11, 12, 13)
+        values = np.arange(np.prod(shape), dtype=np.float32).reshape(shape)
+        kwargs = {'grid': grid, 'time_order': 2, 'space_order': 2,
+                  'first_touch': first_touch}
+
+        # Domain-shaped initializer
+        u = TimeFunction(name='u', initializer=values, **kwargs)
+        assert np.all(u.data == values)
+        assert np.all(u.data_with_halo[:, :2] == 0)
+        assert np.all(u.data_with_halo[:, :, :, -2:] == 0)
+
+        # Allocated-shaped initializer
+        v = TimeFunction(name='v', padding=(0, 1, 0, 2), **kwargs,
+                         initializer=np.ones((3, 17, 16, 21), dtype=np.float32))
+        assert np.all(v.data_allocated == 1)
+
     @pytest.mark.parametrize('staggered', [
         (0, 0), (0, 1), (1, 0), (1, 1),
         (0, 0, 0), (1, 0, 0), (0, 1, 0), (0, 0, 1),
@@ -365,6 +390,40 @@ class TestAllocation(object):
         Operator([set_f, set_g])()
         assert f.data[index] == 2.
 
+    def test_storage_dtype(self):
+        """
+        Test Functions stored in half precision, while computed in single precision.
+        """
+        grid = Grid(shape=(11, 11))
+        u = Function(name='u', grid=grid, storage_dtype=np.float16)
+        v = TimeFunction(name='v', grid=grid, storage_dtype=np.float16)
+        w = TimeFunction(name='w', grid=grid)
+        assert u.dtype == v.dtype == np.float32
+        assert u.data.dtype == v.data.dtype == np.float16
+
+        u.data[:] = 1./3
+        op = Operator([Eq(v.forward, u*u + u), Eq(w.forward, u*u + u)])
+        assert all(i.function.storage_dtype == np.float16
+                   for i in FindNodes(ArrayCast).visit(op) if i.function in [u, v])
+        op.apply(time_M=0)
+
+        # The arithmetic is carried out in single precision ...
+        expected = np.float32(np.float16(1./3))
+        expected = expected*expected + expected
+        assert np.allclose(w.data[1], expected, rtol=1e-7)
+        # ... while `v` is rounded to half precision upon store
+        assert np.all(v.data[1] == np.float16(expected))
+
+        # The memory traffic accounts for the storage sizes; note that `v` and `w`
+        # are counted as both read and written
+        traffic = list(op.profiler._sections.values())[0].traffic
+        traffic = traffic.subs({i: {'x_M': 10, 'y_M': 10}.get(i.name, 0)
+                                for i in traffic.free_symbols})
+        assert traffic == 11*11*(2 + 2*2 + 2*4)
+
+        with pytest.raises(ValueError):
+            Function(name='f', grid=grid, storage_dtype=np.float64)
+
 
 @skipif_yask
 class TestArguments(object):
@@ -817,6 +876,217 @@ class TestArguments(object):
         assert a.data[-1] == 1.
         assert a.data[-2] == 3.
 
+    def test_argument_recycling(self):
+        """Tests that the default arguments recycled across multiple runs
+        honour changes to time bounds, Constants and data-carrier overrides."""
+        grid = Grid(shape=(4, 4))
+        u = TimeFunction(name='u', grid=grid, save=10)
+        a = Constant(name='a', value=1.)
+        op = Operator(Eq(u.forward, u + a), dle=('advanced', {'openmp': False}))
+
+        u.data[:] = 0.
+        for i in range(4):
+            op(time_m=2*i, time_M=2*i + 1)
+        assert np.all(u.data[-2] == 8.)
+        assert np.all(u.data[-1] == 0.)
+
+        a.data = 2.
+        op(time_m=8, time_M=8)
+        assert np.all(u.data[-1] == 10.)
+
+        # The recycled defaults must not leak into runs with overrides
+        u2 = TimeFunction(name='u', grid=grid, save=3)
+        u2.data[:] = 5.
+        op(u=u2)
+        assert np.all(u2.data[-1] == 9.)
+        op(time_M=8)
+        assert np.all(u.data[-1] == 18.)
+
+        # Out-of-bounds accesses are still caught
+        with pytest.raises(InvalidArgument):
+            op(time_M=9)
+
+    def test_accumulate_summary(self):
+        """Tests aggregation of the performance summaries of multiple runs."""
+        grid = Grid(shape=(4, 4))
+        u = TimeFunction(name='u', grid=grid, save=10)
+        op = Operator(Eq(u.forward, u + 1.))
+
+        single = op.apply(time_M=7)
+        assert np.isclose(single['section0'].gpointss*single['section0'].time,
+                          8*16/10**9)
+        assert single['section0'].itershapes == [(8, 4, 4)]
+
+        summary = PerformanceSummary()
+        for i in range(0, 8, 2):
+            ret = op.apply(time_m=i, time_M=i+1, summary=summary)
+            assert ret is summary
+        assert np.all(u.data[-2] == 8.)
+        entry = summary['section0']
+        assert np.isclose(entry.gpointss*entry.time, 8*16/10**9)
+        assert np.isclose(entry.oi, op.apply(time_M=1)['section0'].oi)
+        assert entry.ops == single['section0'].ops
+        assert entry.itershapes == [(2, 4, 4)]
+
+
+@skipif_yask
+class TestMemoryReport(object):
+
+    def test_no_allocation(self):
+        grid = Grid(shape=(10, 10))
+        f = Function(name='f', grid=grid, space_order=2)
+        u = TimeFunction(name='u', grid=grid, space_order=2)
+        usave = TimeFunction(name='usave', grid=grid, save=20)
+        op = Operator([Eq(u.forward, u + f), Eq(usave, u)])
+
+        report = op.memory_report()
+        assert f._data is None and u._data is None and usave._data is None
+        assert report['f'].nbytes == 14*14*4
+        assert report['u'].nbytes == 2*14*14*4
+        assert report['usave'].kind == 'save'
+        assert report['usave'].nbytes == 20*12*12*4
+        assert report.nbytes == report.nbytes_unallocated
+        assert report.kinds['save'] == report['usave'].nbytes
+
+        # Allocated data and runtime overrides are accounted for
+        f.data[:] = 1.
+        usave2 = TimeFunction(name='usave', grid=grid, save=40)
+        report = op.memory_report(usave=usave2)
+        assert report['f'].allocated
+        assert report['usave'].nbytes == 40*12*12*4
+        assert usave2._data is None
+
+        # The Operator still runs as expected
+        op.apply(time_M=1)
+        assert np.all(usave.data[1] == 1.)
+
+    def test_temporaries(self):
+        grid = Grid(shape=(16, 16, 16))
+        u = TimeFunction(name='u', grid=grid, space_order=4)
+        m = Function(name='m', grid=grid, space_order=4)
+        op = Operator(Eq(u.forward, u.dx2*sin(m) + u.dy2*sin(m)*cos(m) + u.dz2),
+                      dse='aggressive', dle=('blocking', {'blockalways': True}))
+
+        report = op.memory_report()
+        arrays = [v for v in report.values() if v.kind == 'heap']
+        assert len(arrays) > 0
+        assert all(v.shape == (16, 16, 16) and not v.allocated for v in arrays)
+
+        # Block sizes larger than the blocked Dimensions are discarded
+        planner = MemoryPlanner(op)
+        assert planner.max_block_size(candidates=[4, 8, 32]) == 8
+        with pytest.raises(ValueError):
+            MemoryPlanner(op, budget=report.nbytes - 1).max_block_size()
+
+    def test_planner(self):
+        grid = Grid(shape=(10, 10))
+        u = TimeFunction(name='u', grid=grid)
+        usave = TimeFunction(name='usave', grid=grid, save=20)
+        op = Operator([Eq(u.forward, u + 1), Eq(usave, u)])
+
+        # `u` and a single timestep of `usave` take 2*12*12*4 and 12*12*4 bytes
+        planner = MemoryPlanner(op, budget=1152 + 35*576 + 10)
+        assert planner.max_save(usave) == 35
+        assert planner.max_checkpoints([u]) == (15*576 + 10) // (2*10*10*4)
+        assert planner.max_block_size() is None
+
+        with pytest.raises(ValueError):
+            MemoryPlanner(op, budget=1152).max_save(usave)
+
+
+@skipif_yask
+class TestOperatorBundle(object):
+
+    def test_bundle(self):
+        grid = Grid(shape=(8, 8, 8))
+        u = TimeFunction(name='u', grid=grid)
+        v = TimeFunction(name='v', grid=grid)
+        f = Function(name='f', grid=grid)
+        op0 = Operator(Eq(u.forward, u + 1), name='Op0', dle='advanced')
+        op1 = Operator(Eq(u.forward, u + 1), name='Op1', dle='advanced')
+        op2 = Operator([Eq(v.forward, v + 2), Eq(f, 3)], name='Op2', dle='advanced')
+        bundle = OperatorBundle(op0, op1, op2)
+        assert bundle['Op2'] is op2 and bundle[0] is op0
+
+        # Identical elemental functions are defined once; homonymous, yet
+        # different, elemental functions are renamed
+        # (i.e., one prototype, one definition, and the calls)
+        ccode = str(bundle.ccode)
+        assert ccode.count('void f_0(') == 2
+        assert ccode.count('f_0(') == 2*str(op0.ccode).count('f_0(') - 2
+        assert ccode.count('void f_0_0(') == 2
+        assert ccode.count('f_0_0(') == str(op2.ccode).count('f_0(')
+        # The profiler structs of `op0` and `op2` clash
+        assert 'struct profiler_Op2' in ccode
+        assert 'struct profiler_Op0' in ccode
+
+        op0.apply(time_M=0)
+        op1.apply(time_M=1)
+        op2.apply(time_M=1)
+        assert op0._lib is op1._lib is op2._lib
+        assert np.all(u.data[0] == 2.) and np.all(u.data[1] == 1.)
+        assert np.all(v.data[0] == 4.) and np.all(f.data == 3.)
+
+    def test_unique_names(self):
+        grid = Grid(shape=(4, 4))
+        u = TimeFunction(name='u', grid=grid)
+        with pytest.raises(ValueError):
+            OperatorBundle(Operator(Eq(u.forward, u + 1)), Operator(Eq(u.forward, u)))
+
+
+@skipif_yask
+class TestJITSplit(object):
+
+    def test_split(self):
+        grid = Grid(shape=(8, 8, 8))
+        u = TimeFunction(name='u', grid=grid, space_order=2)
+        eq = Eq(u.forward, u.laplace + 1.)
+
+        results = []
+        for split in [False, True]:
+            configuration['jit-split'] = split
+            try:
+                op = Operator(eq, dle='advanced')
+                units = jit_code(op.ccode)
+                u.data[:] = 1.
+                op.apply(time_M=2)
+            finally:
+                configuration['jit-split'] = False
+            results.append(u.data.copy())
+        assert np.all(results[0] == results[1])
+
+        # One compilation unit for the kernel, one per elemental function
+        nefuncs = len([i for i in op._func_table.values() if i.local])
+        assert nefuncs > 0
+        assert isinstance(units, list) and len(units) == 1 + nefuncs
+        assert 'int Kernel(' in units[0]
+        assert not any('int Kernel(' in i for i in units[1:])
+        assert all('void f_0(' in i for i in units)
+
+
+@skipif_yask
+class TestPGO(object):
+
+    def test_pgo(self):
+        if configuration['compiler'].pgo_flags('generate', '') is None:
+            pytest.skip("PGO unsupported by compiler `%s`" % configuration['compiler'])
+        grid = Grid(shape=(8, 8, 8))
+        u = TimeFunction(name='u', grid=grid, space_order=2)
+        op = Operator(Eq(u.forward, u.laplace + 1.))
+
+        results = []
+        for pgo in [False, True]:
+            u.data[:] = 1.
+            op.apply(time_M=5, pgo=pgo)
+            results.append(u.data.copy())
+        assert np.all(results[0] == results[1])
+
+        # The profile data and the optimised shared object are cached on disk
+        profdirs = list(get_jit_dir().glob('pgo-%s-*' % op._soname))
+        assert len(profdirs) == 1
+        so_ext = configuration['compiler'].so_ext
+        assert profdirs[0].joinpath('optimised%s' % so_ext).is_file()
+
 
 @skipif_yask
 class TestDeclarator(object):
@@ -934,6 +1204,54 @@ class TestDeclarator(object):
 +(double)(end_section0.tv_usec-start_section0.tv_usec)/1000000;
   return 0;""" in str(operator.ccode)
 
+    def test_heap_scratch_arena(self, a, c):
+        configuration['scratch-arena'] = True
+        try:
+            operator = Operator([Eq(a, 0.), Eq(c, c*a)], dse='noop', dle=None)
+        finally:
+            configuration['scratch-arena'] = False
+        assert """\
+  float (*a);
+  float (*c)[j_size];
+  a = (float (*)) (scratch + 0);
+  c = (float (*)[j_size]) (scratch + 64*((sizeof(float[i_size]) + 63)/64));
+  struct timeval start_section0, end_section0;""" in str(operator.ccode)
+        assert 'free(' not in str(operator.ccode)
+
+    def test_scratch_arena_reuse(self):
+        grid = Grid(shape=(10, 10, 10))
+        u = TimeFunction(name='u', grid=grid, space_order=2)
+        m = Function(name='m', grid=grid)
+        m.data[:] = np.linspace(0., 1., m.data.size).reshape(m.shape)
+        eq = Eq(u.forward, u.dx2*sin(m) + u.dy2*sin(m)*cos(m) + 1.)
+
+        results = []
+        for arena in [False, True]:
+            configuration['scratch-arena'] = arena
+            try:
+                op = Operator(eq, dse='aggressive')
+            finally:
+                configuration['scratch-arena'] = False
+            u.data[:] = np.linspace(1., 0., u.data.size).reshape(u.shape)
+            op.apply(time_M=3)
+            results.append(u.data.copy())
+        assert len(op._scratch_arrays) == 2
+        assert np.all(results[0] == results[1])
+
+        # The arena is allocated once, and reused across runs, unless larger
+        # Functions are passed in
+        nbytes = op._scratch_arena.nbytes
+        assert nbytes >= 2*10*10*10*4
+        op.apply(time_M=3)
+        assert op._scratch_arena.nbytes == nbytes
+        assert op.memory_report()[op._scratch_arrays[0].name].allocated
+
+        grid2 = Grid(shape=(12, 12, 12))
+        u2 = TimeFunction(name='u', grid=grid2, space_order=2)
+        m2 = Function(name='m', grid=grid2)
+        op.apply(time_M=3, u=u2, m=m2)
+        assert op._scratch_arena.nbytes >= 2*12*12*12*4
+
 
 @skipif_yask
 class TestLoopScheduler(object):
@@ -1000,11 +1318,12 @@ class TestLoopScheduler(object):
          '**-', ['xyz'], 'xyz'),
         # WAR 1->2, 2->3; one may think it should be expected=3, but these are all
         # Arrays, so ti0 gets optimized through index bumping and array contraction,
-        # which results in expected=2
+        # which results in expected=2; the two nests are then fused, as the RAW
+        # 2->3 is satisfied by a forward z loop, so eventually expected=1
         (('Eq(ti0[x,y,z], ti0[x,y,z] + ti1[x,y,z])',
           'Eq(ti1[x,y,z], ti0[x,y,z+1])',
           'Eq(ti3[x,y,z], ti1[x,y,z-2] + 1.)'),
-         '****', ['xyz', 'xyz'], 'xyzz'),
+         '**+', ['xyz'], 'xyz'),
         # WAR 1->3; expected=1
         (('Eq(ti0[x,y,z], ti0[x,y,z] + ti1[x,y,z])',
           'Eq(ti1[x,y,z], ti3[x,y,z])',
@@ -1286,3 +1605,85 @@ class TestLoopScheduler(object):
         trees = retrieve_iteration_tree(op)
         assert len(trees) == 4
         assert all(trees[0][0] is i[0] for i in trees)
+
+    def test_loop_shifting(self):
+        """
+        Test that two loop nests, which would not be fused because of the
+        dependences along x and y, are fused through loop shifting, and that
+        the numerical results are unaffected.
+        """
+        grid = Grid(shape=(12, 13, 14))
+        x, y, z = grid.dimensions
+        t = grid.stepping_dim
+
+        u = TimeFunction(name='u', grid=grid)
+        v = TimeFunction(name='v', grid=grid)
+        eqns = [Eq(u.forward, u + 0.1*(v[t, x+1, y, z] - v[t, x-1, y, z])),
+                Eq(v.forward, 0.5*v + 0.1*(u[t+1, x+1, y, z] - u[t+1, x-1, y+1, z] +
+                                           u[t+1, x, y, z+1]))]
+
+        results = []
+        for shifting in [False, True]:
+            configuration['loop-shifting'] = shifting
+            try:
+                op = Operator(eqns)
+            finally:
+                configuration['loop-shifting'] = False
+            u.data[:] = np.linspace(0., 1., u.data.size).reshape(u.shape)
+            v.data[:] = np.linspace(1., 0., v.data.size).reshape(v.shape)
+            op.apply(time_M=3)
+            results.append((u.data.copy(), v.data.copy()))
+
+        # A single sweep over x and y, with separate (and parallel) z loops
+        trees = retrieve_iteration_tree(op)
+        assert len(trees) == 2
+        assert all(i is j for i, j in zip(trees[0][:3], trees[1][:3]))
+        assert trees[0][3] is not trees[1][3]
+        assert trees[0][1].is_Sequential and trees[0][2].is_Sequential
+        assert all(i[3].is_Parallel for i in trees)
+        assert len(FindNodes(Conditional).visit(op)) == 2
+
+        assert np.all(results[0][0] == results[1][0])
+        assert np.all(results[0][1] == results[1][1])
+
+    def test_fusion_subsampled_save(self):
+        """
+        Test that the loop nest saving a subsampled wavefield, which is guarded
+        and thus not shared by the scheduler, is fused into the preceding nest,
+        and that the numerical results are unaffected.
+        """
+        grid = Grid(shape=(10, 10))
+        time = grid.time_dim
+
+        u = TimeFunction(name='u', grid=grid, space_order=2)
+        v = TimeFunction(name='v', grid=grid, space_order=2)
+        t_sub = ConditionalDimension('t_sub', parent=time, factor=4)
+        usave = TimeFunction(name='usave', grid=grid, save=4, time_dim=t_sub)
+        eqns = [Eq(u.forward, u.laplace + 1.), Eq(usave, u),
+                Eq(v.forward, v + u.forward.dx)]
+
+        results = []
+        for fusion in [False, True]:
+            configuration['fusion'] = fusion
+            try:
+                op = Operator(eqns, dle='noop')
+            finally:
+                configuration['fusion'] = True
+            u.data[:] = np.linspace(0., 1., u.data.size).reshape(u.shape)
+            v.data[:] = 0.
+            usave.data[:] = 0.
+            summary = op.apply(time_M=12)
+            results.append((u.data.copy(), v.data.copy(), usave.data.copy()))
+
+        # The guarded y loop now lives within the x loop of `u`, while `v` still
+        # requires its own sweep, because of its dependence on `u` along x
+        assert summary.sweeps == (3, 2)
+        trees = retrieve_iteration_tree(op)
+        assert len(trees) == 3
+        assert trees[0][1] is trees[1][1]
+        assert trees[0][2] is not trees[1][2]
+        assert trees[2][1] is not trees[0][1]
+        assert len(FindNodes(Conditional).visit(trees[0][1])) == 1
+
+        for i, j in zip(*results):
+            assert np.all(i == j)
@@ -1,5 +1,9 @@
 import numpy as np
-from examples.seismic import TimeAxis, RickerSource, demo_model
+import pytest
+from scipy import interpolate
+
+from examples.seismic import TimeAxis, RickerSource, Resampler, demo_model
+from examples.seismic.source import resampler
 
 
 def test_resample():
@@ -45,5 +49,34 @@ def test_resample():
     assert np.allclose(src_d.data, src_e.data)
 
 
+@pytest.mark.parametrize('order', [1, 2, 3, 5])
+def test_resampler(order):
+    """
+    Test that the batched resampler matches ``splrep``/``splev``, one trace at
+    a time, including when extrapolating and over extra data dimensions.
+    """
+    time_range = TimeAxis(start=0., stop=500., step=0.37)
+    new_time_range = TimeAxis(start=-2., stop=510., step=1.3)
+    data = np.random.RandomState(0).randn(time_range.num, 2, 3).cumsum(axis=0)
+
+    resampled = Resampler(time_range, new_time_range, order)(data)
+    assert resampled.shape == (new_time_range.num, 2, 3)
+
+    for i in range(2):
+        for j in range(3):
+            tck = interpolate.splrep(time_range.time_values, data[:, i, j], k=order)
+            expected = interpolate.splev(new_time_range.time_values, tck)
+            assert np.allclose(resampled[:, i, j], expected, rtol=1e-8, atol=1e-8)
+
+
+def test_resampler_cache():
+    time_range = TimeAxis(start=0., stop=500., step=0.37)
+    new_time_range = TimeAxis(start=0., stop=500., step=1.3)
+
+    obj = resampler(time_range, new_time_range, 3)
+    assert resampler(time_range._rebuild(), new_time_range._rebuild(), 3) is obj
+    assert resampler(time_range, new_time_range, 1) is not obj
+
+
 if __name__ == "__main__":
     test_resample()
@@ -1,12 +1,14 @@
+import gc
 import weakref
 
 import numpy as np
+import sympy
 import pytest
 from conftest import skipif_yask
 
 from devito import (Grid, Function, TimeFunction, SparseFunction, SparseTimeFunction,
-                    Constant, Operator, Eq, Dimension, clear_cache)
-from devito.types import _SymbolCache, Scalar
+                    Constant, Operator, Eq, Dimension, clear_cache, configuration)
+from devito.types import _SymbolCache, CacheManager, Scalar
 
 
 @skipif_yask
@@ -151,6 +153,67 @@ def test_clear_cache(nx=1000, ny=1000):
         clear_cache()
 
 
+@skipif_yask
+def test_cache_drop_dead_entries():
+    """Test that entries are dropped from the symbol cache as soon as the
+    corresponding objects are garbage collected."""
+    grid = Grid(shape=(3, 4))
+    clear_cache()
+    cache_size = len(_SymbolCache)
+
+    u = Function(name='u', grid=grid)
+    assert len(_SymbolCache) == cache_size + 1
+    del u
+    # No explicit `clear_cache()`; just drop whatever keeps `u` alive
+    sympy.cache.clear_cache()
+    gc.collect()
+    assert len(_SymbolCache) == cache_size
+
+
+@skipif_yask
+def test_cache_memory_usage():
+    grid = Grid(shape=(10, 10))
+    clear_cache()
+    # Unique names, as objects created by other tests may still be alive
+    u = Function(name='u_usage', grid=grid)
+    assert 'u_usage' not in [i for i, _ in CacheManager.memory_usage()]
+    u.data[:] = 1.
+    v = Function(name='v_usage', grid=grid, space_order=4)
+    v.data[:] = 1.
+    usage = [i for i in CacheManager.memory_usage() if i[0] in ['u_usage', 'v_usage']]
+    assert usage == [('v_usage', v.data_allocated.nbytes),
+                     ('u_usage', u.data_allocated.nbytes)]
+    assert CacheManager.nbytes() >= u.data_allocated.nbytes + v.data_allocated.nbytes
+
+
+@skipif_yask
+def test_cache_limits():
+    """Test that the caches are cleared automatically once the amount of Data
+    memory reachable through the symbol cache exceeds the given limit."""
+    grid = Grid(shape=(100, 100))
+    clear_cache()
+    limits = configuration['cache_limits']
+    configuration['cache_limits'] = {'bytes': 10**6}
+    try:
+        refs = []
+        for i in range(40):
+            # Each iteration leaves behind an unreferenced Function, which is
+            # however kept alive by the SymPy cache
+            f = Function(name='f', grid=grid, space_order=2)
+            f.data[:] = 1.
+            f.laplace
+            refs.append(weakref.ref(f._data))
+            del f
+        # 40 Functions of 43264 bytes each, but at most 10**6 pinned bytes. Data
+        # kept alive by other objects, such as those created by other tests, also
+        # counts towards the limit, so only our Functions' Data are checked
+        alive = [i() for i in refs if i() is not None]
+        assert len(alive) < 40
+        assert sum(i.nbytes for i in alive) <= 10**6 + 43264
+    finally:
+        configuration['cache_limits'] = limits
+
+
 @skipif_yask
 def test_cache_after_indexification():
     """Test to assert that the SymPy cache retrieves the right Devito data object
@@ -1,9 +1,13 @@
+from subprocess import check_output
+import sys
+import tempfile
+
 import pytest
 from conftest import skipif_yask
 
 from sympy.abc import a, b, c, d, e
 
-from devito.tools import toposort
+from devito.tools import host_cached, memoized_func, memoized_meth, toposort
 
 
 @skipif_yask
@@ -20,3 +24,76 @@ def test_toposort(elements, expected):
         assert ordering == expected
     except ValueError:
         assert expected is None
+
+
+@skipif_yask
+def test_memoized_func_lru():
+    calls = []
+
+    @memoized_func(maxsize=2)
+    def square(i):
+        calls.append(i)
+        return i*i
+
+    assert [square(i) for i in [1, 2, 1, 3, 1, 2]] == [1, 4, 1, 9, 1, 4]
+    # `2` got evicted by `3`, being the least recently used entry at that point
+    assert calls == [1, 2, 3, 2]
+    assert len(square.cache) == 2
+
+
+@skipif_yask
+def test_memoized_meth_lru():
+    class Obj(object):
+        def __init__(self):
+            self.calls = 0
+
+        @memoized_meth
+        def unbounded(self, i):
+            self.calls += 1
+            return i
+
+        @memoized_meth(maxsize=1)
+        def bounded(self, i):
+            self.calls += 1
+            return i
+
+    obj = Obj()
+    for i in [0, 1, 0, 1]:
+        assert obj.unbounded(i) == i
+    assert obj.calls == 2
+    for i in [0, 1, 0, 1]:
+        assert obj.bounded(i) == i
+    assert obj.calls == 6
+    # Caching happens on a per-instance basis
+    assert Obj().unbounded(0) == 0
+
+
+@skipif_yask
+def test_host_cached(tmpdir, monkeypatch):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmpdir))
+    calls = []
+    host = {'cpu': 'cpu0'}
+
+    @host_cached(key=lambda i: host['cpu'])
+    def probe(i):
+        calls.append(i)
+        return (i, host['cpu'])
+
+    # As read back from JSON, hence a list rather than a tuple
+    assert [probe(i) for i in [1, 2, 1, 2]] == [[1, 'cpu0'], [2, 'cpu0']]*2
+    assert calls == [1, 2]
+    # A change to the host invalidates the cached values
+    host['cpu'] = 'cpu1'
+    assert probe(1) == [1, 'cpu1']
+    assert calls == [1, 2, 1]
+
+
+def test_lazy_import():
+    """
+    Test that ``import devito`` does not import any of the packages that are
+    slow to import and rarely needed.
+    """
+    lazy = ['cpuinfo', 'matplotlib', 'mpi4py', 'devito.yask']
+    out = check_output([sys.executable, '-c', 'import sys, devito; '
+                        'print(" ".join(i for i in %s if i in sys.modules))' % lazy])
+    assert out.decode().split() == []
@@ -3,7 +3,7 @@ import pytest
 from conftest import skipif_yask
 
 from devito.ir.equations import DummyEq
-from devito.ir.iet import (Block, Expression, Callable, FindSections,
+from devito.ir.iet import (Block, Expression, Callable, FindNodes, FindSections,
                            FindSymbols, IsPerfectIteration, Transformer,
                            Conditional, NestedTransformer, printAST)
 from sympy import Mod, Eq
@@ -314,3 +314,69 @@ def test_nested_transformer(exprs, iters, block2):
   <Iteration s::s::(0, 4, 1)::(0, 0)>
     <Iteration k::k::(0, 7, 1)::(0, 0)>
       <Expression a[i] = 8.0*a[i] + 6.0/b[i]>"""
+
+
+@skipif_yask
+def test_transformer_reuse(exprs, block3):
+    """Test that a Transformer only rebuilds the nodes whose children have changed,
+    while the untouched sub-trees are reused."""
+    processed = Transformer({exprs[3]: exprs[2]}).visit(block3)
+    assert processed is not block3
+    assert processed.nodes[0] is block3.nodes[0]
+    assert processed.nodes[1] is block3.nodes[1]
+    assert processed.nodes[2] is not block3.nodes[2]
+    assert processed.nodes[2].nodes[0].expr == exprs[2].expr
+
+    assert Transformer({}).visit(block3) is block3
+
+
+@skipif_yask
+def test_signature(exprs, iters, block3):
+    """Test that the signature of an IET depends on its structure and C code,
+    rather than on the identity of its nodes."""
+    rebuilt = iters[0]([iters[3](exprs[0]),
+                        iters[1](iters[2]([exprs[1], exprs[2]])),
+                        iters[4](exprs[3])])
+    assert rebuilt is not block3
+    assert rebuilt._signature == block3._signature
+
+    swapped = iters[0]([iters[3](exprs[0]),
+                        iters[1](iters[2]([exprs[2], exprs[1]])),
+                        iters[4](exprs[3])])
+    assert swapped._signature != block3._signature
+
+    replaced = Transformer({exprs[3]: exprs[2]}).visit(block3)
+    assert replaced._signature != block3._signature
+    assert replaced._signature == iters[0]([iters[3](exprs[0]),
+                                            iters[1](iters[2]([exprs[1], exprs[2]])),
+                                            iters[4](exprs[2])])._signature
+
+
+@skipif_yask
+def test_cached_queries(exprs, iters):
+    """Test that the outcome of a query is cached on the visited node, that it
+    may be freely modified by the caller, and that rebuilt trees are queried
+    afresh."""
+    block = iters[0]([iters[3](exprs[0]),
+                      iters[1](iters[2]([exprs[1], exprs[2]])),
+                      iters[4](exprs[3])])
+    assert not block._queries
+
+    symbols = FindSymbols().visit(block)
+    assert (FindSymbols, 'symbolics') in block._queries
+    assert (FindSymbols, 'symbolics') in block.nodes[2]._queries
+    symbols.pop()
+    assert len(FindSymbols().visit(block)) == len(symbols) + 1
+
+    sections = FindSections().visit(block)
+    assert (FindSections,) in block._queries
+    assert FindSections().visit(block) == sections
+    assert len(FindNodes(Expression).visit(block)) == 4
+
+    processed = Transformer({exprs[3]: exprs[2]}).visit(block)
+    assert processed.nodes[2] is not block.nodes[2]
+    assert not processed._queries
+    assert not processed.nodes[2]._queries
+    assert processed.nodes[0]._queries
+    assert len(FindNodes(Expression).visit(processed)) == 4
+    assert FindSections().visit(processed) != sections